@@ -1,11 +1,16 @@
+import numpy as np
 import pandas as pd
 import tkinter as tk
 from tkinter import filedialog
-import unicodedata
 import os
-from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.styles import Font
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum import metricas, motor
+from comum.cabecalhos import localizar_marcador
+from comum.datas import converter_datas, normalizar_datas
+from comum.dinheiro import centavos, coluna_original, converter_centavos_mantendo_texto
+from comum.formatacao import formatar_centavos, formatar_para_saida
 
 def selecionar_arquivo():
     root = tk.Tk()
@@ -15,246 +20,123 @@ def selecionar_arquivo():
         filetypes=[("Arquivos Excel/CSV", "*.xlsx *.xls *.csv"), ("Todos os arquivos", "*.*")]
     )
 
-def normalizar_texto(texto):
-    if not isinstance(texto, str):
-        return ""
-    texto = unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('ASCII')
-    return ''.join(c for c in texto if c.isalnum() or c.isspace()).strip().lower()
-
-def criar_nome_arquivo_saida(arquivo_original, nome_planilha):
-    base, ext = os.path.splitext(arquivo_original)
-    contador = 1
-    while True:
-        novo_nome = f"{base}_extraido_{nome_planilha}_{contador}{ext}"
-        if not os.path.exists(novo_nome):
-            return novo_nome
-        contador += 1
-
-def formatar_contabil(valor):
-    if pd.isna(valor):
-        return ""
-    try:
-        valor = float(valor)
-        return f"{valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')  # Mantém 2 casas decimais
-    except:
-        return str(valor)
-
-def calcular_saldo_total_por_dia(df, valor_saldo_anterior):
-    # Converter 'Valor' para float, lidando com formatação
-    def converter_valor(valor):
-        try:
-            if isinstance(valor, str):
-                return float(valor.replace('.', '').replace(',', '.'))
-            return float(valor)
-        except (ValueError, TypeError):
-            return 0.0  # Retorna 0 para valores não numéricos
-
-    # Criar uma cópia do DataFrame com valores convertidos
-    df = df.copy()
-    df['Valor_Numerico'] = df['Valor'].apply(converter_valor)
-
-    # Agrupar por 'Data_da_Ocorrencia' e somar os valores
-    df_agrupado = df.groupby('Data_da_Ocorrencia')['Valor_Numerico'].sum().reset_index()
-
-    # Ordenar por data para garantir a sequência correta
-    df['Data_da_Ocorrencia'] = pd.to_datetime(df['Data_da_Ocorrencia'], format='%d/%m/%Y', errors='coerce')
-    df_agrupado['Data_da_Ocorrencia'] = pd.to_datetime(df_agrupado['Data_da_Ocorrencia'], format='%d/%m/%Y', errors='coerce')
-    df_agrupado = df_agrupado.sort_values('Data_da_Ocorrencia')
-
-    # Calcular o saldo acumulado, começando com o valor_saldo_anterior
-    saldo = converter_valor(valor_saldo_anterior) if valor_saldo_anterior else 0.0
-    saldos_por_dia = [saldo]  # Inicia com o saldo do valor_saldo_anterior
-
-    for valor in df_agrupado['Valor_Numerico']:
-        saldo += valor
-        saldos_por_dia.append(saldo)
-
-    # Mapear os saldos de volta para as datas, incluindo a linha sem data
-    saldo_dict = {"" : formatar_contabil(saldos_por_dia[0])}  # Saldo para a linha sem data
-    saldo_dict.update(zip(df_agrupado['Data_da_Ocorrencia'].dt.strftime('%d/%m/%Y'), [formatar_contabil(s) for s in saldos_por_dia[1:]]))
-
-    # Identificar a última data de cada mês
-    df['Mes_Ano'] = df['Data_da_Ocorrencia'].dt.to_period('M')
-    ultima_data_mes = df.groupby('Mes_Ano')['Data_da_Ocorrencia'].idxmax()
-
-    # Identificar a última linha de cada data única
-    ultima_linha_data = df.groupby('Data_da_Ocorrencia').tail(1).index
-
-    # Criar série de saldos
-    saldos = df['Data_da_Ocorrencia'].map(saldo_dict).fillna("")
-    # Substituir o saldo pela coluna 'Valor' para a última data de cada mês
-    for idx in ultima_data_mes:
-        if not pd.isna(idx):
-            saldos.iloc[int(idx)] = df.at[int(idx), 'Valor']
-
-    return saldos, ultima_linha_data
-
-def extrair_dados(arquivo):
-    try:
-        if arquivo.lower().endswith(('.xlsx', '.xls')):
-            xls = pd.ExcelFile(arquivo)
-            processar_excel(xls, arquivo)
-        elif arquivo.lower().endswith('.csv'):
-            processar_csv(arquivo)
-        else:
-            print("Formato de arquivo não suportado.")
-    except Exception as e:
-        print(f"Ocorreu um erro: {e}")
-
-def processar_excel(xls, arquivo):
-    for sheet_name in xls.sheet_names:
-        print(f"\nProcessando planilha: {sheet_name}")
-        try:
-            df = pd.read_excel(arquivo, sheet_name=sheet_name, header=None)
-            processar_dataframe(df, arquivo, sheet_name)
-        except Exception as e:
-            print(f"Erro ao processar planilha {sheet_name}: {e}")
+def calcular_saldo_total_por_dia(datas, valores, centavos_saldo_anterior):
+    """
+    Saldo acumulado no fim de cada dia, somado em centavos inteiros (exato).
+    Retorna (saldos, fim_do_dia): o saldo de cada linha (nulo nas linhas sem
+    data) e a máscara da última linha de cada data. Na linha da última data
+    de cada mês o saldo é o próprio valor da linha.
+    """
+    saldo_inicial = centavos_saldo_anterior if centavos_saldo_anterior is not None else 0
+    dias = datas.dt.normalize()
+
+    # Soma de cada dia, em ordem de data, acumulada a partir do saldo anterior
+    por_dia = pd.Series(valores.to_numpy(dtype=np.int64, na_value=0), index=valores.index).groupby(dias).sum()
+    acumulado = np.cumsum(np.r_[np.int64(saldo_inicial), por_dia.to_numpy(dtype=np.int64)])[1:]
+    saldos = pd.Series(pd.array(acumulado, dtype='Int64'), index=por_dia.index).reindex(dias).array.copy()
+
+    # Primeira linha da última data de cada mês
+    ultimo_dia_mes = dias.groupby(dias.dt.to_period('M')).transform('max')
+    fim_do_mes = ((dias == ultimo_dia_mes) & ~dias.duplicated()).to_numpy()
+    saldos[fim_do_mes] = valores.array[fim_do_mes]
+
+    fim_do_dia = (dias.notna() & ~dias.duplicated(keep='last')).to_numpy()
+    return saldos, fim_do_dia
+
+def destacar_negrito(df, linhas_negrito):
+    """Trecho do DataFrame formatado para o console, com ** no valor das linhas em negrito"""
+    df = formatar_para_saida(df, ['Valor', 'Saldo_Total'])
+    marcadas = df.index.intersection(linhas_negrito)
+    df.loc[marcadas, 'Valor'] = '**' + df.loc[marcadas, 'Valor'] + '**'
+    return df
+
+def calcular_saldos(df_final, df):
+    """
+    Substitui a formatação padrão do motor: Saldo_Total de cada dia a partir
+    do Saldo Anterior, linha do Saldo Anterior no início e negrito no valor
+    da última linha de cada data.
+    """
+    # Procurar valor do Saldo Anterior
+    with metricas.etapa('marcador', len(df)):
+        _, valor_saldo_anterior = localizar_marcador(df, ['saldo anterior'])
+    centavos_saldo_anterior = None
+    if valor_saldo_anterior is not None:
+        centavos_saldo_anterior = centavos(pd.Series([valor_saldo_anterior], dtype=np.float64)).iloc[0]
+        if pd.isna(centavos_saldo_anterior):
+            centavos_saldo_anterior = None
+    if centavos_saldo_anterior is not None:
+        print(f"Valor do Saldo Anterior encontrado: {formatar_centavos([centavos_saldo_anterior]).iloc[0]}")
+    else:
+        print("Nenhum valor de Saldo Anterior encontrado.")
+
+    # Não remover a primeira linha nem as últimas 8 linhas
+    # Não remover a última linha de cada data
+
+    # O saldo é somado em centavos inteiros; a formatação fica para a gravação
+    with metricas.etapa('normalizacao', len(df_final)) as medida:
+        convertidos = converter_centavos_mantendo_texto(df_final[['Valor']].copy(), ['Valor'])
+        valores = convertidos['Valor']
+        datas = converter_datas(df_final['Data_da_Ocorrencia'])
+        medida.saida(len(valores))
+    with metricas.etapa('saldo', len(valores)) as medida:
+        saldos, fim_do_dia = calcular_saldo_total_por_dia(datas, valores, centavos_saldo_anterior)
+        medida.saida(len(saldos))
+
+    df_final = pd.DataFrame({
+        'Data_da_Ocorrencia': normalizar_datas(datas).to_numpy(),
+        'Valor': valores.array,
+        'Saldo_Total': saldos,
+    })
+    # O que não era número em Valor volta como texto na gravação
+    if coluna_original('Valor') in convertidos.columns:
+        df_final[coluna_original('Valor')] = convertidos[coluna_original('Valor')].to_numpy()
+    ultima_linha_data = np.flatnonzero(fim_do_dia)
+
+    # Adicionar a linha do Saldo Anterior no início
+    if centavos_saldo_anterior is not None:
+        linha_saldo_anterior = pd.DataFrame({
+            'Data_da_Ocorrencia': [""],
+            'Valor': pd.array([centavos_saldo_anterior], dtype='Int64'),
+            'Saldo_Total': pd.array([centavos_saldo_anterior], dtype='Int64'),
+        })
+        df_final = pd.concat([linha_saldo_anterior, df_final], ignore_index=True)
+        ultima_linha_data = ultima_linha_data + 1
+
+    print("\nDados extraídos e formatados:")
+    print(destacar_negrito(df_final.head(), ultima_linha_data))
+
+    # Verificar as duas últimas linhas do DataFrame resultante
+    if len(df_final) >= 2:
+        print("\nDuas últimas linhas do DataFrame:")
+        print(destacar_negrito(df_final.tail(2), ultima_linha_data))
+    elif len(df_final) > 0:
+        print("\nDataFrame resultante tem menos de 2 linhas:")
+        print(destacar_negrito(df_final, ultima_linha_data))
+    else:
+        print("\nDataFrame resultante está vazio.")
 
-def processar_csv(arquivo):
-    print("\nProcessando arquivo CSV")
-    encodings = ['utf-8', 'latin1', 'iso-8859-1', 'cp1252']
-    separadores = [',', ';', '\t']
-    for encoding in encodings:
-        for sep in separadores:
-            try:
-                df = pd.read_csv(arquivo, header=None, encoding=encoding, sep=sep)
-                print(f"Arquivo lido com encoding {encoding} e separador '{sep}'")
-                processar_dataframe(df, arquivo, "CSV")
-                return
-            except:
-                continue
-    print("Não foi possível ler o arquivo CSV ")
+    # Negrito no valor da última linha de cada data
+    return df_final, {'linhas_negrito': ultima_linha_data}
 
-def processar_dataframe(df, arquivo, nome_planilha):
-    variacoes_cabecalhos = {
+PERFIL = motor.registrar_perfil({
+    'nome': 'banestes',
+    'origem': __file__,
+    'cabecalhos': {
         'data': ['data', 'dataocorrencia', 'data_ocorrencia', 'data_da_ocorrencia', 'dataocorrência', 'data ocorrência'],
         'valor': ['valor', 'valores', 'vlr', 'val']
-    }
-
-    linha_cabecalho = None
-    colunas_originais = []
-
-    for idx, linha in df.iterrows():
-        linha_normalizada = [normalizar_texto(str(cell)) for cell in linha.values]
-        encontrados = {key: False for key in variacoes_cabecalhos}
-        for col in linha_normalizada:
-            for key, variacoes in variacoes_cabecalhos.items():
-                if any(v in col for v in variacoes):
-                    encontrados[key] = True
-        if all(encontrados.values()):
-            linha_cabecalho = idx
-            colunas_originais = [str(cell).strip() for cell in linha.values]
-            print(f"Cabeçalhos encontrados: {colunas_originais}")
-            break
+    },
+    # Com duas ou mais colunas de valor, a segunda é a do lançamento
+    'colunas': [('data', 'Data_da_Ocorrencia', 0), ('valor', 'Valor', 1)],
+    'colunas_contabeis': ['Valor', 'Saldo_Total'],
+    'coluna_data': 'Data_da_Ocorrencia',
+    'transformar': calcular_saldos,
+})
 
-    # Procurar valor do Saldo Anterior
-    valor_saldo_anterior = None
-    for idx, row in df.iterrows():
-        linha_normalizada = [normalizar_texto(str(cell)) for cell in row.values]
-        if any('saldoanterior' in norm for norm in linha_normalizada):
-            for val in row:
-                try:
-                    valor_saldo_anterior = float(str(val).replace('.', '').replace(',', '.'))
-                    print(f"Valor do Saldo Anterior encontrado: {formatar_contabil(valor_saldo_anterior)}")
-                    break
-                except (ValueError, TypeError):
-                    continue
-            if valor_saldo_anterior is not None:
-                break
-
-    if linha_cabecalho is not None:
-        print(f"Encontrados cabeçalhos na linha {linha_cabecalho + 1}")
-        if valor_saldo_anterior is None:
-            print("Nenhum valor de Saldo Anterior encontrado.")
-
-        if nome_planilha == "CSV":
-            df_final = pd.read_csv(arquivo, header=linha_cabecalho)
-        else:
-            df_final = pd.read_excel(arquivo, sheet_name=nome_planilha, header=linha_cabecalho)
-
-        df_final = df_final.dropna(how='all')
-
-        colunas_map = {col: normalizar_texto(col) for col in df_final.columns}
-        df_final.rename(columns=colunas_map, inplace=True)
-
-        col_data = next((col for col in df_final.columns if 'data' in col), None)
-        colunas_valor = [col for col in df_final.columns if 'valor' in col]
-        col_valor = colunas_valor[1] if len(colunas_valor) >= 2 else (colunas_valor[0] if colunas_valor else None)
-
-        if not all([col_data, col_valor]):
-            print("As colunas 'data' ou 'valor' não foram encontradas.")
-            return
-
-        df_final = df_final[[col_data, col_valor]]
-        df_final.columns = ['Data_da_Ocorrencia', 'Valor']
-
-        # Não remover a primeira linha nem as últimas 8 linhas
-        # Não remover a última linha de cada data
-
-        df_final['Valor'] = df_final['Valor'].apply(formatar_contabil)
-
-        df_final['Data_da_Ocorrencia'] = pd.to_datetime(
-            df_final['Data_da_Ocorrencia'], errors='coerce', dayfirst=True
-        ).dt.strftime('%d/%m/%Y')
-
-        # Adicionar a linha do Saldo Anterior no início
-        if valor_saldo_anterior is not None:
-            linha_saldo_anterior = pd.DataFrame({
-                'Data_da_Ocorrencia': [""],
-                'Valor': [formatar_contabil(valor_saldo_anterior)]
-            })
-            df_final = pd.concat([linha_saldo_anterior, df_final], ignore_index=True)
-
-        # Calcular a coluna Saldo_Total com base nas somas diárias, ajustando a última data de cada mês
-        saldos, ultima_linha_data = calcular_saldo_total_por_dia(df_final, valor_saldo_anterior)
-
-        # Aplicar negrito ao valor da última linha de cada data no console
-        df_final_display = df_final.copy()
-        for idx in ultima_linha_data:
-            if idx > 0:  # Ignorar a linha do Saldo Anterior (índice 0)
-                df_final_display.at[idx, 'Valor'] = f"**{df_final.at[idx, 'Valor']}**"
-
-        df_final['Saldo_Total'] = saldos
-
-        print("\nDados extraídos e formatados:")
-        print(df_final_display.head())
-        
-        # Verificar as duas últimas linhas do DataFrame resultante
-        if len(df_final) >= 2:
-            print("\nDuas últimas linhas do DataFrame:")
-            print(df_final_display.tail(2))
-        elif len(df_final) > 0:
-            print("\nDataFrame resultante tem menos de 2 linhas:")
-            print(df_final_display)
-        else:
-            print("\nDataFrame resultante está vazio.")
-
-        nome_saida = criar_nome_arquivo_saida(arquivo, nome_planilha)
-        if nome_planilha == "CSV":
-            df_final.to_csv(nome_saida, index=False, encoding='utf-8')
-        else:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = 'Dados Extraídos'
-
-            # Mapear índices originais para linhas no Excel
-            data_indices = {idx: i for i, idx in enumerate(df_final.index) if i > 0}  # Ignorar linha 0 (Saldo Anterior)
-
-            for r_idx, row in enumerate(dataframe_to_rows(df_final, index=False, header=True), 1):
-                ws.append(row)
-                if r_idx > 1:  # Ignorar a linha do Saldo Anterior e o cabeçalho
-                    ws[f'B{r_idx}'].number_format = '#.##0,00_-'
-                    ws[f'C{r_idx}'].number_format = '#.##0,00_-'
-                    # Aplicar negrito à última linha de cada data usando o mapeamento de índices
-                    original_idx = df_final.index[r_idx - 2]  # Ajuste para alinhar com os dados (ignorando cabeçalho)
-                    if original_idx in ultima_linha_data:
-                        ws[f'B{r_idx}'].font = Font(bold=True)
-
-            wb.save(nome_saida)
+def extrair_dados(arquivo):
+    return motor.extrair_dados(PERFIL, arquivo)
 
-        print(f"\nNovo arquivo criado: {nome_saida}")
-    else:
-        print(df.head())
+def processar_dataframe(df, arquivo, nome_planilha):
+    return motor.processar_dataframe(PERFIL, df, arquivo, nome_planilha)
 
 def main():
     arquivo = selecionar_arquivo()
@@ -0,0 +1,99 @@
+"""Compara a saída da caixa gravada e recolorida depois com a gravação colorida numa passada só.
+
+    python benchmarks/caixa_saida.py --linhas 500000
+
+O extrato TXT vem de benchmarks/gerador.py. Cada modo roda em um processo
+separado, para que o pico de memória de um não contamine o do outro.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import gerador
+from comum import metricas
+
+
+def salvar_antigo(df_out, nome_saida):
+    """Como era: to_excel, depois load_workbook, recolorir célula a célula e salvar de novo"""
+    from openpyxl import load_workbook
+    from openpyxl.styles import PatternFill
+
+    df_out.to_excel(nome_saida, index=False)
+    wb = load_workbook(nome_saida)
+    ws = wb.active
+    azul = PatternFill(start_color='87CEFA', end_color='87CEFA', fill_type='solid')
+    vermelho = PatternFill(start_color='FA8072', end_color='FA8072', fill_type='solid')
+    idx_debcred = [cell.value for cell in ws[1]].index('Deb_Cred') + 1
+    for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
+        valor = row[idx_debcred - 1].value
+        if isinstance(valor, str):
+            if valor.strip().upper() == 'C':
+                for cell in row:
+                    cell.fill = azul
+            elif valor.strip().upper() == 'D':
+                for cell in row:
+                    cell.fill = vermelho
+    wb.save(nome_saida)
+
+
+def executar_modo(modo, arquivo, saida):
+    """Carrega o TXT e grava a saída no modo pedido; imprime tempo e pico de memória"""
+    from comum.saida import salvar_xlsx_colorido
+
+    sys.path.insert(0, os.path.join(RAIZ, 'caixa'))
+    import app as caixa
+
+    df = caixa.carregar_dados(arquivo)
+    col_data, col_valor, col_debcred = caixa.encontrar_colunas(df)
+    df_out = df[[col_data, col_valor, col_debcred]].copy()
+    df_out.columns = ['Data_Mov', 'Valor', 'Deb_Cred']
+
+    inicio = time.perf_counter()
+    if modo == 'antigo':
+        salvar_antigo(df_out, saida)
+    else:
+        salvar_xlsx_colorido([df_out], saida, 'Deb_Cred', caixa.CORES_DEB_CRED)
+    tempo = time.perf_counter() - inicio
+    # Sem como medir a memória (Windows sem psutil), o pico sai como nan
+    pico = metricas.pico_rss_mb()
+    print(f"{tempo:.3f} {pico if pico is not None else 'nan'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=500_000)
+    parser.add_argument('--modo', choices=['antigo', 'novo'], help=argparse.SUPPRESS)
+    parser.add_argument('--arquivo', help=argparse.SUPPRESS)
+    parser.add_argument('--saida', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        executar_modo(args.modo, args.arquivo, args.saida)
+        return
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo, = gerador.gerar(pasta, 'caixa', args.linhas)
+        resultados = {}
+        for modo in ('antigo', 'novo'):
+            saida = os.path.join(pasta, f'{modo}.xlsx')
+            processo = subprocess.run(
+                [sys.executable, __file__, '--modo', modo, '--arquivo', arquivo, '--saida', saida],
+                capture_output=True, text=True, check=True,
+            )
+            tempo, pico = map(float, processo.stdout.split()[-2:])
+            resultados[modo] = (tempo, pico, os.path.getsize(saida))
+
+    for modo, (tempo, pico, tamanho) in resultados.items():
+        print(f"{modo:>6}: {tempo:8.2f}s  pico {pico:8.1f} MiB  arquivo {tamanho / 2**20:.1f} MiB")
+    (tempo_antes, pico_antes, _), (tempo_depois, pico_depois, _) = resultados['antigo'], resultados['novo']
+    print(f"Ganho: {tempo_antes / tempo_depois:.1f}x no tempo, pico de memória {pico_antes - pico_depois:.0f} MiB menor")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Mede cada extrator de ponta a ponta sobre extratos sintéticos e grava o resultado em JSON.
+
+    python benchmarks/extratores.py --linhas 1000 100000 --saida resultados.json
+    python benchmarks/extratores.py --linhas 100000 --comparar resultados.json
+
+Os extratos são gerados por benchmarks/gerador.py (numa pasta temporária ou
+em --pasta, reaproveitada se já existir). Para cada arquivo são medidas as
+etapas que o extrator expõe:
+    leitura / carregar_dados / processar_arquivo   só a leitura do arquivo
+    processar_dataframe                            extração e gravação de cada aba
+    total                                          o arquivo inteiro, como no lote
+
+O cache de extrações fica desligado e as abas são processadas em sequência,
+para que os tempos não dependam de execuções anteriores nem do número de
+CPUs. Com --comparar, cada medição é comparada à do JSON anterior e as que
+ficaram mais lentas que a tolerância são listadas como regressão (código de
+saída 1).
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import gerador
+from comum import lote
+from comum.leitura import abrir_planilhas, detectar_formato_arquivo, ler_csv
+
+
+def medir(funcao, repeticoes):
+    """Menor tempo entre as repetições, com a saída do extrator descartada; retorna (segundos, resultado)"""
+    melhor, resultado = None, None
+    for _ in range(repeticoes):
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            resultado = funcao()
+            tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+    return melhor, resultado
+
+
+def ler_abas(arquivo):
+    """Abas do arquivo lidas inteiras, como o motor faz sem a leitura em fluxo: {nome: DataFrame sem cabeçalho}"""
+    formato = detectar_formato_arquivo(arquivo)
+    if formato == 'texto':
+        return {'CSV': ler_csv(arquivo)[0]}
+    xls = abrir_planilhas(arquivo, formato)
+    return {nome: pd.read_excel(xls, sheet_name=nome, header=None) for nome in xls.sheet_names}
+
+
+def etapas(banco, modulo, arquivo):
+    """[(etapa, função)] do extrator do banco para o arquivo"""
+    if banco == 'caixa':
+        return [('carregar_dados', lambda: modulo.carregar_dados(arquivo))]
+    if banco == 'spx':
+        extrator = modulo.ExtratorDadosFinanceiros(interface=False)
+        dados, _ = extrator.processar_arquivo(arquivo)
+        return [
+            ('processar_arquivo', lambda: extrator.processar_arquivo(arquivo)),
+            # processar_dataframe renomeia as colunas do DataFrame recebido: cada repetição usa uma cópia
+            ('processar_dataframe', lambda: [extrator.processar_dataframe(df.copy()) for df in (dados or {}).values()]),
+        ]
+    abas = ler_abas(arquivo)
+    return [
+        ('leitura', lambda: ler_abas(arquivo)),
+        ('processar_dataframe', lambda: [modulo.processar_dataframe(df, arquivo, nome) for nome, df in abas.items()]),
+    ]
+
+
+def remover_saidas(pasta):
+    """Apaga as saídas gravadas pelos extratores, para a próxima medição começar igual"""
+    for caminho in glob.glob(os.path.join(pasta, '*')):
+        if any(marcador in os.path.basename(caminho) for marcador in lote.MARCADORES_SAIDA):
+            os.remove(caminho)
+
+
+def medir_banco(pasta, banco, linhas, repeticoes):
+    modulo = lote.carregar_modulo(banco)
+    medicoes = []
+    destino = os.path.join(pasta, banco)
+    for arquivo in sorted(glob.glob(os.path.join(destino, '*'))):
+        if lote.listar_arquivos([arquivo]) != [os.path.abspath(arquivo)]:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            passos = etapas(banco, modulo, arquivo)
+        passos.append(('total', lambda: lote.processar_arquivo(banco, arquivo)))
+        for etapa, funcao in passos:
+            segundos, resultado = medir(funcao, repeticoes)
+            remover_saidas(destino)
+            medicao = {'banco': banco, 'arquivo': os.path.basename(arquivo), 'linhas': linhas,
+                       'etapa': etapa, 'segundos': round(segundos, 4)}
+            if etapa == 'total':
+                medicao['linhas_saida'] = sum(res['linhas'] for res in resultado['resultados'])
+                medicao['erro'] = resultado['erro']
+            medicoes.append(medicao)
+            print(f"{banco:>9} {medicao['arquivo']:>14} {linhas:>9} {etapa:>20}: {segundos:8.3f}s")
+    return medicoes
+
+
+def ambiente():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'openpyxl': openpyxl.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def comparar(medicoes, anterior, tolerancia):
+    """Lista as medições mais lentas que (1 + tolerância) vezes a anterior; retorna quantas"""
+    chave = lambda m: (m['banco'], m['arquivo'], m['linhas'], m['etapa'])
+    antes = {chave(m): m['segundos'] for m in anterior['medicoes']}
+    regressoes = 0
+    print("\nComparação com a execução anterior:")
+    for medicao in medicoes:
+        tempo_antes = antes.get(chave(medicao))
+        if not tempo_antes:
+            continue
+        razao = medicao['segundos'] / tempo_antes
+        marca = ''
+        if razao > 1 + tolerancia:
+            marca = '  <- REGRESSÃO'
+            regressoes += 1
+        print(f"{medicao['banco']:>9} {medicao['arquivo']:>14} {medicao['linhas']:>9} {medicao['etapa']:>20}: "
+              f"{tempo_antes:8.3f}s -> {medicao['segundos']:8.3f}s ({razao:.2f}x){marca}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1_000, 100_000],
+                        help="Tamanhos dos extratos (lançamentos), de 1000 a 5000000")
+    parser.add_argument('--bancos', nargs='+', choices=gerador.BANCOS, default=list(gerador.BANCOS))
+    parser.add_argument('--repeticoes', type=int, default=1, help="Vale o menor tempo")
+    parser.add_argument('--pasta', help="Pasta dos extratos gerados (padrão: temporária)")
+    parser.add_argument('--saida', default='resultados_extratores.json', help="JSON com as medições")
+    parser.add_argument('--comparar', metavar='JSON', help="Resultado anterior para detectar regressões")
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help="Fração de aumento de tempo aceita antes de acusar regressão")
+    args = parser.parse_args()
+
+    # Como nos processos do lote: abas em sequência; e sem cache, para medir o trabalho todo
+    lote.iniciar_processo({'ativo': False}, {})
+
+    medicoes = []
+    with contextlib.ExitStack() as pilha:
+        raiz = args.pasta or pilha.enter_context(tempfile.TemporaryDirectory())
+        for linhas in args.linhas:
+            pasta = os.path.join(raiz, str(linhas))
+            for banco in args.bancos:
+                if not os.path.isdir(os.path.join(pasta, banco)):
+                    inicio = time.perf_counter()
+                    gerador.gerar(pasta, banco, linhas)
+                    print(f"{banco:>9}: {linhas} linhas geradas em {time.perf_counter() - inicio:.1f}s")
+                medicoes.extend(medir_banco(pasta, banco, linhas, args.repeticoes))
+
+    resultado = {'gerado_em': datetime.now().isoformat(timespec='seconds'), 'ambiente': ambiente(),
+                 'repeticoes': args.repeticoes, 'medicoes': medicoes}
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        if comparar(medicoes, anterior, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
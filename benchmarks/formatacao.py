@@ -0,0 +1,54 @@
+"""Compara formatar_contabil aplicado célula a célula com centavos + formatar_centavos.
+
+    python benchmarks/formatacao.py --valores 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.dinheiro import centavos
+from comum.formatacao import formatar_centavos
+
+
+def formatar_contabil(valor):
+    """Formatação célula a célula que os extratores usavam antes das colunas em centavos"""
+    if pd.isna(valor):
+        return ""
+    try:
+        valor = float(valor)
+        return f"{valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    except (TypeError, ValueError, OverflowError):
+        return str(valor)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--valores', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    valores = pd.Series(np.round(rng.normal(0, 50_000, args.valores), 2))
+    valores[rng.random(args.valores) < 0.01] = np.nan
+
+    inicio = time.perf_counter()
+    antes = valores.apply(formatar_contabil)
+    tempo_antes = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    depois = formatar_centavos(centavos(valores))
+    tempo_depois = time.perf_counter() - inicio
+
+    # Em centavos inteiros não há zero negativo: '-0,00' sai '0,00'
+    assert antes.replace('-0,00', '0,00').tolist() == depois.tolist()
+    print(f"Series.apply(formatar_contabil):    {tempo_antes:.3f}s")
+    print(f"centavos + formatar_centavos:       {tempo_depois:.3f}s")
+    print(f"Ganho: {tempo_antes / tempo_depois:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
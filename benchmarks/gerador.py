@@ -0,0 +1,229 @@
+"""Gera extratos sintéticos no layout de cada banco, para medir os extratores.
+
+    python benchmarks/gerador.py /tmp/extratos --linhas 100000
+    python benchmarks/gerador.py /tmp/extratos --linhas 5000000 --bancos caixa santander
+
+Cada banco ganha uma pasta com os arquivos que o seu extrator aceita:
+    santander, itau,     preâmbulo, cabeçalho e lançamentos em .xlsx (com uma
+    grafeno, airbi       aba sem extrato) e em .csv; itau e airbi com duas
+                         colunas de valor
+    banestes             bloco "Saldo Anterior" antes do cabeçalho
+    caixa                TXT separado por ';' com Deb_Cred
+    spx                  .xlsx com "Saldo inicial", HTML salvo como .xls e
+                         .xlsx de texto não estruturado
+
+Os valores, saldos e datas vêm de um gerador com semente fixa: a mesma
+quantidade de linhas gera sempre os mesmos arquivos. O .xlsx é gravado em
+modo write-only, em partes; acima do limite do Excel os lançamentos
+continuam em novas abas, cada uma com o seu cabeçalho.
+"""
+import argparse
+import html
+import os
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+# Linhas por aba reservadas ao preâmbulo, cabeçalho e rodapé
+MAX_LANCAMENTOS_ABA = 1_048_576 - 16
+TAMANHO_PARTE = 100_000
+
+HISTORICOS = np.array([
+    'PIX RECEBIDO', 'PIX ENVIADO', 'TED RECEBIDA', 'PAGAMENTO DE BOLETO',
+    'TARIFA BANCARIA', 'TRANSFERENCIA ENTRE CONTAS', 'COMPRA CARTAO DEBITO',
+    'RENDIMENTO APLICACAO', 'DEPOSITO EM DINHEIRO', 'ESTORNO',
+], dtype=object)
+
+SALDO_INICIAL = 25_000.00
+
+
+def lancamentos(linhas, semente=0):
+    """
+    DataFrame Data/Historico/Valor/Saldo em ordem de data: vários lançamentos
+    por dia, valores com 2 casas (entradas e saídas) e saldo acumulado exato.
+    """
+    rng = np.random.default_rng(semente)
+    dias = np.sort(rng.integers(0, max(linhas // 20, 1) + 30, linhas))
+    centavos = np.round(rng.laplace(0, 40_000, linhas)).astype(np.int64)
+    return pd.DataFrame({
+        'Data': pd.Timestamp('2023-01-02') + pd.to_timedelta(dias, unit='D'),
+        'Historico': HISTORICOS[rng.integers(0, len(HISTORICOS), linhas)],
+        'Valor': centavos / 100,
+        'Saldo': (np.cumsum(centavos) + round(SALDO_INICIAL * 100)) / 100,
+    })
+
+
+def texto_brasileiro(valores):
+    """Textos '1.234,56' / '-1.234,56' de uma coluna float"""
+    return [f"{v:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.') for v in valores]
+
+
+def _abas(dados):
+    """Fatias dos lançamentos que cabem em uma aba cada"""
+    for inicio in range(0, max(len(dados), 1), MAX_LANCAMENTOS_ABA):
+        yield dados.iloc[inicio:inicio + MAX_LANCAMENTOS_ABA]
+
+
+def gravar_xlsx(caminho, abas):
+    """
+    abas: [(título, linhas de cabeçalho, DataFrame do corpo, linhas de rodapé)].
+    O corpo é convertido e gravado em partes, sem montar a planilha inteira.
+    """
+    wb = Workbook(write_only=True)
+    for titulo, topo, corpo, rodape in abas:
+        ws = wb.create_sheet(titulo)
+        for linha in topo:
+            ws.append(linha)
+        for inicio in range(0, len(corpo), TAMANHO_PARTE):
+            parte = corpo.iloc[inicio:inicio + TAMANHO_PARTE].astype(object)
+            for linha in parte.itertuples(index=False, name=None):
+                ws.append(linha)
+        for linha in rodape:
+            ws.append(linha)
+    wb.save(caminho)
+
+
+def _aba_vazia():
+    return ('Resumo', [['Resumo da conta'], ['Sem lançamentos neste período']], pd.DataFrame(), [])
+
+
+def gerar_tabular(pasta, banco, dados):
+    """Santander, Itaú, Grafeno e AIRBI: .xlsx com várias abas e .csv"""
+    if banco in ('itau', 'airbi'):
+        cabecalho = ['Data da Ocorrência', 'Histórico', 'Valor Documento', 'Valor Lançamento', 'Saldo']
+        valores = {'Documento': dados['Valor'].abs(), 'Valor': dados['Valor']}
+    else:
+        cabecalho = ['Data', 'Histórico', 'Valor', 'Saldo']
+        valores = {'Valor': dados['Valor']}
+    corpo = pd.DataFrame({'Data': dados['Data'], 'Historico': dados['Historico'], **valores, 'Saldo': dados['Saldo']})
+    preambulo = [[f'Extrato de conta corrente - {banco.upper()}'], ['Agência 0001 Conta 12345-6'], []]
+    vazia = [None] * len(cabecalho)
+    # Grafeno descarta a primeira e a última linha dos dados: saldo de abertura e total
+    abertura = [[None, 'SALDO ANTERIOR'] + vazia[2:]] if banco == 'grafeno' else []
+    total = [[None, 'TOTAL'] + vazia[2:]] if banco == 'grafeno' else []
+
+    abas = [(f'Extrato_{i + 1}' if i else 'Extrato', preambulo + [cabecalho] + abertura, parte, total)
+            for i, parte in enumerate(_abas(corpo))]
+    xlsx = os.path.join(pasta, 'extrato.xlsx')
+    gravar_xlsx(xlsx, abas + [_aba_vazia()])
+
+    csv = os.path.join(pasta, 'extrato.csv')
+    texto = pd.DataFrame({nome: texto_brasileiro(coluna) if i >= 2 else coluna
+                          for i, (nome, coluna) in enumerate(corpo.items())})
+    texto['Data'] = corpo['Data'].dt.strftime('%d/%m/%Y')
+    topo = pd.DataFrame([linha + [None] * (len(cabecalho) - len(linha)) for linha in preambulo]
+                        + [cabecalho] + abertura, columns=texto.columns)
+    fim = pd.DataFrame(total, columns=texto.columns)
+    pd.concat([topo, texto, fim]).to_csv(csv, sep=';', header=False, index=False, encoding='latin-1')
+    return [xlsx, csv]
+
+
+def gerar_banestes(pasta, dados):
+    """Bloco de Saldo Anterior, cabeçalho e lançamentos com datas em texto"""
+    corpo = pd.DataFrame({
+        'Data': dados['Data'].dt.strftime('%d/%m/%Y'),
+        'Documento': np.arange(len(dados)) % 900_000 + 100_000,
+        'Historico': dados['Historico'],
+        'Valor': texto_brasileiro(dados['Valor']),
+    })
+    topo = [
+        ['BANESTES S.A. - Banco do Estado do Espírito Santo'],
+        ['Extrato de conta corrente', None, 'Período: 2023'],
+        ['Saldo Anterior', None, None, texto_brasileiro([SALDO_INICIAL])[0]],
+        [],
+        ['Data', 'Documento', 'Histórico', 'Valor'],
+    ]
+    caminho = os.path.join(pasta, 'extrato.xlsx')
+    gravar_xlsx(caminho, [(f'Extrato_{i + 1}' if i else 'Extrato', topo, parte, [])
+                          for i, parte in enumerate(_abas(corpo))])
+    return [caminho]
+
+
+def gerar_caixa(pasta, dados):
+    """TXT da Caixa: valores sem sinal e Deb_Cred indicando o sentido"""
+    caminho = os.path.join(pasta, 'extrato.txt')
+    pd.DataFrame({
+        'Conta': '0001.013.00012345-6',
+        'Data_Mov': dados['Data'].dt.strftime('%Y%m%d'),
+        'Nr_Doc': np.arange(len(dados)),
+        'Historico': dados['Historico'],
+        'Valor': dados['Valor'].abs(),
+        'Deb_Cred': np.where(dados['Valor'] < 0, 'D', 'C'),
+    }).to_csv(caminho, sep=';', index=False)
+    return [caminho]
+
+
+def gerar_spx(pasta, dados):
+    """Planilha com Saldo inicial, a mesma tabela em HTML salvo como .xls e texto livre"""
+    datas = dados['Data'].dt.strftime('%d/%m/%Y')
+    valores = ['R$ ' + v for v in texto_brasileiro(dados['Valor'])]
+    saldos = texto_brasileiro(dados['Saldo'])
+    topo = [['Relatório de movimentações'],
+            ['Saldo inicial', None, None, 'R$ ' + texto_brasileiro([SALDO_INICIAL])[0]],
+            ['Data', 'Descrição', 'Valor', 'Saldo']]
+    # As 4 últimas linhas são rodapé e o extrator as descarta
+    rodape = [['Total de entradas'], ['Total de saídas'], ['Saldo final'], ['Gerado pelo sistema']]
+    corpo = pd.DataFrame({'Data': datas, 'Descricao': dados['Historico'], 'Valor': valores, 'Saldo': saldos})
+
+    xlsx = os.path.join(pasta, 'extrato.xlsx')
+    gravar_xlsx(xlsx, [(f'Sheet{i + 1}', topo, parte, rodape) for i, parte in enumerate(_abas(corpo))])
+
+    # O "xls" exportado pelo sistema é uma tabela HTML
+    xls = os.path.join(pasta, 'relatorio.xls')
+    with open(xls, 'w', encoding='utf-8') as f:
+        f.write('<html><body><table>\n')
+        for linha in topo:
+            celulas = linha + [None] * (4 - len(linha))
+            f.write('<tr>' + ''.join(f'<td>{html.escape(c or "")}</td>' for c in celulas) + '</tr>\n')
+        for inicio in range(0, len(corpo), TAMANHO_PARTE):
+            parte = corpo.iloc[inicio:inicio + TAMANHO_PARTE]
+            f.writelines(f'<tr><td>{d}</td><td>{h}</td><td>{v}</td><td>{s}</td></tr>\n'
+                         for d, h, v, s in parte.itertuples(index=False, name=None))
+        for linha in rodape:
+            f.write(f'<tr><td>{html.escape(linha[0])}</td><td></td><td></td><td></td></tr>\n')
+        f.write('</table></body></html>\n')
+
+    # Texto livre sem cabeçalho reconhecível: a descrição numa célula, os números na outra
+    livre = os.path.join(pasta, 'livre.xlsx')
+    frases = pd.DataFrame({
+        'Descricao': [f"{d} {h}" for d, h in zip(datas, dados['Historico'])],
+        'Detalhe': [f"valor {v} saldo {s}" for v, s in zip(valores, saldos)],
+    })
+    gravar_xlsx(livre, [(f'Sheet{i + 1}', [['Movimentações do período', 'Observações']], parte, [])
+                        for i, parte in enumerate(_abas(frases))])
+    return [xlsx, xls, livre]
+
+
+BANCOS = ('santander', 'itau', 'grafeno', 'airbi', 'banestes', 'caixa', 'spx')
+
+
+def gerar(pasta, banco, linhas, semente=0):
+    """Gera os arquivos do banco em pasta/banco e devolve os caminhos"""
+    destino = os.path.join(pasta, banco)
+    os.makedirs(destino, exist_ok=True)
+    dados = lancamentos(linhas, semente)
+    if banco == 'banestes':
+        return gerar_banestes(destino, dados)
+    if banco == 'caixa':
+        return gerar_caixa(destino, dados)
+    if banco == 'spx':
+        return gerar_spx(destino, dados)
+    return gerar_tabular(destino, banco, dados)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('pasta', help="Pasta onde os extratos são gravados")
+    parser.add_argument('--linhas', type=int, default=1_000, help="Lançamentos por extrato")
+    parser.add_argument('--bancos', nargs='+', choices=BANCOS, default=list(BANCOS))
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    for banco in args.bancos:
+        for caminho in gerar(args.pasta, banco, args.linhas, args.semente):
+            print(f"{banco:>9}: {caminho} ({os.path.getsize(caminho) / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
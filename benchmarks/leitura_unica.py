@@ -0,0 +1,77 @@
+"""Compara a leitura dupla antiga (header=None + releitura com header=N) com a
+promoção do cabeçalho no DataFrame já lido.
+
+    python benchmarks/leitura_unica.py --linhas 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.leitura import promover_cabecalho
+
+LINHA_CABECALHO = 3
+
+
+def gerar_planilha(caminho, linhas):
+    rng = np.random.default_rng(0)
+    valores = np.round(rng.normal(0, 500, linhas), 2)
+    corpo = pd.DataFrame({
+        0: pd.date_range('2024-01-01', periods=linhas, freq='min'),
+        1: 'PIX RECEBIDO',
+        2: valores,
+        3: np.round(np.cumsum(valores), 2),
+    })
+    preambulo = pd.DataFrame([
+        ['Extrato de conta corrente', None, None, None],
+        ['Agência 0001 Conta 12345-6', None, None, None],
+        [None, None, None, None],
+        ['Data', 'Histórico', 'Valor', 'Saldo'],
+    ])
+    pd.concat([preambulo, corpo], ignore_index=True).to_excel(
+        caminho, sheet_name='Extrato', header=False, index=False
+    )
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def leitura_dupla(caminho):
+    pd.read_excel(caminho, sheet_name='Extrato', header=None)
+    return pd.read_excel(caminho, sheet_name='Extrato', header=LINHA_CABECALHO)
+
+
+def leitura_unica(caminho):
+    df = pd.read_excel(caminho, sheet_name='Extrato', header=None)
+    return promover_cabecalho(df, LINHA_CABECALHO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'extrato.xlsx')
+        print(f"Gerando planilha com {args.linhas} linhas...")
+        gerar_planilha(caminho, args.linhas)
+
+        tempo_antes, df_antes = medir(lambda: leitura_dupla(caminho))
+        tempo_depois, df_depois = medir(lambda: leitura_unica(caminho))
+
+    pd.testing.assert_frame_equal(df_antes, df_depois)
+    print(f"Leitura dupla (antes): {tempo_antes:.2f}s")
+    print(f"Leitura única (depois): {tempo_depois:.2f}s")
+    print(f"Ganho: {tempo_antes / tempo_depois:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
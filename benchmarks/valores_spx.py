@@ -0,0 +1,85 @@
+"""Compara a extração célula a célula (Decimal) com extrair_valores_serie.
+
+    python benchmarks/valores_spx.py --linhas 300000 --repeticao 0.5
+"""
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.dinheiro import PADRAO_DINHEIRO, centavos, extrair_valores_serie
+from comum.formatacao import formatar_centavos
+
+
+def extrair_valor_numerico(texto):
+    """Referência célula a célula: o maior valor absoluto do texto, ou None"""
+    if pd.isna(texto) or not str(texto).strip():
+        return None
+
+    texto = str(texto).strip()
+    valores = []
+    for match in PADRAO_DINHEIRO.finditer(texto):
+        sinal, parte_inteira, sep_decimal, parte_decimal = match.groups()
+
+        # Ponto como separador de milhar (formato brasileiro)
+        if '.' in parte_inteira:
+            if sep_decimal == ',' or (sep_decimal is None and ',' not in texto):
+                parte_inteira = parte_inteira.replace('.', '')
+
+        numero_str = parte_inteira
+        if sep_decimal and parte_decimal:
+            numero_str += '.' + parte_decimal.ljust(2, '0')[:2]
+
+        try:
+            valor = Decimal(numero_str)
+            if sinal == '-':
+                valor = -valor
+            valores.append(float(valor))
+        except InvalidOperation:
+            continue
+
+    if not valores:
+        return None
+    return max(valores, key=abs)
+
+
+def gerar_coluna(linhas, repeticao, rng):
+    """Textos 'R$ 1.234,56' com uma fração de valores repetidos e células vazias"""
+    distintos = max(1, int(linhas * (1 - repeticao)))
+    valores = np.round(rng.normal(0, 50_000, distintos), 2)
+    textos = ('R$ ' + formatar_centavos(centavos(pd.Series(valores)))).to_numpy(dtype=object)
+    coluna = pd.Series(textos[rng.integers(0, distintos, linhas)])
+    coluna[rng.random(linhas) < 0.02] = None
+    return coluna
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=300_000)
+    parser.add_argument('--repeticao', type=float, default=0.5,
+                        help='fração das linhas que repete um valor já visto')
+    args = parser.parse_args()
+
+    coluna = gerar_coluna(args.linhas, args.repeticao, np.random.default_rng(0))
+
+    inicio = time.perf_counter()
+    antes = coluna.apply(extrair_valor_numerico)
+    tempo_antes = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    depois = extrair_valores_serie(coluna)
+    tempo_depois = time.perf_counter() - inicio
+
+    assert antes.astype(float).equals(depois)
+    print(f"Series.apply(extrair_valor_numerico): {tempo_antes:.3f}s")
+    print(f"extrair_valores_serie:                {tempo_depois:.3f}s")
+    print(f"Ganho: {tempo_antes / tempo_depois:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
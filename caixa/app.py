@@ -3,8 +3,23 @@ import tkinter as tk
 from tkinter import filedialog
 import unicodedata
 import os
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum import erros, metricas, saida
+from comum.dinheiro import coluna_original, converter_centavos_mantendo_texto, reais, textos_nao_numericos
+from comum.formatacao import EXEMPLOS_NAO_NUMERICOS, aviso_nao_numericos
+from comum.saida import salvar_xlsx_colorido
+
+# Cor da linha conforme o Deb_Cred: crédito em azul, débito em vermelho
+CORES_DEB_CRED = {'C': '87CEFA', 'D': 'FA8072'}
+
+# TXT/CSV maiores que isto são lidos em partes de TAMANHO_PARTE linhas
+LIMITE_LEITURA_INTEIRA = 256 * 2**20
+TAMANHO_PARTE = 100_000
+
+# Coluna auxiliar com o texto original dos valores que não são número (como 'N/D')
+VALOR_ORIGINAL = coluna_original('Valor')
 
 def selecionar_arquivo():
     root = tk.Tk()
@@ -22,10 +37,11 @@ def normalizar_texto(texto):
 
 def criar_nome_arquivo_saida(arquivo, sufixo=""):
     base, ext = os.path.splitext(arquivo)
-    novo_nome = f"{base}_{sufixo}.xlsx" if sufixo else f"{base}.xlsx"
+    ext = saida.EXTENSOES_SAIDA[saida.CONFIG['formato']] if saida.CONFIG['formato'] else '.xlsx'
+    novo_nome = f"{base}_{sufixo}{ext}" if sufixo else f"{base}{ext}"
     contador = 1
     while os.path.exists(novo_nome):
-        novo_nome = f"{base}_{sufixo}_{contador}.xlsx" if sufixo else f"{base}_{contador}.xlsx"
+        novo_nome = f"{base}_{sufixo}_{contador}{ext}" if sufixo else f"{base}_{contador}{ext}"
         contador += 1
     return novo_nome
 
@@ -37,20 +53,102 @@ def detectar_delimitador(arquivo):
                 return sep
     return None
 
+def separador_padrao(arquivo):
+    ext = arquivo.lower().split('.')[-1]
+    return detectar_delimitador(arquivo) or ('\t' if ext == 'txt' else ',')
+
 def carregar_dados(arquivo):
     ext = arquivo.lower().split('.')[-1]
-    if ext in ['xls', 'xlsx']:
-        df = pd.read_excel(arquivo)
-    elif ext == 'csv':
-        sep = detectar_delimitador(arquivo) or ','
-        df = pd.read_csv(arquivo, sep=sep, encoding='utf-8', on_bad_lines='skip')
-    elif ext == 'txt':
-        sep = detectar_delimitador(arquivo) or '\t'
-        df = pd.read_csv(arquivo, sep=sep, encoding='utf-8', on_bad_lines='skip')
-    else:
-        raise ValueError("Formato de arquivo não suportado")
+    with metricas.etapa('leitura') as medida:
+        if ext in ['xls', 'xlsx']:
+            df = pd.read_excel(arquivo)
+        elif ext in ['csv', 'txt']:
+            sep = separador_padrao(arquivo)
+            cabecalho = pd.read_csv(arquivo, sep=sep, encoding='utf-8', nrows=0).columns
+            tipos = tipos_leitura(cabecalho)
+            df = pd.read_csv(arquivo, sep=sep, encoding='utf-8', on_bad_lines='skip', dtype=tipos)
+            if tipos:
+                # A primeira coluna exportada é a de data
+                col_data = next(iter(tipos))
+                df[col_data] = datas_lidas(df[col_data])
+        else:
+            raise ValueError("Formato de arquivo não suportado")
+        medida.saida(len(df))
     return df
 
+def tipos_leitura(cabecalho):
+    """
+    dtype do read_csv: as colunas exportadas lidas como texto. Assim '1.234'
+    (mil duzentos e trinta e quatro) não vira 1,234 antes do formato
+    brasileiro, e cada parte da leitura em partes tem os mesmos tipos do
+    arquivo inteiro (uma data vazia não faz as datas da parte virarem float)
+    """
+    try:
+        colunas, _ = colunas_para_exportar(pd.DataFrame(columns=cabecalho))
+    except ValueError:
+        return None
+    return dict.fromkeys(colunas, str)
+
+def datas_lidas(datas):
+    """
+    Datas lidas como texto: as só com dígitos (AAAAMMDD) voltam a ser inteiros,
+    como o read_csv as inferia; as demais ficam como texto, valor a valor
+    """
+    digitos = datas.str.fullmatch(r'\d+', na=False)
+    if digitos.all():
+        return datas.astype('int64')
+    resultado = datas.to_numpy(dtype=object)
+    resultado[digitos.to_numpy()] = [int(data) for data in datas[digitos]]
+    return pd.Series(resultado, index=datas.index, name=datas.name, dtype=object)
+
+def ler_em_partes(arquivo, tamanho_parte=TAMANHO_PARTE):
+    """
+    Lê um TXT/CSV em partes de tamanho_parte linhas, sem carregar o arquivo
+    inteiro. As colunas são localizadas uma vez pelo cabeçalho e só elas são
+    lidas. Retorna (novos nomes, gerador de partes já com esses nomes).
+    """
+    sep = separador_padrao(arquivo)
+    cabecalho = pd.read_csv(arquivo, sep=sep, encoding='utf-8', nrows=0).columns
+    colunas, novos_nomes = colunas_para_exportar(pd.DataFrame(columns=cabecalho))
+
+    leitor = pd.read_csv(arquivo, sep=sep, encoding='utf-8', on_bad_lines='skip', dtype=tipos_leitura(cabecalho),
+                         usecols=[cabecalho.get_loc(col) for col in colunas], chunksize=tamanho_parte)
+    partes = (projetar_parte(parte, colunas, novos_nomes) for parte in leitor)
+    return novos_nomes, partes
+
+def projetar_parte(parte, colunas, novos_nomes):
+    """Parte lida com as colunas exportadas já renomeadas, as datas como no arquivo inteiro e o valor em centavos"""
+    df_out = parte[colunas].set_axis(novos_nomes, axis=1)
+    df_out['Data_Mov'] = datas_lidas(df_out['Data_Mov'])
+    return em_centavos(df_out)
+
+def em_centavos(df_out):
+    """
+    Valor da parte já projetada em centavos inteiros. Os valores que não são
+    número não viram nulo sem aviso: o texto deles fica em VALOR_ORIGINAL
+    """
+    with metricas.etapa('normalizacao', len(df_out)) as medida:
+        converter_centavos_mantendo_texto(df_out, ['Valor'])
+        medida.saida(len(df_out))
+    return df_out
+
+def separar_nao_numericos(partes, encontrados):
+    """
+    Repassa as partes sem a coluna VALOR_ORIGINAL. encontrados recebe a
+    quantidade e os primeiros textos; com manter_texto, eles voltam à coluna
+    Valor no lugar do nulo (como a planilha de sempre os copiava)
+    """
+    for parte in partes:
+        if VALOR_ORIGINAL in parte.columns:
+            textos = textos_nao_numericos(parte, 'Valor')
+            originais = parte.pop(VALOR_ORIGINAL)
+            encontrados['quantidade'] += len(textos)
+            faltam = EXEMPLOS_NAO_NUMERICOS - len(encontrados['exemplos'])
+            encontrados['exemplos'] += [str(v) for v in textos.unique()[:max(faltam, 0)]]
+            if encontrados['manter_texto']:
+                parte['Valor'] = parte['Valor'].astype(object).where(originais.isna(), originais)
+        yield parte
+
 def encontrar_colunas(df):
     variacoes_data = ['data', 'data_mov', 'dataocorrencia', 'data_ocorrencia', 'data movimentacao', 'data_movimentacao']
     variacoes_valor = ['valor', 'valores', 'vlr', 'val', 'montante']
@@ -72,59 +170,75 @@ def encontrar_colunas(df):
     
     return col_data, col_valor, col_debcred
 
-def salvar_data_valor(df, arquivo_origem):
+def colunas_para_exportar(df):
     col_data, col_valor, col_debcred = encontrar_colunas(df)
-    
-    colunas_para_exportar = [col_data, col_valor]
+
+    colunas = [col_data, col_valor]
     novos_nomes = ['Data_Mov', 'Valor']
-    
+
     if col_debcred:
-        colunas_para_exportar.append(col_debcred)
+        colunas.append(col_debcred)
         novos_nomes.append('Deb_Cred')
-    
-    df_out = df[colunas_para_exportar].copy()
-    df_out.columns = novos_nomes
+    return colunas, novos_nomes
 
+def gravar_data_valor(partes, novos_nomes, arquivo_origem):
     nome_saida = criar_nome_arquivo_saida(arquivo_origem, "data_valor")
-    df_out.to_excel(nome_saida, index=False)
-
-    if 'Deb_Cred' in df_out.columns:
-        colorir_linhas(nome_saida, 'Deb_Cred')
-
-    print(f"Arquivo com Data_Mov, Valor{', Deb_Cred' if col_debcred else ''} salvo em:\n{os.path.abspath(nome_saida)}")
-
-def colorir_linhas(caminho_arquivo, coluna_debcred):
-    wb = load_workbook(caminho_arquivo)
-    ws = wb.active
+    # Cores aplicadas enquanto as linhas são gravadas, sem reabrir o arquivo
+    coluna_cor = 'Deb_Cred' if 'Deb_Cred' in novos_nomes else None
+    encontrados = {'quantidade': 0, 'exemplos': [], 'manter_texto': not saida.CONFIG['formato']}
+    # Em partes, a gravação consome o leitor: o tempo inclui ler e converter cada parte
+    with metricas.etapa('gravacao') as medida:
+        if saida.CONFIG['formato']:
+            # Saída tipada: as partes seguem em fluxo, sem cores
+            conta = os.path.splitext(os.path.basename(arquivo_origem))[0]
+            linhas = saida.salvar_tipado(separar_nao_numericos(partes, encontrados), nome_saida,
+                                         saida.CONFIG['formato'], ['Data_Mov'], ['Valor'],
+                                         {'banco': 'caixa', 'conta': conta})
+        else:
+            # O xlsx colorido guarda o valor como número, em reais
+            partes = (parte.assign(Valor=reais(parte['Valor'])) for parte in partes)
+            linhas = salvar_xlsx_colorido(separar_nao_numericos(partes, encontrados), nome_saida,
+                                          coluna_cor, CORES_DEB_CRED)
+        medida.saida(linhas)
+    nome_saida = saida.destino(nome_saida)
+
+    if encontrados['quantidade']:
+        print(aviso_nao_numericos('Valor', encontrados['quantidade'], encontrados['exemplos'],
+                                  tipada=not encontrados['manter_texto']))
+
+    print(f"Arquivo com Data_Mov, Valor{', Deb_Cred' if coluna_cor else ''} salvo em:\n{os.path.abspath(nome_saida)}")
+    return {'planilha': 'data_valor', 'arquivo': nome_saida, 'linhas': linhas}
 
-    azul = PatternFill(start_color='87CEFA', end_color='87CEFA', fill_type='solid')  #cor azul
-    vermelho = PatternFill(start_color='FA8072', end_color='FA8072', fill_type='solid')  #cor vermelha
-
-    header = [cell.value for cell in ws[1]]
-    idx_debcred = header.index('Deb_Cred') + 1
+def salvar_data_valor(df, arquivo_origem):
+    colunas, novos_nomes = colunas_para_exportar(df)
+    df_out = df[colunas].copy()
+    df_out.columns = novos_nomes
+    return gravar_data_valor([em_centavos(df_out)], novos_nomes, arquivo_origem)
 
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-        valor = row[idx_debcred - 1].value
-        if isinstance(valor, str):
-            if valor.strip().upper() == 'C':
-                for cell in row:
-                    cell.fill = azul
-            elif valor.strip().upper() == 'D':
-                for cell in row:
-                    cell.fill = vermelho
+def salvar_data_valor_em_partes(arquivo, tamanho_parte=TAMANHO_PARTE):
+    # Cada parte é lida, projetada e gravada antes da próxima: a memória depende da parte, não do arquivo
+    novos_nomes, partes = ler_em_partes(arquivo, tamanho_parte)
+    return gravar_data_valor(partes, novos_nomes, arquivo)
 
-    wb.save(caminho_arquivo)
+def extrair_dados(arquivo, tamanho_parte=None):
+    metricas.planilha('data_valor')
+    try:
+        ext = arquivo.lower().split('.')[-1]
+        # TXT/CSV grandes (ou com tamanho_parte pedido) são processados em partes
+        if ext in ['csv', 'txt'] and (tamanho_parte or os.path.getsize(arquivo) > LIMITE_LEITURA_INTEIRA):
+            return [salvar_data_valor_em_partes(arquivo, tamanho_parte or TAMANHO_PARTE)]
+        df = carregar_dados(arquivo)
+        return [salvar_data_valor(df, arquivo)]
+    except Exception as e:
+        erros.falha(f"Erro: {e}")
+    return []
 
 def main():
     arquivo = selecionar_arquivo()
     if not arquivo:
         print("Nenhum arquivo selecionado.")
         return
-    try:
-        df = carregar_dados(arquivo)
-        salvar_data_valor(df, arquivo)
-    except Exception as e:
-        print(f"Erro: {e}")
+    extrair_dados(arquivo)
 
 if __name__ == "__main__":
     main()
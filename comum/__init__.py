@@ -0,0 +1 @@
+"""Funções compartilhadas entre os extratores de cada banco."""
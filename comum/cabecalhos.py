@@ -0,0 +1,99 @@
+"""Localização da linha de cabeçalho e de linhas marcadoras nas planilhas de extrato."""
+import re
+
+import numpy as np
+import pandas as pd
+
+from comum.dinheiro import converter_valores
+
+# Quantidade de linhas iniciais examinadas na busca pelo cabeçalho
+MAX_LINHAS_CABECALHO = 100
+# Linhas do início e do fim examinadas na busca por marcadores ('saldo anterior'...)
+MAX_LINHAS_MARCADOR = 100
+
+
+def normalizar_serie(serie):
+    """Versão vetorizada de normalizar_texto para uma Series de textos"""
+    return (
+        serie.str.normalize('NFKD')
+        .str.encode('ascii', 'ignore')
+        .str.decode('ascii')
+        .str.replace(r'[^0-9A-Za-z\s]', '', regex=True)
+        .str.strip()
+        .str.lower()
+    )
+
+
+def compilar_variacoes(variacoes):
+    """Junta as variações de um cabeçalho em um único padrão de busca"""
+    return re.compile('|'.join(re.escape(v) for v in variacoes))
+
+
+def detectar_cabecalho(df, variacoes_cabecalhos, max_linhas=MAX_LINHAS_CABECALHO):
+    """
+    Procura, nas primeiras max_linhas do DataFrame, a primeira linha em que
+    toda chave de variacoes_cabecalhos aparece em alguma célula normalizada.
+    As variações de cada chave podem vir já compiladas (compilar_variacoes).
+    Retorna (índice da linha, {chave: [posições das colunas]}) ou (None, {}).
+    """
+    janela = df.iloc[:max_linhas]
+    if janela.empty:
+        return None, {}
+
+    # Cada texto distinto da janela é normalizado uma única vez
+    textos = pd.Series(janela.to_numpy(dtype=object).ravel(), dtype=object).map(str)
+    codigos, unicos = pd.factorize(textos)
+    normalizados = normalizar_serie(pd.Series(unicos, dtype=object))
+
+    encontrados = {}
+    for chave, variacoes in variacoes_cabecalhos.items():
+        if not isinstance(variacoes, re.Pattern):
+            variacoes = compilar_variacoes(variacoes)
+        casa = normalizados.str.contains(variacoes).to_numpy(dtype=bool)
+        encontrados[chave] = casa[codigos].reshape(janela.shape)
+
+    linhas_validas = np.logical_and.reduce([m.any(axis=1) for m in encontrados.values()])
+    if not linhas_validas.any():
+        return None, {}
+
+    posicao = int(np.argmax(linhas_validas))
+    colunas = {chave: np.flatnonzero(m[posicao]).tolist() for chave, m in encontrados.items()}
+    return df.index[posicao], colunas
+
+
+def _sem_espacos(serie):
+    """Normaliza e tira todos os espaços, para 'Saldo  Anterior' casar com 'saldoanterior'"""
+    return normalizar_serie(serie).str.replace(r'\s+', '', regex=True)
+
+
+def localizar_marcador(df, frases, linhas_inicio=MAX_LINHAS_MARCADOR, linhas_fim=MAX_LINHAS_MARCADOR):
+    """
+    Procura a primeira linha com uma célula que contenha alguma das frases,
+    olhando só as linhas_inicio primeiras e as linhas_fim últimas linhas.
+    Células e frases são comparadas normalizadas e sem espaços.
+    Retorna (índice da linha, primeiro valor numérico à direita da célula
+    encontrada ou None), ou (None, None) se nenhuma linha tiver o marcador.
+    """
+    n = len(df)
+    if linhas_inicio + linhas_fim >= n:
+        posicoes = np.arange(n)
+    else:
+        posicoes = np.r_[0:linhas_inicio, n - linhas_fim:n]
+    celulas = df.iloc[posicoes].to_numpy(dtype=object)
+    if celulas.size == 0:
+        return None, None
+
+    # Cada texto distinto da janela é normalizado uma única vez
+    codigos, unicos = pd.factorize(pd.Series(celulas.ravel(), dtype=object).map(str))
+    padrao = compilar_variacoes(_sem_espacos(pd.Series(frases, dtype=object)))
+    casa = _sem_espacos(pd.Series(unicos, dtype=object)).str.contains(padrao).to_numpy(dtype=bool)
+    casa = casa[codigos].reshape(celulas.shape)
+
+    linhas = np.flatnonzero(casa.any(axis=1))
+    if not len(linhas):
+        return None, None
+    linha = linhas[0]
+    coluna = int(np.argmax(casa[linha]))
+    valores = converter_valores(pd.Series(celulas[linha, coluna + 1:], dtype=object)).dropna()
+    valor = float(valores.iloc[0]) if len(valores) else None
+    return df.index[posicoes[linha]], valor
@@ -0,0 +1,154 @@
+"""Cache em disco das tabelas extraídas, para não reprocessar o mesmo arquivo.
+
+A chave junta o hash do conteúdo do arquivo, o perfil do banco, a versão do
+extrator (hash do código de comum/ e do app.py do banco) e o formato de
+saída pedido: mudar qualquer um deles invalida as entradas antigas. Cada
+entrada guarda, por planilha, a tabela normalizada, as opções de gravação e
+o nome da saída já gerada, que é reaproveitado nas execuções seguintes.
+"""
+import glob
+import hashlib
+import os
+import pickle
+
+from comum import saida
+
+# Muda quando o formato das entradas muda
+VERSAO_CACHE = 1
+TAMANHO_BLOCO_HASH = 2**20
+
+# Ajustes do cache. Desligado por padrão (execuções pela interface gráfica);
+# o lote o liga, salvo com --no-cache
+CONFIG = {
+    'ativo': False,
+    'renovar': False,  # ignora as entradas existentes e grava de novo
+    'pasta': os.environ.get('EXTRATOS_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'extratos')),
+    'limite_bytes': 1 * 2**30,
+}
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_versoes = {}
+
+
+def hash_arquivo(caminho):
+    """SHA-256 do conteúdo, lido em blocos"""
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO_HASH), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def versao_extrator(origem):
+    """Hash do código compartilhado e do app.py do banco"""
+    if origem not in _versoes:
+        h = hashlib.sha256(str(VERSAO_CACHE).encode())
+        fontes = sorted(glob.glob(os.path.join(_RAIZ, 'comum', '*.py')))
+        if origem:
+            fontes.append(origem)
+        for fonte in fontes:
+            with open(fonte, 'rb') as f:
+                h.update(f.read())
+        _versoes[origem] = h.hexdigest()
+    return _versoes[origem]
+
+
+def assinatura_perfil(perfil):
+    """Texto estável com a parte declarativa do perfil"""
+    partes = []
+    for chave in sorted(perfil):
+        valor = perfil[chave]
+        if chave in ('origem', 'padroes_cabecalho', 'padroes_colunas'):
+            continue
+        if callable(valor):
+            valor = valor.__qualname__
+        partes.append(f"{chave}={valor!r}")
+    return ';'.join(partes)
+
+
+def chave_cache(arquivo, perfil):
+    h = hashlib.sha256()
+    # O formato de saída pedido também entra: a entrada guarda o nome da saída gravada
+    formato_saida = repr(sorted(saida.CONFIG.items()))
+    for parte in (hash_arquivo(arquivo), assinatura_perfil(perfil), versao_extrator(perfil.get('origem')), formato_saida):
+        h.update(parte.encode())
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+def _caminho(chave):
+    return os.path.join(CONFIG['pasta'], chave[:2], chave + '.pkl')
+
+
+def ler(chave):
+    """Planilhas guardadas para a chave, ou None (cache inativo, renovação ou ausência)"""
+    if not CONFIG['ativo'] or CONFIG['renovar']:
+        return None
+    caminho = _caminho(chave)
+    planilhas = _carregar(caminho)
+    if planilhas is not None:
+        os.utime(caminho)  # mais recente para a remoção por tamanho
+    return planilhas
+
+
+def _carregar(caminho):
+    try:
+        with open(caminho, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Entrada corrompida (gravação interrompida, versão antiga do pandas...)
+        remover(caminho)
+        return None
+
+
+def saidas_gravadas(chave):
+    """
+    {planilha: arquivo de saída} da entrada guardada para a chave, lida mesmo
+    na renovação, para que as saídas sejam regravadas no mesmo lugar
+    """
+    if not CONFIG['ativo']:
+        return {}
+    planilhas = _carregar(_caminho(chave)) or []
+    return {planilha['planilha']: planilha['arquivo'] for planilha in planilhas}
+
+
+def gravar(chave, planilhas):
+    """Guarda a lista de planilhas ({planilha, arquivo, linhas, tabela, opcoes}) e aplica o limite"""
+    if not CONFIG['ativo']:
+        return
+    caminho = _caminho(chave)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'wb') as f:
+        pickle.dump(planilhas, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho)
+    limitar_tamanho()
+
+
+def remover(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+
+def limitar_tamanho(limite_bytes=None):
+    """Remove as entradas usadas há mais tempo até o cache caber no limite"""
+    if limite_bytes is None:
+        limite_bytes = CONFIG['limite_bytes']
+    entradas = []
+    for caminho in glob.glob(os.path.join(CONFIG['pasta'], '*', '*.pkl')):
+        try:
+            estado = os.stat(caminho)
+        except OSError:
+            continue
+        entradas.append((estado.st_mtime, estado.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= limite_bytes:
+            break
+        remover(caminho)
+        total -= tamanho
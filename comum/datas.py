@@ -0,0 +1,100 @@
+"""Conversão das colunas de data para o padrão DD/MM/AAAA."""
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from dateutil import parser
+
+# Formatos exatos tentados de uma vez sobre os valores distintos da coluna.
+# DDMMAAAA e anos com 2 dígitos ficam para o dateutil, que os interpreta de outro jeito.
+# AAAAMMDD não colide com DDMMAAAA: o "mês" seria 19 ou 20.
+FORMATOS_DATA = [
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+    '%Y-%m-%d',
+    '%Y%m%d',
+    '%d/%m/%Y %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S.%f',
+]
+
+# Textos que começam pelo ano de 4 dígitos (2023/01/02, 2023.01.02 10:00, ...)
+_ANO_PRIMEIRO = re.compile(r'\d{4}(\D|$)')
+
+
+def analisar_data(texto):
+    """
+    Interpreta um texto de data com o dateutil: dia primeiro, a não ser que o
+    texto comece pelo ano. Retorna None se falhar
+    """
+    try:
+        if _ANO_PRIMEIRO.match(texto):
+            return parser.parse(texto, yearfirst=True, dayfirst=False)
+        return parser.parse(texto, dayfirst=True)
+    except Exception:
+        return None
+
+
+def _converter_unicos(unicos, analisar):
+    """Converte a lista de valores distintos; os formatos conhecidos antes, o resto um a um"""
+    # Em microssegundos cabem também as datas absurdas que o dateutil aceita
+    datas = pd.Series(pd.NaT, index=range(len(unicos)), dtype='datetime64[us]')
+    textos = {}
+    for i, valor in enumerate(unicos):
+        if isinstance(valor, datetime):
+            datas[i] = valor.replace(tzinfo=None)
+        else:
+            textos[i] = str(valor).strip()
+
+    pendentes = pd.Series(textos, dtype=object)
+    for formato in FORMATOS_DATA:
+        if pendentes.empty:
+            break
+        convertidas = pd.to_datetime(pendentes, format=formato, errors='coerce')
+        reconhecidas = convertidas.notna()
+        datas[convertidas.index[reconhecidas]] = convertidas[reconhecidas]
+        pendentes = pendentes[~reconhecidas]
+
+    # Só o que nenhum formato reconheceu passa pelo dateutil
+    for i, texto in pendentes.items():
+        data = analisar(texto)
+        if data is not None:
+            datas[i] = data.replace(tzinfo=None)
+    return datas
+
+
+def _datas_unicas(serie, analisar):
+    """Fatora a coluna e converte cada valor distinto. Retorna (códigos, datas distintas)"""
+    codigos, unicos = pd.factorize(serie)
+    return codigos, _converter_unicos(unicos.tolist(), analisar)
+
+
+def _espalhar(codigos, unicos, vazio):
+    """Leva o resultado de cada valor distinto de volta a todas as linhas"""
+    resultado = np.full(len(codigos), vazio, dtype=unicos.dtype)
+    preenchidos = codigos >= 0
+    resultado[preenchidos] = unicos[codigos[preenchidos]]
+    return resultado
+
+
+def converter_datas(serie, analisar=analisar_data):
+    """
+    Converte a coluna para datetime64 analisando cada valor distinto uma vez
+    só. analisar recebe os textos que nenhum de FORMATOS_DATA reconheceu e
+    devolve um datetime ou None. Valores não reconhecidos viram NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    codigos, datas = _datas_unicas(serie, analisar)
+    resultado = _espalhar(codigos, datas.to_numpy(), np.datetime64('NaT'))
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+
+def normalizar_datas(serie, analisar=analisar_data, formato='%d/%m/%Y'):
+    """Como converter_datas, mas devolve textos no formato pedido (NaN onde não há data)"""
+    codigos, datas = _datas_unicas(serie, analisar)
+    textos = datas.dt.strftime(formato).to_numpy(dtype=object, na_value=np.nan)
+    resultado = _espalhar(codigos, textos, np.nan)
+    return pd.Series(resultado, index=serie.index, name=serie.name, dtype=object)
@@ -0,0 +1,200 @@
+"""Extração de valores monetários de textos em formato brasileiro."""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Padrão completo para valores financeiros brasileiros
+PADRAO_DINHEIRO = re.compile(r"""
+    (?:R\$\s*)?                  # R$ opcional
+    ([-+]?)                       # Sinal (+/-)
+    \s*                           # Espaços
+    (                             # Parte inteira:
+    \d{1,3}(?:\.\d{3})*         # Com separador de milhar
+    |\d+                         # Ou sem separador
+    )
+    (?:                           # Parte decimal:
+    ([.,])                       # Separador decimal
+    (\d{1,2})                   # 1-2 dígitos decimais
+    )?                           # Parte decimal opcional
+""", re.VERBOSE)
+
+# Mesmo padrão sem grupos (findall devolve só o texto de cada número),
+# aceitando também o \x00 que separa um texto do outro
+_PADRAO_COLUNA = re.compile(re.sub(r"\((?!\?)", "(?:", PADRAO_DINHEIRO.pattern) + r"|\x00", re.VERBOSE)
+
+# Acima disso (em reais) valor * 100 deixa de ser exato em float64
+LIMITE_CENTAVOS_EXATOS = 2.0 ** 52 / 100
+
+
+def extrair_valores_serie(serie):
+    """
+    Extrai o valor numérico de cada célula de texto da coluna com
+    PADRAO_DINHEIRO: sinal, milhar e decimais no formato brasileiro, e o maior
+    valor absoluto quando a célula tem vários números.
+    Células sem valor viram NaN.
+    """
+    resultado = np.full(len(serie), np.nan)
+    preenchidos = serie.notna().to_numpy()
+    if not preenchidos.any():
+        return pd.Series(resultado, index=serie.index, name=serie.name)
+
+    # Cada texto distinto passa pela regex uma vez só, todos numa única chamada
+    codigos, unicos = pd.factorize(serie[preenchidos].map(str))
+    unicos = unicos.tolist()
+    texto = '\x00'.join(unicos) + '\x00'
+    if texto.count('\x00') == len(unicos):
+        numeros = np.array(_PADRAO_COLUNA.findall(texto), dtype=str)
+    else:
+        # Algum texto já tem \x00: cada um é procurado separadamente
+        numeros = []
+        for t in unicos:
+            numeros += [n for n in _PADRAO_COLUNA.findall(t) if n != '\x00']
+            numeros.append('')
+        numeros = np.array(numeros, dtype=str)
+
+    # O \x00 vira '' no array do NumPy e marca o fim de cada texto
+    fim = numeros == ''
+    origem = (np.cumsum(fim) - fim)[~fim]
+    numeros = numeros[~fim]
+
+    valor_unico = np.full(len(unicos), np.nan)
+    if len(numeros):
+        # 'R$ -1.234,56' -> sinal e '1.234,56'
+        numeros = np.strings.lstrip(np.strings.lstrip(numeros, 'R$'))
+        negativos = np.strings.startswith(numeros, '-')
+        numeros = np.strings.lstrip(np.strings.lstrip(numeros, '+-'))
+
+        # A parte inteira não tem vírgula: havendo uma, ela é o separador decimal.
+        # O ponto só é decimal quando seguido de 1 ou 2 dígitos no fim.
+        virgula_decimal = np.strings.find(numeros, ',') >= 0
+        digitos_apos_ponto = np.strings.str_len(numeros) - np.strings.rfind(numeros, '.') - 1
+        ponto_decimal = ~virgula_decimal & (digitos_apos_ponto >= 1) & (digitos_apos_ponto <= 2)
+        tem_virgula = (np.strings.find(np.array(unicos, dtype=str), ',') >= 0)[origem]
+
+        # O ponto só é separador de milhar com vírgula decimal, ou sem vírgula no texto
+        sem_pontos = np.strings.replace(numeros, '.', '')
+        numeros = np.where(virgula_decimal, np.strings.replace(sem_pontos, ',', '.'),
+                           np.where(ponto_decimal | tem_virgula, numeros, sem_pontos))
+
+        # Pontos de milhar mantidos junto com a parte decimal não formam um número
+        validos = np.strings.count(numeros, '.') <= 1
+        valores = numeros[validos].astype(np.float64)
+        # Como no Decimal, '-0' continua sendo zero positivo
+        negativos = negativos[validos]
+        valores[negativos] = -valores[negativos] + 0.0
+
+        # Maior valor absoluto de cada texto (o primeiro, em caso de empate)
+        origem = origem[validos]
+        ordem = np.lexsort((np.arange(len(valores)), -np.abs(valores), origem))
+        primeiros = ordem[np.r_[True, origem[ordem][1:] != origem[ordem][:-1]]] if len(ordem) else ordem
+        valor_unico[origem[primeiros]] = valores[primeiros]
+
+    resultado[preenchidos] = valor_unico[codigos]
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+
+# Texto sem vírgula cujos pontos só podem ser de milhar: '1.234', '-12.345.678'
+_SO_MILHAR = re.compile(r'[-+]?\d{1,3}(?:\.\d{3})+')
+
+
+def converter_valores(serie):
+    """
+    Converte uma coluna de valores para float. Números ficam como estão; os
+    textos são lidos no formato brasileiro ('1.234,56'; '1.234' é mil
+    duzentos e trinta e quatro). O ponto só é decimal num texto sem vírgula
+    em que não pode ser de milhar ('1234.5', '1.5'). O que não for número vira NaN.
+    """
+    if not (pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)):
+        return pd.to_numeric(serie, errors='coerce').astype(np.float64)
+
+    textos = serie.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    numeros = pd.to_numeric(serie.where(~textos).astype(object), errors='coerce').astype(np.float64)
+    if textos.any():
+        limpos = serie[textos].astype(object).str.strip()
+        brasileiros = limpos.str.contains(',', regex=False) | limpos.str.fullmatch(_SO_MILHAR)
+        sem_milhar = limpos.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+        numeros[textos] = pd.to_numeric(sem_milhar.where(brasileiros, limpos), errors='coerce')
+    return numeros
+
+
+def arredondar_centavos(numeros):
+    """
+    Centavos (float, sem casas) de um array de valores em reais, arredondados
+    exatamente como a formatação '.2f' do Python
+    """
+    produto = numeros * 100.0
+    centavos = np.round(produto)
+
+    # Só nos empates aparentes (x,5 centavo) o resto exato muda o resultado
+    empates = np.flatnonzero(np.abs(produto - np.trunc(produto)) == 0.5)
+    if len(empates):
+        valor = numeros[empates]
+        aproximado = produto[empates]
+        # Produto sem erro (Dekker): valor * 100 == aproximado + erro
+        t = valor * 134217729.0
+        alto = t - (t - valor)
+        baixo = valor - alto
+        erro = (alto * 100.0 - aproximado) + baixo * 100.0
+        piso = np.floor(aproximado)
+        centavos[empates] = np.where(erro > 0, piso + 1, np.where(erro < 0, piso, centavos[empates]))
+    return centavos
+
+
+def centavos(valores):
+    """
+    Centavos inteiros (Int64) de uma Series de valores float, arredondados
+    como o texto formatado mostra; NaN e valores grandes demais para serem
+    exatos em float viram nulo. Um float lido de um texto com até 2 casas
+    volta exatamente aos centavos do texto.
+    """
+    numeros = valores.to_numpy(dtype=np.float64, na_value=np.nan)
+    validos = np.isfinite(numeros) & (np.abs(numeros) < LIMITE_CENTAVOS_EXATOS)
+    inteiros = arredondar_centavos(np.where(validos, numeros, 0.0)).astype(np.int64)
+    resultado = pd.array(inteiros, dtype='Int64')
+    resultado[~validos] = pd.NA
+    return pd.Series(resultado, index=valores.index, name=valores.name)
+
+
+def converter_centavos(serie):
+    """converter_valores direto para centavos inteiros (Int64)"""
+    return centavos(converter_valores(serie))
+
+
+def coluna_original(nome):
+    """Coluna auxiliar com o texto original dos valores da coluna nome que não são número"""
+    return f"_{nome}_original"
+
+
+def converter_centavos_mantendo_texto(df, colunas):
+    """
+    converter_centavos nas colunas do DataFrame, sem perder o que não é
+    número (como 'N/D'): o valor original dessas células fica em
+    coluna_original(nome), para formatar_para_saida gravá-lo no lugar do nulo.
+    """
+    for nome in colunas:
+        valores = df[nome]
+        df[nome] = converter_centavos(valores)
+        perdidos = df[nome].isna() & valores.notna()
+        if perdidos.any():
+            df[coluna_original(nome)] = valores.astype(object).where(perdidos)
+    return df
+
+
+def textos_nao_numericos(df, nome):
+    """Valores originais não vazios da coluna nome que não viraram número"""
+    original = coluna_original(nome)
+    if original not in df.columns:
+        return pd.Series([], dtype=object)
+    textos = df[original].dropna()
+    return textos[textos.map(str).str.strip() != '']
+
+
+def extrair_centavos_serie(serie):
+    """extrair_valores_serie direto para centavos inteiros (Int64)"""
+    return centavos(extrair_valores_serie(serie))
+
+
+def reais(centavos):
+    """Valores float em reais de uma coluna de centavos, para gravar como número (nulo vira NaN)"""
+    return centavos.astype('Float64').div(100).astype(np.float64)
@@ -0,0 +1,27 @@
+"""Falhas de extração registradas para o lote.
+
+Os extratores tratam os próprios erros e só imprimem a mensagem, para que a
+interface siga adiante. Cada falha (arquivo ilegível, CSV sem cabeçalho, erro
+numa aba) também é registrada com falha(); o lote recolhe as do arquivo com
+coletar() e conta o arquivo como erro no resumo e no código de saída.
+"""
+import contextlib
+
+_falhas = []
+
+
+def falha(mensagem):
+    """Imprime a mensagem, como sempre, e a registra como falha do arquivo atual"""
+    print(mensagem)
+    _falhas.append(mensagem)
+
+
+@contextlib.contextmanager
+def coletar():
+    """Separa numa lista nova as falhas registradas dentro do bloco"""
+    global _falhas
+    anteriores, _falhas = _falhas, []
+    try:
+        yield _falhas
+    finally:
+        _falhas = anteriores
@@ -0,0 +1,87 @@
+"""Formatação de valores no padrão contábil brasileiro (1.234,56)."""
+import numpy as np
+import pandas as pd
+
+from comum.dinheiro import coluna_original
+
+_POTENCIAS_10 = 10 ** np.arange(1, 19, dtype=np.int64)
+
+# Quantos dos valores não numéricos aparecem no aviso
+EXEMPLOS_NAO_NUMERICOS = 5
+
+
+def _montar_textos(centavos, negativos, validos):
+    """
+    Monta os textos '1.234,56' a partir dos centavos (em valor absoluto) e do
+    sinal. Cada posição de caractere é uma linha de uma matriz de bytes
+    preenchida da direita para a esquerda; no fim a matriz inteira vira uma
+    lista de str com um único decode/split.
+    """
+    n = len(centavos)
+    inteiros, decimais = np.divmod(centavos, 100)
+
+    digitos = np.searchsorted(_POTENCIAS_10, inteiros, side='right') + 1
+    max_digitos = int(digitos.max()) if n else 1
+    # sinal + dígitos + pontos de milhar, depois ',dd' e a quebra de linha
+    virgula = 1 + max_digitos + (max_digitos - 1) // 3
+    caracteres = np.zeros((virgula + 4, n), dtype=np.uint8)
+    decimais = decimais.astype(np.uint8)
+    caracteres[virgula] = np.where(validos, ord(','), 0)
+    caracteres[virgula + 1] = np.where(validos, decimais // 10 + ord('0'), 0)
+    caracteres[virgula + 2] = np.where(validos, decimais % 10 + ord('0'), 0)
+    caracteres[virgula + 3] = ord('\n')
+
+    resto = inteiros
+    posicao = virgula - 1
+    for k in range(max_digitos):
+        resto, digito = np.divmod(resto, 10)
+        ativo = validos if k == 0 else digitos > k
+        if k and k % 3 == 0:
+            caracteres[posicao] = ativo * np.uint8(ord('.'))
+            posicao -= 1
+        caracteres[posicao] = ativo * (digito.astype(np.uint8) + np.uint8(ord('0')))
+        posicao -= 1
+
+    primeira = virgula - (digitos + (digitos - 1) // 3)
+    caracteres[primeira[negativos] - 1, np.flatnonzero(negativos)] = ord('-')
+
+    por_linha = np.ascontiguousarray(caracteres.T)
+    texto = por_linha[por_linha != 0].tobytes().decode('ascii')
+    return texto.split('\n')[:-1]
+
+
+def formatar_centavos(centavos):
+    """
+    Textos '1.234,56' de uma coluna de centavos inteiros (Int64), sem passar
+    por float. Onde não há valor o texto sai vazio.
+    """
+    serie = centavos if isinstance(centavos, pd.Series) else pd.Series(centavos, dtype='Int64')
+    validos = serie.notna().to_numpy()
+    numeros = serie.to_numpy(dtype=np.int64, na_value=0)
+    resultado = np.empty(len(serie), dtype=object)
+    resultado[:] = _montar_textos(np.abs(numeros), (numeros < 0) & validos, validos)
+    return pd.Series(resultado, index=serie.index, name=serie.name, dtype=object)
+
+
+def aviso_nao_numericos(coluna, quantidade, exemplos, tipada):
+    """Aviso dos valores da coluna que não são número: mantidos como texto ou, na saída tipada, gravados vazios"""
+    destino = "gravado(s) vazio(s) na saída tipada" if tipada else "mantido(s) como texto"
+    return (f"Aviso: {quantidade} valor(es) não numérico(s) em {coluna} "
+            f"(ex.: {', '.join(exemplos)}) {destino}")
+
+
+def formatar_para_saida(df, colunas_valor):
+    """
+    Cópia do DataFrame com as colunas de centavos formatadas no padrão
+    contábil. Como o formatador por célula fazia, o que não era número sai com
+    o texto original (veja converter_centavos_mantendo_texto).
+    """
+    df = df.copy()
+    for nome in colunas_valor:
+        texto = formatar_centavos(df[nome])
+        original = coluna_original(nome)
+        if original in df.columns:
+            originais = df.pop(original)
+            texto = texto.where(originais.isna(), originais.map(str))
+        df[nome] = texto
+    return df
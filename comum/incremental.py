@@ -0,0 +1,57 @@
+"""Estado do modo incremental: a última transação já processada de cada conta.
+
+Bancos que entregam exportações acumuladas (cada mês repete os meses
+anteriores e acrescenta os novos lançamentos) são processados só a partir
+da última linha já vista. Para cada banco, conta e planilha fica guardada a
+posição dessa linha, a impressão digital de seus valores brutos (data,
+valor e saldo) e o CSV de saída, ao qual as linhas novas são acrescentadas.
+"""
+import hashlib
+import json
+import os
+import re
+
+# Conta processada em modo incremental (None: modo normal), definida pelo lote
+CONFIG = {
+    'conta': None,
+    'pasta': os.environ.get('EXTRATOS_INCREMENTAL',
+                            os.path.join(os.path.expanduser('~'), '.cache', 'extratos', 'incremental')),
+}
+
+
+def impressao(valores):
+    """Impressão digital dos valores brutos de uma linha"""
+    return hashlib.sha256(repr(tuple(str(v) for v in valores)).encode()).hexdigest()[:32]
+
+
+def _caminho(banco, conta):
+    nome = re.sub(r'[^0-9A-Za-z_.-]', '_', f"{banco}__{conta}")
+    return os.path.join(CONFIG['pasta'], nome + '.json')
+
+
+def ler_estado(banco, conta):
+    """
+    {planilha: {'posicao', 'impressao', 'saida', 'linhas', 'marcos'}} da conta,
+    vazio na primeira vez. marcos guarda a posição e a impressão do fim de cada
+    execução, para reconhecer exportações antigas já processadas.
+    """
+    try:
+        with open(_caminho(banco, conta), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def gravar_estado(banco, conta, estado):
+    caminho = _caminho(banco, conta)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def nome_saida(arquivo, conta, nome_planilha):
+    """CSV acumulado da conta, na pasta do arquivo processado"""
+    nome = re.sub(r'[^0-9A-Za-z_.-]', '_', f"{conta}_extraido_{nome_planilha}_incremental.csv")
+    return os.path.join(os.path.dirname(os.path.abspath(arquivo)), nome)
@@ -0,0 +1,276 @@
+"""Leitura dos arquivos de extrato e preparação dos DataFrames brutos."""
+import codecs
+import csv
+import itertools
+import operator
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# Ordem de tentativa dos encodings (latin1 aceita qualquer sequência de bytes)
+ENCODINGS_CSV = ['utf-8', 'cp1252', 'latin1']
+SEPARADORES_CSV = [',', ';', '\t', '|']
+TAMANHO_AMOSTRA_CSV = 64 * 1024
+
+# Assinaturas dos formatos de planilha
+ASSINATURA_OLE2 = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'  # .xls BIFF (contêiner OLE2)
+ASSINATURA_ZIP = b'PK\x03\x04'  # .xlsx (OOXML)
+TAMANHO_SONDA = 4096
+# Extensões lidas como texto delimitado; com outra extensão, o conteúdo
+# precisa de ao menos MIN_LINHAS_DELIMITADAS com o mesmo número de campos
+EXTENSOES_TEXTO = ('.csv', '.txt')
+MIN_LINHAS_DELIMITADAS = 2
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def nomes_colunas(valores):
+    """Gera nomes de colunas como o pandas faz ao ler com header=N"""
+    nomes = []
+    vistos = {}
+    for i, valor in enumerate(valores):
+        nome = f"Unnamed: {i}" if pd.isna(valor) else valor
+        if nome in vistos:
+            vistos[nome] += 1
+            novo = f"{nome}.{vistos[nome]}"
+            while novo in vistos:
+                vistos[nome] += 1
+                novo = f"{nome}.{vistos[nome]}"
+            vistos[novo] = 0
+            nome = novo
+        else:
+            vistos[nome] = 0
+        nomes.append(nome)
+    return nomes
+
+
+def promover_cabecalho(df, linha_cabecalho, converter_numeros=False):
+    """
+    Usa a linha do cabeçalho de um DataFrame lido com header=None como nomes
+    das colunas, sem ler o arquivo de novo. O resultado equivale a
+    pd.read_excel/pd.read_csv com header=linha_cabecalho.
+    """
+    posicao = df.index.get_loc(linha_cabecalho)
+    corpo = df.iloc[posicao + 1:].reset_index(drop=True)
+    corpo.columns = nomes_colunas(df.iloc[posicao].tolist())
+    corpo = corpo.infer_objects()
+
+    # No CSV lido com header=None toda coluna vira texto por causa do cabeçalho
+    if converter_numeros:
+        for i in range(corpo.shape[1]):
+            coluna = corpo.iloc[:, i]
+            if pd.api.types.is_object_dtype(coluna) or pd.api.types.is_string_dtype(coluna):
+                try:
+                    corpo.isetitem(i, pd.to_numeric(coluna))
+                except (ValueError, TypeError):
+                    pass
+    return corpo
+
+
+def detectar_formato_arquivo(arquivo):
+    """
+    Identifica o formato real do arquivo pelos primeiros bytes, sem tentar
+    ler o arquivo inteiro: 'xls' (BIFF/OLE2), 'xlsx' (ZIP/OOXML), 'html'
+    (HTML salvo com extensão .xls), 'texto' (CSV/TXT delimitado) ou None.
+    Sem extensão .csv/.txt, só é 'texto' o que tem colunas consistentes.
+    """
+    with open(arquivo, 'rb') as f:
+        inicio = f.read(TAMANHO_SONDA)
+
+    if inicio.startswith(ASSINATURA_OLE2):
+        return 'xls'
+    if inicio.startswith(ASSINATURA_ZIP):
+        return 'xlsx'
+
+    for bom, encoding in _BOMS:
+        if inicio.startswith(bom):
+            inicio = inicio.decode(encoding, errors='ignore').encode('utf-8')
+            break
+    conteudo = inicio.lstrip().lower()
+    if conteudo.startswith(b'<'):
+        if not conteudo.startswith(b'<?xml') or b'<html' in conteudo or b'<table' in conteudo:
+            return 'html'
+        return None
+    if b'\x00' in inicio:
+        return None
+    if os.path.splitext(arquivo)[1].lower() in EXTENSOES_TEXTO or _texto_delimitado(inicio):
+        return 'texto'
+    return None
+
+
+def _texto_delimitado(inicio):
+    """Os bytes iniciais têm linhas com o mesmo número (> 1) de campos pelo separador escolhido"""
+    completa = len(inicio) < TAMANHO_SONDA
+    linhas = _decodificar_amostra(inicio, completa)[1].splitlines()
+    if not completa and len(linhas) > 1:
+        linhas = linhas[:-1]  # a última linha da sonda pode estar cortada
+    sep, _ = _escolher_separador(linhas)
+    tamanhos = Counter(len(campos) for campos in csv.reader(linhas, delimiter=sep))
+    return any(campos > 1 and frequencia >= MIN_LINHAS_DELIMITADAS for campos, frequencia in tamanhos.items())
+
+
+def abrir_planilhas(arquivo, formato=None):
+    """
+    Abre a pasta de trabalho uma única vez. Arquivos .xls são carregados pelo
+    xlrd direto na memória, com as abas lidas sob demanda, sem gravar cópia .xlsx.
+    """
+    if formato is None:
+        formato = detectar_formato_arquivo(arquivo)
+    if formato == 'xls':
+        import xlrd
+        return pd.ExcelFile(xlrd.open_workbook(arquivo, on_demand=True), engine='xlrd')
+    return pd.ExcelFile(arquivo, engine='openpyxl')
+
+
+def _converter_celula(valor, erros):
+    """Valor de iter_rows(values_only=True) convertido como o pd.read_excel (engine openpyxl) faz"""
+    if valor is None:
+        return ''
+    if type(valor) is float:
+        return int(valor) if valor.is_integer() else valor
+    if type(valor) is str and valor in erros:
+        return np.nan
+    return valor
+
+
+def _codigos_erro():
+    from openpyxl.cell.cell import ERROR_CODES
+    return frozenset(ERROR_CODES)
+
+
+def ler_linhas_xlsx(linhas, quantidade):
+    """
+    As próximas `quantidade` linhas de iter_rows(values_only=True), completas,
+    com as células convertidas e sem as células vazias do fim
+    """
+    erros = _codigos_erro()
+    lidas = []
+    for linha in itertools.islice(linhas, quantidade):
+        convertida = [_converter_celula(valor, erros) for valor in linha]
+        while convertida and convertida[-1] == '':
+            convertida.pop()
+        lidas.append(convertida)
+    return lidas
+
+
+def projetar_linhas_xlsx(linhas, posicoes, cauda=None):
+    """
+    Consome o resto de iter_rows(values_only=True) guardando só as células
+    das posições pedidas, convertidas. Retorna (linhas projetadas, máscara
+    das linhas inteiramente vazias). Com cauda (um deque), as linhas
+    completas mais recentes também ficam nela, para a busca de marcadores.
+    """
+    erros = _codigos_erro()
+    alcance = max(posicoes) + 1
+    pegar = operator.itemgetter(*posicoes) if len(posicoes) > 1 else (lambda linha: (linha[posicoes[0]],))
+    projetadas = []
+    vazias = []
+    for linha in linhas:
+        if cauda is not None:
+            cauda.append(linha)
+        vazias.append(linha.count(None) + linha.count('') == len(linha))
+        if len(linha) < alcance:
+            linha = [*linha, *[None] * (alcance - len(linha))]
+        projetadas.append([_converter_celula(valor, erros) for valor in pegar(linha)])
+    return projetadas, np.array(vazias, dtype=bool)
+
+
+def tabela_de_linhas(linhas, indice=None):
+    """
+    DataFrame de linhas já convertidas montado como o pd.read_excel(header=None)
+    monta a planilha: linhas completadas com '' até a mais larga e tipos
+    (e valores ausentes) inferidos coluna a coluna pelo mesmo TextParser
+    """
+    largura = max(map(len, linhas), default=0)
+    if not largura:
+        return pd.DataFrame(index=indice if indice is not None else range(len(linhas)))
+    dados = [linha + [''] * (largura - len(linha)) for linha in linhas]
+    df = TextParser(dados, header=None, skip_blank_lines=False).read()
+    if indice is not None:
+        df.index = indice
+    return df
+
+
+def _decodificar_amostra(amostra, completa):
+    """Escolhe o encoding pelo BOM ou pelo primeiro que decodifica a amostra"""
+    for bom, encoding in _BOMS:
+        if amostra.startswith(bom):
+            return encoding, amostra.decode(encoding, errors='ignore')
+    for encoding in ENCODINGS_CSV:
+        try:
+            # Decodificador incremental: um caractere cortado no fim não é erro
+            decodificador = codecs.getincrementaldecoder(encoding)()
+            return encoding, decodificador.decode(amostra, final=completa)
+        except UnicodeDecodeError:
+            continue
+
+
+def _escolher_separador(linhas):
+    """
+    Escolhe o separador que gera mais linhas com a mesma quantidade de campos
+    (linhas de título com um campo só não contam). Retorna o separador e o
+    maior número de campos visto com ele.
+    """
+    melhor, melhor_pontuacao, colunas = ',', (0, 0), 0
+    for sep in SEPARADORES_CSV:
+        tamanhos = [len(campos) for campos in csv.reader(linhas, delimiter=sep)]
+        contagem = Counter(t for t in tamanhos if t > 1)
+        if not contagem:
+            continue
+        campos, frequencia = contagem.most_common(1)[0]
+        if (frequencia, campos) > melhor_pontuacao:
+            melhor, melhor_pontuacao, colunas = sep, (frequencia, campos), max(tamanhos)
+    return melhor, colunas
+
+
+def detectar_formato_csv(arquivo, tamanho_amostra=TAMANHO_AMOSTRA_CSV):
+    """
+    Detecta encoding e separador lendo só os primeiros bytes do arquivo.
+    Retorna {'encoding', 'sep', 'colunas'}, que pode ser guardado e reusado
+    em ler_csv para arquivos da mesma origem.
+    """
+    with open(arquivo, 'rb') as f:
+        amostra = f.read(tamanho_amostra + 1)
+    completa = len(amostra) <= tamanho_amostra
+    encoding, texto = _decodificar_amostra(amostra[:tamanho_amostra], completa)
+
+    linhas = texto.splitlines()
+    if not completa and len(linhas) > 1:
+        linhas = linhas[:-1]  # a última linha da amostra pode estar cortada
+    sep, colunas = _escolher_separador(linhas)
+    return {'encoding': encoding, 'sep': sep, 'colunas': colunas}
+
+
+def _encodings_da_leitura(encoding):
+    """O encoding detectado e, para o caso de o resto do arquivo não decodificar, os seguintes de ENCODINGS_CSV"""
+    if encoding in ENCODINGS_CSV:
+        return ENCODINGS_CSV[ENCODINGS_CSV.index(encoding):]
+    return [encoding] + ENCODINGS_CSV[1:]
+
+
+def ler_csv(arquivo, formato=None):
+    """
+    Lê o CSV inteiro uma única vez com header=None. Retorna (df, formato);
+    o encoding do formato devolvido é o que leu o arquivo, que pode ser
+    outro que o da amostra se um byte inválido aparecer depois dela.
+    """
+    if formato is None:
+        formato = detectar_formato_csv(arquivo)
+    # Com os nomes das colunas definidos, linhas de título mais curtas não quebram a leitura
+    nomes = range(formato['colunas']) if formato['colunas'] > 1 else None
+    encodings = _encodings_da_leitura(formato['encoding'])
+    for encoding in encodings:
+        try:
+            df = pd.read_csv(arquivo, header=None, names=nomes, encoding=encoding, sep=formato['sep'])
+        except UnicodeDecodeError:
+            if encoding == encodings[-1]:
+                raise
+            continue
+        return df, {**formato, 'encoding': encoding}
@@ -0,0 +1,256 @@
+"""Execução em lote, sem interface gráfica, dos extratores de cada banco.
+
+Exemplos:
+    python -m comum.lote santander "C:/extratos/2024-05"
+    python -m comum.lote itau "extratos/*.xlsx" --processos 8
+    python -m comum.lote grafeno "C:/extratos/2024-05" --refresh
+    python -m comum.lote santander "C:/extratos/conta-1234" --incremental 1234
+    python -m comum.lote itau extratos --output-format parquet --dataset "C:/dados/extratos"
+    python -m comum.lote banestes extratos --metrics medicoes.jsonl
+    python -m comum.lote spx extratos --profile -p 1
+    python -m comum.lote itau "C:/extratos/anual.xlsx" -p 1 --processos-planilhas 4
+"""
+import argparse
+import contextlib
+import glob
+import importlib.util
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from comum import cache, erros, incremental, metricas, motor, perfilador, saida
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Nome do banco na linha de comando -> pasta do app.py correspondente
+BANCOS = {
+    'airbi': 'AIRBI',
+    'banestes': 'BANESTES RPL',
+    'caixa': 'caixa',
+    'grafeno': 'grafeno',
+    'itau': 'itau',
+    'santander': 'santander',
+    'spx': 'spx',
+}
+
+EXTENSOES = ('.xlsx', '.xls', '.csv', '.txt')
+
+# Arquivos gerados pelos próprios extratores não são reprocessados
+MARCADORES_SAIDA = ('_extraido_', '_data_valor', '_convertido', perfilador.SUFIXO + '_alocacoes')
+
+_modulos = {}
+
+
+def carregar_modulo(banco):
+    """Importa o app.py do banco (as pastas dos bancos não são pacotes)"""
+    if banco not in _modulos:
+        caminho = os.path.join(RAIZ, BANCOS[banco], 'app.py')
+        spec = importlib.util.spec_from_file_location(f"extrator_{banco}", caminho)
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        _modulos[banco] = modulo
+    return _modulos[banco]
+
+
+def executar_extrator(modulo, arquivo):
+    """Chama o ponto de entrada do extrator e devolve a lista de saídas geradas"""
+    if hasattr(modulo, 'ExtratorDadosFinanceiros'):
+        return modulo.ExtratorDadosFinanceiros(interface=False).extrair_dados(arquivo) or []
+    return modulo.extrair_dados(arquivo) or []
+
+
+def listar_arquivos(entradas):
+    """Expande pastas e padrões glob em uma lista ordenada de arquivos"""
+    arquivos = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatos = [os.path.join(entrada, nome) for nome in os.listdir(entrada)]
+        else:
+            candidatos = glob.glob(entrada, recursive=True)
+        for caminho in candidatos:
+            nome = os.path.basename(caminho)
+            if not os.path.isfile(caminho) or nome.startswith('~$'):
+                continue
+            if not nome.lower().endswith(EXTENSOES):
+                continue
+            if any(marcador in nome for marcador in MARCADORES_SAIDA):
+                continue
+            arquivos.add(os.path.abspath(caminho))
+    return sorted(arquivos)
+
+
+def processar_arquivo(banco, arquivo, verbose=False):
+    """Processa um arquivo (executado dentro do processo de trabalho)"""
+    inicio = time.perf_counter()
+    erro = None
+    destino = sys.stdout if verbose else io.StringIO()
+    with contextlib.redirect_stdout(destino), metricas.coletar() as medicoes, erros.coletar() as falhas:
+        metricas.planilha(None)
+        modulo = carregar_modulo(banco)
+        with perfilador.perfilar(arquivo) as perfil:
+            try:
+                resultados = executar_extrator(modulo, arquivo)
+            except Exception as e:
+                resultados, erro = [], str(e)
+    # Os extratores só imprimem os próprios erros; os registrados também contam
+    if erro is None and falhas:
+        erro = '; '.join(falhas)
+    return {
+        'arquivo': arquivo,
+        'resultados': resultados,
+        'tempo': time.perf_counter() - inicio,
+        'erro': erro,
+        'metricas': medicoes,
+        'perfil': perfil,
+    }
+
+
+def iniciar_processo(config_cache, config_saida, config_metricas=None, config_perfil=None):
+    """
+    Nos processos do lote cada arquivo tem as abas lidas em sequência, sem
+    outro pool, e o cache, a saída, a medição e o perfil seguem as opções da
+    linha de comando
+    """
+    motor.PROCESSOS_PLANILHAS = 1
+    cache.CONFIG.update(config_cache)
+    saida.CONFIG.update(config_saida)
+    metricas.CONFIG.update(config_metricas or {})
+    perfilador.CONFIG.update(config_perfil or {})
+
+
+def imprimir_resumo(resumo):
+    nome = os.path.basename(resumo['arquivo'])
+    # Com erro numa aba, as outras abas extraídas também aparecem
+    for res in resumo['resultados']:
+        print(f"[OK] {nome} - {res['planilha']}: {res['linhas']} linhas "
+              f"em {resumo['tempo']:.2f}s → {res['arquivo']}")
+    if resumo['erro']:
+        print(f"[ERRO] {nome} ({resumo['tempo']:.2f}s): {resumo['erro']}")
+    elif not resumo['resultados']:
+        print(f"[VAZIO] {nome} ({resumo['tempo']:.2f}s): nenhum dado extraído")
+
+
+def emitir_metricas(banco, resumo):
+    """Tabela das etapas do arquivo e, se pedido, as linhas JSON (etapas e o total do arquivo)"""
+    if not metricas.CONFIG['ativo']:
+        return
+    if resumo['metricas']:
+        print(metricas.tabela(resumo['metricas']))
+    if metricas.CONFIG['destino']:
+        total = {'etapa': 'total', 'planilha': None, 'segundos': round(resumo['tempo'], 6),
+                 'linhas_entrada': None, 'linhas_saida': sum(res['linhas'] for res in resumo['resultados']),
+                 'pico_rss_mb': None, 'erro': resumo['erro']}
+        metricas.gravar_jsonl(resumo['metricas'] + [total], metricas.CONFIG['destino'],
+                              banco=banco, arquivo=resumo['arquivo'])
+
+
+def imprimir_perfil_lote(banco, resumos):
+    """Perfil somado dos arquivos do lote, gravado na pasta atual"""
+    destino = os.path.abspath(f"perfil_lote_{banco}")
+    texto = perfilador.agregar([resumo['perfil'] for resumo in resumos], destino)
+    if texto:
+        print(f"\nPerfil do lote: {destino}.pstats e {destino}_alocacoes.txt")
+        print(texto.rstrip())
+
+
+def executar_lote(banco, arquivos, processos=None, verbose=False):
+    """Distribui os arquivos entre processos e imprime o resumo de cada um"""
+    resumos = []
+    if processos == 1:
+        for arquivo in arquivos:
+            resumo = processar_arquivo(banco, arquivo, verbose)
+            imprimir_resumo(resumo)
+            emitir_metricas(banco, resumo)
+            resumos.append(resumo)
+        return resumos
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=iniciar_processo,
+                             initargs=(dict(cache.CONFIG), dict(saida.CONFIG), dict(metricas.CONFIG),
+                                       dict(perfilador.CONFIG))) as executor:
+        futuros = [executor.submit(processar_arquivo, banco, arquivo, verbose) for arquivo in arquivos]
+        for futuro in as_completed(futuros):
+            resumo = futuro.result()
+            imprimir_resumo(resumo)
+            emitir_metricas(banco, resumo)
+            resumos.append(resumo)
+    return resumos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Extrai os dados de vários extratos de um banco, sem interface gráfica."
+    )
+    parser.add_argument('banco', choices=sorted(BANCOS), help="Layout de banco a usar")
+    parser.add_argument('entradas', nargs='+', help="Pastas ou padrões glob dos arquivos")
+    parser.add_argument('-p', '--processos', type=int, default=None,
+                        help="Número de processos (padrão: número de CPUs)")
+    parser.add_argument('--processos-planilhas', type=int, default=None, metavar='N',
+                        help="Com -p 1: processos para as abas de cada pasta de trabalho (padrão: em "
+                             "sequência, ou um por CPU em arquivos grandes com várias abas)")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="Mostra a saída completa de cada extrator")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Não lê nem grava o cache de extrações")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Reprocessa todos os arquivos e atualiza o cache")
+    parser.add_argument('--incremental', metavar='CONTA',
+                        help="Exportações acumuladas da conta: acrescenta só as linhas novas à saída")
+    parser.add_argument('--output-format', choices=saida.FORMATOS_SAIDA,
+                        help="Grava colunas tipadas (data e valores decimais) no formato pedido")
+    parser.add_argument('--dataset', metavar='PASTA',
+                        help="Com parquet: grava num dataset particionado por banco/conta/mês")
+    parser.add_argument('--profile', action='store_true',
+                        help="Grava, ao lado de cada arquivo, o perfil do cProfile (.pstats) e as maiores "
+                             "alocações (tracemalloc), e no fim o perfil somado do lote")
+    parser.add_argument('--profile-top', type=int, default=perfilador.CONFIG['top'], metavar='N',
+                        help="Linhas dos relatórios de perfil (padrão: %(default)s)")
+    parser.add_argument('--metrics', nargs='?', const='', metavar='ARQUIVO.jsonl',
+                        help="Mede as etapas de cada arquivo (tempo, linhas, pico de memória); "
+                             "com ARQUIVO.jsonl, grava também as medições em JSON Lines")
+    args = parser.parse_args(argv)
+    if args.dataset and args.output_format not in (None, 'parquet'):
+        parser.error("--dataset só vale com --output-format parquet")
+    if args.incremental and (args.output_format or args.dataset):
+        parser.error("--incremental grava CSV; não vale com --output-format nem --dataset")
+    saida.CONFIG['formato'] = 'parquet' if args.dataset else args.output_format
+    saida.CONFIG['dataset'] = args.dataset
+    cache.CONFIG['ativo'] = not args.no_cache
+    cache.CONFIG['renovar'] = args.refresh
+    incremental.CONFIG['conta'] = args.incremental
+    if args.processos_planilhas:
+        motor.PROCESSOS_PLANILHAS = args.processos_planilhas
+    if args.profile:
+        perfilador.CONFIG['ativo'] = True
+        perfilador.CONFIG['top'] = args.profile_top
+        # As abas ficam no processo perfilado, sem o pool por aba
+        motor.PROCESSOS_PLANILHAS = 1
+    if args.metrics is not None:
+        metricas.CONFIG['ativo'] = True
+        metricas.CONFIG['destino'] = args.metrics or None
+    if args.incremental:
+        # As exportações da mesma conta são processadas uma de cada vez, em ordem de nome
+        args.processos = 1
+
+    arquivos = listar_arquivos(args.entradas)
+    if not arquivos:
+        print("Nenhum arquivo encontrado.")
+        return 1
+
+    print(f"Processando {len(arquivos)} arquivo(s) de {args.banco}...")
+    inicio = time.perf_counter()
+    resumos = executar_lote(args.banco, arquivos, args.processos, args.verbose)
+
+    if args.profile:
+        imprimir_perfil_lote(args.banco, resumos)
+
+    linhas = sum(res['linhas'] for resumo in resumos for res in resumo['resultados'])
+    erros = sum(1 for resumo in resumos if resumo['erro'])
+    print(f"\nConcluído: {len(resumos)} arquivo(s), {linhas} linhas, {erros} erro(s) "
+          f"em {time.perf_counter() - inicio:.2f}s")
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
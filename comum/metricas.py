@@ -0,0 +1,159 @@
+"""Medição por etapa dos extratores: tempo, linhas de entrada e saída e pico de memória.
+
+Cada extrator envolve as suas etapas com etapa(nome):
+    leitura       leitura do arquivo ou da aba
+    cabecalho     detecção do cabeçalho e escolha das colunas
+    marcador      procura de linhas como "Saldo Anterior" / "Saldo inicial"
+    normalizacao  conversão de valores (centavos) e datas
+    saldo         cálculo de saldos
+    formatacao    texto contábil da saída
+    gravacao      gravação da saída
+
+Desligada (o padrão), etapa() devolve sempre o mesmo objeto vazio e não mede
+nada. Ligada, cada etapa vira um registro {etapa, planilha, segundos,
+linhas_entrada, linhas_saida, pico_rss_mb} na lista corrente, com a aba
+informada por planilha() antes de processá-la, que o lote
+recolhe por arquivo com coletar(), grava em JSON Lines e resume em tabela.
+O pico de memória é o do processo até o fim da etapa (ru_maxrss), não o da
+etapa isolada.
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Ajustes da medição, alterados pela linha de comando do lote
+# (EXTRATOS_METRICAS liga a medição; se terminar em .jsonl, é também o destino)
+_AMBIENTE = os.environ.get('EXTRATOS_METRICAS', '')
+CONFIG = {
+    'ativo': bool(_AMBIENTE),
+    'destino': _AMBIENTE if _AMBIENTE.endswith('.jsonl') else None,  # None: só a tabela
+}
+
+ETAPAS = ('leitura', 'cabecalho', 'marcador', 'normalizacao', 'saldo', 'formatacao', 'gravacao')
+
+# Funções chamadas com o registro no fim de cada etapa (usadas pelo comum.perfilador);
+# com alguma registrada, as etapas são medidas mesmo com a medição desligada
+OBSERVADORES = []
+
+_registros = []
+_planilha = [None]
+
+
+def pico_rss_mb():
+    """Pico de memória residente do processo em MiB, ou None se não houver como medir"""
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Em KiB no Linux, em bytes no macOS
+        return round(pico / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memoria = psutil.Process().memory_info()
+    return round(getattr(memoria, 'peak_wset', memoria.rss) / 2**20, 1)
+
+
+class _EtapaNula:
+    """Etapa da medição desligada: não faz nada"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def saida(self, linhas):
+        pass
+
+
+_NULA = _EtapaNula()
+
+
+class _Etapa:
+    __slots__ = ('registro', 'inicio')
+
+    def __init__(self, nome, linhas_entrada):
+        self.registro = {'etapa': nome, 'planilha': _planilha[0], 'segundos': None,
+                         'linhas_entrada': linhas_entrada, 'linhas_saida': None, 'pico_rss_mb': None}
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registro['segundos'] = round(time.perf_counter() - self.inicio, 6)
+        self.registro['pico_rss_mb'] = pico_rss_mb()
+        _registros.append(self.registro)
+        for observador in OBSERVADORES:
+            observador(self.registro)
+        return False
+
+    def saida(self, linhas):
+        """Linhas produzidas pela etapa"""
+        self.registro['linhas_saida'] = linhas
+
+
+def etapa(nome, linhas_entrada=None):
+    """Contexto que mede a etapa; o objeto recebido aceita saida(linhas)"""
+    if not CONFIG['ativo'] and not OBSERVADORES:
+        return _NULA
+    return _Etapa(nome, linhas_entrada)
+
+
+def planilha(nome):
+    """Aba a que as próximas etapas se referem"""
+    _planilha[0] = nome
+
+
+@contextlib.contextmanager
+def coletar():
+    """Separa numa lista nova os registros feitos dentro do bloco"""
+    global _registros
+    anteriores, _registros = _registros, []
+    try:
+        yield _registros
+    finally:
+        _registros = anteriores
+
+
+def incorporar(registros):
+    """Acrescenta registros feitos em outro processo (abas processadas em paralelo)"""
+    _registros.extend(registros)
+
+
+def gravar_jsonl(registros, caminho, **campos):
+    """Acrescenta os registros ao arquivo JSON Lines, um por linha, com os campos comuns"""
+    with open(caminho, 'a', encoding='utf-8') as f:
+        for registro in registros:
+            f.write(json.dumps({**campos, **registro}, ensure_ascii=False) + '\n')
+
+
+def tabela(registros):
+    """Resumo em texto: uma linha por etapa, somando as abas"""
+    somas = {}
+    for registro in registros:
+        soma = somas.setdefault(registro['etapa'], {'segundos': 0.0, 'entrada': None, 'saida': None, 'pico': None})
+        soma['segundos'] += registro['segundos']
+        for chave, campo in (('entrada', 'linhas_entrada'), ('saida', 'linhas_saida')):
+            if registro[campo] is not None:
+                soma[chave] = (soma[chave] or 0) + registro[campo]
+        if registro['pico_rss_mb'] is not None:
+            soma['pico'] = max(soma['pico'] or 0, registro['pico_rss_mb'])
+
+    linhas = [f"    {'etapa':<13}{'tempo':>10}{'entrada':>11}{'saída':>11}{'pico RSS':>12}"]
+    ordem = sorted(somas, key=lambda nome: ETAPAS.index(nome) if nome in ETAPAS else len(ETAPAS))
+    texto = lambda v: '-' if v is None else str(v)
+    for nome in ordem:
+        soma = somas[nome]
+        pico = '-' if soma['pico'] is None else f"{soma['pico']:.1f} MiB"
+        linhas.append(f"    {nome:<13}{soma['segundos']:>9.3f}s{texto(soma['entrada']):>11}"
+                      f"{texto(soma['saida']):>11}{pico:>12}")
+    return '\n'.join(linhas)
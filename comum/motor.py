@@ -0,0 +1,628 @@
+"""Motor de extração compartilhado pelos bancos de extrato tabular.
+
+Cada banco descreve o seu layout num perfil (um dict) registrado com
+registrar_perfil; leitura, detecção do cabeçalho, escolha das colunas,
+formatação e gravação da saída são as mesmas para todos.
+
+Chaves do perfil:
+    nome                  nome do banco
+    origem                caminho do app.py que registra o perfil (__file__), para
+                          que os processos de trabalho o carreguem de novo
+    cabecalhos            {chave: [variações]} que identificam a linha do cabeçalho
+    colunas               [(texto, nome na saída, ocorrência)]: a coluna cujo nome
+                          normalizado contém o texto; entre várias, a da ocorrência
+                          pedida (ou a última, se houver menos)
+    corte                 {'inicio', 'fim', 'so_cabecalho_no_topo'}: linhas descartadas
+                          no início e no fim dos dados, opcionalmente só quando o
+                          cabeçalho está na primeira linha
+    colunas_contabeis     colunas de valor, guardadas em centavos inteiros (Int64) e
+                          formatadas no padrão contábil só na gravação da saída
+    coluna_data           coluna da saída normalizada para DD/MM/AAAA
+    manter_datas_nativas  não converte para texto uma coluna de data já em datetime
+    transformar           função(df_final, df) -> (df_final, opções de salvar_xlsx)
+                          que substitui a formatação padrão
+"""
+import contextlib
+import importlib.util
+import io
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from comum import cache, erros, incremental, metricas
+from comum.cabecalhos import (MAX_LINHAS_CABECALHO, MAX_LINHAS_MARCADOR, compilar_variacoes,
+                              detectar_cabecalho, normalizar_serie)
+from comum.datas import normalizar_datas
+from comum.dinheiro import converter_centavos_mantendo_texto, textos_nao_numericos
+from comum.formatacao import EXEMPLOS_NAO_NUMERICOS, aviso_nao_numericos, formatar_para_saida
+from comum.leitura import (abrir_planilhas, detectar_formato_arquivo, ler_csv, ler_linhas_xlsx, nomes_colunas,
+                           projetar_linhas_xlsx, promover_cabecalho, tabela_de_linhas)
+from comum import saida
+from comum.saida import salvar_tipado, salvar_xlsx
+
+# Perfis registrados, pelo nome do banco
+PERFIS = {}
+
+# Processos usados nas planilhas de uma mesma pasta de trabalho. Com None as
+# abas são lidas em sequência e só uma pasta com várias abas e arquivo a partir
+# de TAMANHO_POOL_PLANILHAS usa um processo por CPU: abrir o pool custa mais
+# que ler abas pequenas. Um número fixa a quantidade; os processos do lote,
+# que já distribui os arquivos, usam 1.
+PROCESSOS_PLANILHAS = None
+
+# Cerca de 250 mil lançamentos num .xlsx
+TAMANHO_POOL_PLANILHAS = 8 * 2**20
+
+# Abas .xlsx lidas em fluxo: só o topo até o cabeçalho e as colunas do perfil
+LEITURA_EM_FLUXO = True
+
+# Pasta de trabalho aberta no processo de trabalho: (arquivo, ExcelFile)
+_planilhas_abertas = None
+
+_PADRAO_PERFIL = {
+    'corte': {'inicio': 0, 'fim': 0, 'so_cabecalho_no_topo': False},
+    'colunas_contabeis': [],
+    'coluna_data': None,
+    'manter_datas_nativas': False,
+    'origem': None,
+    'transformar': None,
+}
+
+
+def registrar_perfil(perfil):
+    """
+    Completa o perfil com os valores padrão, compila seus padrões de busca
+    uma única vez e o registra em PERFIS. Devolve o perfil registrado.
+    """
+    perfil = {**_PADRAO_PERFIL, **perfil}
+    perfil['corte'] = {**_PADRAO_PERFIL['corte'], **perfil['corte']}
+    perfil['padroes_cabecalho'] = {chave: compilar_variacoes(v) for chave, v in perfil['cabecalhos'].items()}
+    perfil['padroes_colunas'] = [re.compile(re.escape(texto)) for texto, _, _ in perfil['colunas']]
+    PERFIS[perfil['nome']] = perfil
+    return perfil
+
+
+def criar_nome_arquivo_saida(arquivo_original, nome_planilha, anterior=None):
+    """
+    Nome livre para a saída da planilha. anterior é a saída já gravada para
+    ela (registrada no cache), que é reaproveitada e regravada no mesmo lugar.
+    """
+    base, ext = os.path.splitext(arquivo_original)
+    # A saída de CSV é CSV; a de planilha é sempre gravada em .xlsx,
+    # a menos que outro formato tenha sido pedido
+    ext = '.csv' if nome_planilha == "CSV" else '.xlsx'
+    if saida.CONFIG['formato']:
+        ext = saida.EXTENSOES_SAIDA[saida.CONFIG['formato']]
+    if anterior and anterior.startswith(f"{base}_extraido_{nome_planilha}_") and anterior.endswith(ext):
+        return anterior
+    contador = 1
+    while True:
+        novo_nome = f"{base}_extraido_{nome_planilha}_{contador}{ext}"
+        if not os.path.exists(novo_nome):
+            return novo_nome
+        contador += 1
+
+
+def extrair_dados(perfil, arquivo, converter_xls=None):
+    """
+    Processa todas as planilhas (ou o CSV) do arquivo com o perfil do banco.
+    converter_xls, se dado, é chamado com o caminho de um .xls antes da leitura.
+    Um arquivo já extraído antes é servido pelo cache (comum.cache).
+    """
+    try:
+        # O leitor é escolhido pelo conteúdo do arquivo, não pela extensão
+        formato = detectar_formato_arquivo(arquivo)
+
+        # O .xls é lido direto na memória; a cópia .xlsx só é gravada se pedida
+        if converter_xls and formato == 'xls':
+            converter_xls(arquivo)
+
+        conta = incremental.CONFIG['conta']
+        if conta is not None and perfil['transformar'] is None:
+            return extrair_incremental(perfil, arquivo, formato, conta)
+        if conta is not None:
+            print(f"O modo incremental não se aplica a {perfil['nome']}: o arquivo é processado por inteiro.")
+
+        # Mesmo conteúdo, mesmo perfil e mesmo código: a extração anterior vale
+        chave = cache.chave_cache(arquivo, perfil) if cache.CONFIG['ativo'] else None
+        planilhas = cache.ler(chave) if chave else None
+        # Na renovação, as saídas registradas são regravadas, sem cópias _2, _3...
+        anteriores = cache.saidas_gravadas(chave) if chave and cache.CONFIG['renovar'] else {}
+        if planilhas is not None:
+            planilhas, regravou = reaproveitar_cache(perfil, planilhas, arquivo)
+        elif formato in ('xls', 'xlsx'):
+            xls = abrir_planilhas(arquivo, formato)
+            planilhas, regravou = processar_excel(perfil, xls, arquivo, formato, anteriores=anteriores), True
+        elif formato == 'texto':
+            planilhas, regravou = processar_csv(perfil, arquivo, anteriores), True
+        else:
+            erros.falha("Formato de arquivo não suportado.")
+            return []
+
+        if chave and regravou:
+            try:
+                cache.gravar(chave, planilhas)
+            except Exception as e:
+                print(f"Não foi possível gravar o cache: {e}")
+        return [resumo(planilha) for planilha in planilhas]
+    except Exception as e:
+        erros.falha(f"Ocorreu um erro: {e}")
+    return []
+
+
+def _ler_planilha(xls, sheet_name, perfil, arquivo, saida_anterior=None):
+    """Lê uma aba da pasta já aberta e extrai seus dados"""
+    metricas.planilha(sheet_name)
+    if LEITURA_EM_FLUXO and xls.engine == 'openpyxl':
+        # A pasta .xlsx do ExcelFile já está aberta somente para leitura
+        return processar_planilha_em_fluxo(perfil, xls.book[sheet_name], arquivo, sheet_name, saida_anterior)
+    with metricas.etapa('leitura') as medida:
+        df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
+        medida.saida(len(df))
+    return processar_dataframe(perfil, df, arquivo, sheet_name, saida_anterior)
+
+
+def _carregar_perfil(nome, origem):
+    """Perfil registrado no processo de trabalho, importando o app.py que o define"""
+    if nome not in PERFIS:
+        spec = importlib.util.spec_from_file_location(f"perfil_{nome}", origem)
+        spec.loader.exec_module(importlib.util.module_from_spec(spec))
+    return PERFIS[nome]
+
+
+def _iniciar_processo_planilhas(config_saida, config_metricas):
+    """Os processos das abas seguem o formato de saída e a medição do processo principal"""
+    saida.CONFIG.update(config_saida)
+    metricas.CONFIG.update(config_metricas)
+
+
+def _processar_planilha_isolada(nome, origem, arquivo, formato, sheet_name, saida_anterior=None):
+    """
+    Executado no processo de trabalho: a pasta é aberta uma vez por processo
+    e reaproveitada nas abas seguintes. Retorna (resultado, saída impressa,
+    erro, medições das etapas).
+    """
+    global _planilhas_abertas
+    saida = io.StringIO()
+    resultado, erro = None, None
+    with contextlib.redirect_stdout(saida), metricas.coletar() as medicoes:
+        print(f"\nProcessando planilha: {sheet_name}")
+        try:
+            if _planilhas_abertas is None or _planilhas_abertas[0] != arquivo:
+                _planilhas_abertas = (arquivo, abrir_planilhas(arquivo, formato))
+            resultado = _ler_planilha(_planilhas_abertas[1], sheet_name, _carregar_perfil(nome, origem), arquivo,
+                                      saida_anterior)
+        except Exception as e:
+            erro = str(e)
+    return resultado, saida.getvalue(), erro, medicoes
+
+
+def _processos_planilhas(arquivo, abas):
+    """Processos para as abas do arquivo, conforme PROCESSOS_PLANILHAS"""
+    if PROCESSOS_PLANILHAS is not None:
+        return PROCESSOS_PLANILHAS
+    try:
+        grande = os.path.getsize(arquivo) >= TAMANHO_POOL_PLANILHAS
+    except OSError:
+        grande = False
+    return (os.cpu_count() or 1) if abas > 1 and grande else 1
+
+
+def processar_excel(perfil, xls, arquivo, formato=None, processos=None, anteriores=None):
+    """
+    Extrai todas as abas da pasta de trabalho. Com mais de um processo (veja
+    PROCESSOS_PLANILHAS), cada aba é processada (leitura, extração e gravação)
+    em um processo de trabalho; os resultados e as mensagens saem na ordem
+    das abas, e o erro de uma aba não interrompe as outras. anteriores:
+    {aba: saída já gravada}, regravada no mesmo arquivo.
+    """
+    anteriores = anteriores or {}
+    resultados = []
+    if processos is None:
+        processos = _processos_planilhas(arquivo, len(xls.sheet_names))
+    processos = min(processos, len(xls.sheet_names))
+
+    if processos <= 1 or perfil['origem'] is None:
+        for sheet_name in xls.sheet_names:
+            print(f"\nProcessando planilha: {sheet_name}")
+            try:
+                resultado = _ler_planilha(xls, sheet_name, perfil, arquivo, anteriores.get(sheet_name))
+                if resultado:
+                    resultados.append(resultado)
+            except Exception as e:
+                erros.falha(f"Erro ao processar planilha {sheet_name}: {e}")
+        return resultados
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo_planilhas,
+                             initargs=(dict(saida.CONFIG), dict(metricas.CONFIG))) as executor:
+        futuros = [
+            executor.submit(_processar_planilha_isolada, perfil['nome'], perfil['origem'],
+                            arquivo, formato, sheet_name, anteriores.get(sheet_name))
+            for sheet_name in xls.sheet_names
+        ]
+        for sheet_name, futuro in zip(xls.sheet_names, futuros):
+            try:
+                resultado, impresso, erro, medicoes = futuro.result()
+                metricas.incorporar(medicoes)
+            except Exception as e:
+                resultado, impresso, erro = None, f"\nProcessando planilha: {sheet_name}\n", str(e)
+            print(impresso, end='')
+            if erro is not None:
+                erros.falha(f"Erro ao processar planilha {sheet_name}: {erro}")
+            elif resultado:
+                resultados.append(resultado)
+    return resultados
+
+
+def processar_csv(perfil, arquivo, anteriores=None):
+    print("\nProcessando arquivo CSV")
+    try:
+        metricas.planilha("CSV")
+        with metricas.etapa('leitura') as medida:
+            df, formato = ler_csv(arquivo)
+            medida.saida(len(df))
+    except Exception as e:
+        erros.falha(f"Não foi possível ler o arquivo CSV: {e}")
+        return []
+    print(f"Arquivo lido com encoding {formato['encoding']} e separador '{formato['sep']}'")
+    resultado = processar_dataframe(perfil, df, arquivo, "CSV", (anteriores or {}).get("CSV"))
+    if resultado is None:
+        # No CSV não há outra aba: sem cabeçalho ou colunas, o arquivo não foi extraído
+        erros.falha("Nenhum dado extraído do CSV")
+        return []
+    return [resultado]
+
+
+def selecionar_colunas(perfil, df):
+    """
+    Posições das colunas do perfil no DataFrame, pelo nome normalizado,
+    ou None se alguma não existir
+    """
+    nomes = pd.Series(df.columns, dtype=object)
+    nomes = normalizar_serie(nomes.where(nomes.map(lambda c: isinstance(c, str)), '')).tolist()
+    posicoes = []
+    for padrao, (_, _, ocorrencia) in zip(perfil['padroes_colunas'], perfil['colunas']):
+        candidatas = [i for i, nome in enumerate(nomes) if padrao.search(nome)]
+        if not candidatas:
+            return None
+        posicoes.append(candidatas[min(ocorrencia, len(candidatas) - 1)])
+    return posicoes
+
+
+def cortar(perfil, df, linha_cabecalho, continuacao=False):
+    """
+    Descarta as linhas do início e do fim indicadas no corte do perfil. Na
+    continuação de uma exportação já processada o início não é cortado.
+    """
+    corte = perfil['corte']
+    if corte['so_cabecalho_no_topo'] and linha_cabecalho != 0:
+        return df
+    inicio = 0 if continuacao else corte['inicio']
+    return df.iloc[inicio:len(df) - corte['fim']]
+
+
+def formatar_padrao(perfil, df_final):
+    """
+    Valores em centavos inteiros e datas em DD/MM/AAAA. O padrão contábil
+    (1.234,56) só é aplicado na gravação da saída; o que não é número volta
+    lá com o texto original.
+    """
+    with metricas.etapa('normalizacao', len(df_final)) as medida:
+        converter_centavos_mantendo_texto(df_final, perfil['colunas_contabeis'])
+
+        coluna_data = perfil['coluna_data']
+        if coluna_data is not None:
+            nativas = pd.api.types.is_datetime64_any_dtype(df_final[coluna_data])
+            if not (perfil['manter_datas_nativas'] and nativas):
+                df_final[coluna_data] = normalizar_datas(df_final[coluna_data])
+        medida.saida(len(df_final))
+
+    print("\nDados extraídos e formatados")
+    print(formatar_para_saida(df_final.head(), perfil['colunas_contabeis']))
+    return df_final, {}
+
+
+def extrair_colunas(perfil, df, nome_planilha, inicio_corpo=0):
+    """
+    Acha o cabeçalho e devolve (colunas do perfil já renomeadas, linha do
+    cabeçalho), sem corte nem formatação, ou None se faltar algo. Com
+    inicio_corpo, as linhas de dados antes dessa posição são descartadas antes
+    de qualquer conversão; o índice continua contando a partir do cabeçalho.
+    """
+    with metricas.etapa('cabecalho', len(df)) as medida:
+        extraido = _extrair_colunas(perfil, df, nome_planilha, inicio_corpo)
+        medida.saida(len(extraido[0]) if extraido else 0)
+    return extraido
+
+
+def _extrair_colunas(perfil, df, nome_planilha, inicio_corpo):
+    linha_cabecalho, _ = detectar_cabecalho(df, perfil['padroes_cabecalho'])
+    if linha_cabecalho is None:
+        print("Cabeçalhos não encontrados. Visualização das primeiras linhas:")
+        print(df.head())
+        return None
+
+    colunas_originais = [str(cell).strip() for cell in df.loc[linha_cabecalho].values]
+    print(f"Cabeçalhos encontrados: {colunas_originais}")
+    print(f"Encontrados cabeçalhos na linha {linha_cabecalho + 1}")
+
+    if inicio_corpo:
+        posicao = df.index.get_loc(linha_cabecalho)
+        df = pd.concat([df.iloc[:posicao + 1], df.iloc[posicao + 1 + inicio_corpo:]])
+
+    # Promove o cabeçalho no DataFrame já lido, sem ler o arquivo de novo
+    df_final = promover_cabecalho(df, linha_cabecalho, converter_numeros=(nome_planilha == "CSV"))
+    df_final.index += inicio_corpo
+    df_final = df_final.dropna(how='all')
+
+    posicoes = selecionar_colunas(perfil, df_final)
+    if posicoes is None:
+        print("As colunas esperadas não foram encontradas")
+        return None
+
+    df_final = df_final.iloc[:, posicoes]
+    df_final.columns = [nome for _, nome, _ in perfil['colunas']]
+    return df_final, linha_cabecalho
+
+
+def formatar(perfil, df_final, df):
+    """Formatação do perfil: a padrão ou a função 'transformar'. Retorna (df_final, opções)"""
+    if perfil['transformar'] is not None:
+        return perfil['transformar'](df_final, df)
+    return formatar_padrao(perfil, df_final)
+
+
+def processar_dataframe(perfil, df, arquivo, nome_planilha, saida_anterior=None):
+    metricas.planilha(nome_planilha)
+    extraido = extrair_colunas(perfil, df, nome_planilha)
+    if extraido is None:
+        return
+    df_final, linha_cabecalho = extraido
+    return processar_extraido(perfil, df_final, linha_cabecalho, df, arquivo, nome_planilha, saida_anterior)
+
+
+def processar_planilha_em_fluxo(perfil, ws, arquivo, nome_planilha, saida_anterior=None):
+    """
+    Versão de processar_dataframe que lê a aba (somente leitura) em fluxo:
+    o cabeçalho é procurado nas primeiras linhas e, sem ele, o resto da aba
+    nem é lido; com ele, só as colunas do perfil são guardadas. As células
+    passam pela mesma conversão do pd.read_excel e as linhas antes do
+    cabeçalho entram na inferência de tipos, como na aba inteira. Para a
+    função 'transformar' ficam as primeiras e as últimas linhas completas,
+    onde se procuram os marcadores.
+    """
+    with metricas.etapa('leitura') as medida:
+        ws.reset_dimensions()  # a dimensão gravada no arquivo pode estar errada
+        linhas = ws.iter_rows(values_only=True)
+        topo = ler_linhas_xlsx(linhas, MAX_LINHAS_CABECALHO)
+        df_topo = tabela_de_linhas(topo)
+        medida.saida(len(df_topo))
+
+    with metricas.etapa('cabecalho', len(df_topo)) as medida:
+        linha_cabecalho, _ = detectar_cabecalho(df_topo, perfil['padroes_cabecalho'])
+        if linha_cabecalho is None:
+            print("Cabeçalhos não encontrados. Visualização das primeiras linhas:")
+            print(df_topo.head())
+            return None
+        cabecalho = df_topo.loc[linha_cabecalho].tolist()
+        print(f"Cabeçalhos encontrados: {[str(cell).strip() for cell in cabecalho]}")
+        print(f"Encontrados cabeçalhos na linha {linha_cabecalho + 1}")
+
+        posicoes = selecionar_colunas(perfil, pd.DataFrame(columns=nomes_colunas(cabecalho)))
+        if posicoes is None:
+            print("As colunas esperadas não foram encontradas")
+            return None
+        medida.saida(len(posicoes))
+
+    with metricas.etapa('leitura') as medida:
+        cauda = deque(maxlen=MAX_LINHAS_MARCADOR) if perfil['transformar'] is not None else None
+        projetadas = [[linha[i] if i < len(linha) else '' for i in posicoes] for linha in topo]
+        resto, vazias = projetar_linhas_xlsx(linhas, posicoes, cauda)
+        vazias = np.concatenate([np.array([not linha for linha in topo], dtype=bool), vazias])
+        df_final = promover_cabecalho(tabela_de_linhas(projetadas + resto), linha_cabecalho)
+        df_final = df_final[~vazias[linha_cabecalho + 1:]]
+        df_final.columns = [nome for _, nome, _ in perfil['colunas']]
+        medida.saida(len(df_final))
+
+    df = None
+    if cauda is not None:
+        # O pd.read_excel descarta as linhas vazias do fim da aba
+        total = len(topo) + len(resto)
+        while cauda and cauda[-1].count(None) + cauda[-1].count('') == len(cauda[-1]):
+            cauda.pop()
+            total -= 1
+        indice = list(range(len(topo))) + list(range(total - len(cauda), total))
+        df = tabela_de_linhas(topo + ler_linhas_xlsx(iter(cauda), len(cauda)), indice)
+    return processar_extraido(perfil, df_final, linha_cabecalho, df, arquivo, nome_planilha, saida_anterior)
+
+
+def processar_extraido(perfil, df_final, linha_cabecalho, df, arquivo, nome_planilha, saida_anterior=None):
+    """Corte, formatação e gravação das colunas já extraídas de uma aba"""
+    df_final = cortar(perfil, df_final, linha_cabecalho).copy()
+    df_final, opcoes = formatar(perfil, df_final, df)
+
+    nome_saida = criar_nome_arquivo_saida(arquivo, nome_planilha, saida_anterior)
+    gravar_saida(perfil, df_final, arquivo, nome_saida, nome_planilha, opcoes)
+
+    nome_saida = saida.destino(nome_saida)
+    print(f"\nNovo arquivo criado: {nome_saida}")
+    # tabela e opcoes vão para o cache; extrair_dados não as devolve
+    return {'planilha': nome_planilha, 'arquivo': nome_saida, 'linhas': len(df_final),
+            'tabela': df_final, 'opcoes': opcoes}
+
+
+def particao(arquivo):
+    """Conta do dataset particionado: a do modo incremental ou o nome do arquivo"""
+    return incremental.CONFIG['conta'] or os.path.splitext(os.path.basename(arquivo))[0]
+
+
+def avisar_nao_numericos(perfil, df_final, tipada=False):
+    """Avisa, por coluna de valor, dos valores que não são número"""
+    for nome in perfil['colunas_contabeis']:
+        textos = textos_nao_numericos(df_final, nome)
+        if len(textos):
+            exemplos = textos.map(str).unique()[:EXEMPLOS_NAO_NUMERICOS].tolist()
+            print(aviso_nao_numericos(nome, len(textos), exemplos, tipada))
+
+
+def gravar_saida(perfil, df_final, arquivo, nome_saida, nome_planilha, opcoes):
+    formato = saida.CONFIG['formato']
+    avisar_nao_numericos(perfil, df_final, tipada=bool(formato))
+    if formato:
+        # Colunas tipadas: a data como data e os valores como decimal exato
+        colunas_data = [perfil['coluna_data']] if perfil['coluna_data'] else []
+        with metricas.etapa('gravacao', len(df_final)) as medida:
+            medida.saida(salvar_tipado([df_final], nome_saida, formato, colunas_data, perfil['colunas_contabeis'],
+                                       {'banco': perfil['nome'], 'conta': particao(arquivo)}))
+        return
+
+    with metricas.etapa('formatacao', len(df_final)) as medida:
+        texto = formatar_para_saida(df_final, perfil['colunas_contabeis'])
+        medida.saida(len(texto))
+    with metricas.etapa('gravacao', len(texto)) as medida:
+        if nome_planilha == "CSV":
+            texto.to_csv(nome_saida, index=False, encoding='utf-8')
+        else:
+            salvar_xlsx(texto, nome_saida, **opcoes)
+        medida.saida(len(texto))
+
+
+def resumo(resultado):
+    """Resultado sem a tabela, como devolvido por extrair_dados"""
+    return {chave: resultado[chave] for chave in ('planilha', 'arquivo', 'linhas')}
+
+
+def reaproveitar_cache(perfil, planilhas, arquivo):
+    """
+    Devolve os resultados guardados no cache. A saída gerada antes é mantida
+    com o mesmo nome; se foi apagada, ou se o arquivo de entrada é uma cópia
+    em outro lugar, é gravada de novo a partir da tabela guardada.
+    Retorna (resultados, houve_regravacao).
+    """
+    base = os.path.splitext(arquivo)[0]
+    regravou = False
+    for planilha in planilhas:
+        caminho = planilha['arquivo']
+        if not (caminho.startswith(f"{base}_extraido_") and os.path.exists(caminho)):
+            if not caminho.startswith(f"{base}_extraido_"):
+                caminho = criar_nome_arquivo_saida(arquivo, planilha['planilha'])
+            gravar_saida(perfil, planilha['tabela'], arquivo, caminho, planilha['planilha'], planilha['opcoes'])
+            caminho = planilha['arquivo'] = saida.destino(caminho)
+            regravou = True
+        print(f"\nPlanilha {planilha['planilha']}: resultado do cache em {caminho}")
+    return planilhas, regravou
+
+
+def extrair_incremental(perfil, arquivo, formato, conta):
+    """
+    Modo incremental: processa só as linhas posteriores à última transação já
+    vista da conta e as acrescenta ao CSV acumulado de cada planilha
+    """
+    estado = incremental.ler_estado(perfil['nome'], conta)
+    resultados = []
+    if formato in ('xls', 'xlsx'):
+        xls = abrir_planilhas(arquivo, formato)
+        for sheet_name in xls.sheet_names:
+            print(f"\nProcessando planilha: {sheet_name}")
+            try:
+                metricas.planilha(sheet_name)
+                with metricas.etapa('leitura') as medida:
+                    df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
+                    medida.saida(len(df))
+                resultados.append(processar_incremental(perfil, df, arquivo, sheet_name, conta, estado))
+            except Exception as e:
+                erros.falha(f"Erro ao processar planilha {sheet_name}: {e}")
+    elif formato == 'texto':
+        print("\nProcessando arquivo CSV")
+        metricas.planilha("CSV")
+        with metricas.etapa('leitura') as medida:
+            df, _ = ler_csv(arquivo)
+            medida.saida(len(df))
+        resultado = processar_incremental(perfil, df, arquivo, "CSV", conta, estado)
+        if resultado is None:
+            erros.falha("Nenhum dado extraído do CSV")
+        resultados.append(resultado)
+    else:
+        erros.falha("Formato de arquivo não suportado.")
+    incremental.gravar_estado(perfil['nome'], conta, estado)
+    return [resultado for resultado in resultados if resultado]
+
+
+def processar_incremental(perfil, df, arquivo, nome_planilha, conta, estado):
+    """
+    Confere se a última linha vista continua na mesma posição com os mesmos
+    valores; se sim, só as linhas seguintes são convertidas, formatadas e
+    acrescentadas à saída. Senão a planilha é processada por inteiro e a saída
+    recomeça. Atualiza estado[nome_planilha].
+    """
+    # Sem o CSV acumulado não há a que acrescentar: a saída recomeça
+    registro = estado.get(nome_planilha)
+    if registro and not os.path.exists(registro['saida']):
+        registro = None
+
+    anterior = registro
+    if anterior:
+        # O corpo começa na última linha vista, que é conferida e descartada
+        extraido = extrair_colunas(perfil, df, nome_planilha, inicio_corpo=anterior['posicao'])
+        if extraido is None:
+            return
+        df_final, linha_cabecalho = extraido
+        posicao = anterior['posicao']
+        if posicao in df_final.index and incremental.impressao(df_final.loc[posicao].tolist()) == anterior['impressao']:
+            novos = cortar(perfil, df_final.loc[df_final.index > posicao], linha_cabecalho, continuacao=True)
+        else:
+            anterior = None
+
+    if not anterior:
+        extraido = extrair_colunas(perfil, df, nome_planilha)
+        if extraido is None:
+            return
+        df_final, linha_cabecalho = extraido
+        novos = cortar(perfil, df_final, linha_cabecalho)
+
+        # Uma exportação anterior, já processada, não recomeça a saída
+        marcos = registro['marcos'] if registro else {}
+        if not novos.empty and marcos.get(str(novos.index[-1])) == incremental.impressao(novos.iloc[-1].tolist()):
+            print("Exportação já processada anteriormente; nenhuma linha nova.")
+            return {'planilha': nome_planilha, 'arquivo': registro['saida'], 'linhas': 0}
+        if registro:
+            print("A exportação não continua a última processada; a saída recomeça com a planilha inteira.")
+
+    if novos.empty:
+        print("Nenhuma linha nova desde a última execução.")
+        return {'planilha': nome_planilha, 'arquivo': anterior['saida'] if anterior else None, 'linhas': 0}
+
+    impressao = incremental.impressao(novos.iloc[-1].tolist())
+    ultima = int(novos.index[-1])
+    novos, _ = formatar(perfil, novos.copy(), df)
+    avisar_nao_numericos(perfil, novos)
+    with metricas.etapa('formatacao', len(novos)) as medida:
+        novos = formatar_para_saida(novos, perfil['colunas_contabeis'])
+        medida.saida(len(novos))
+
+    with metricas.etapa('gravacao', len(novos)) as medida:
+        if anterior:
+            saida = anterior['saida']
+            novos.to_csv(saida, mode='a', header=False, index=False, encoding='utf-8')
+            print(f"\n{len(novos)} linha(s) nova(s) acrescentada(s) a: {saida}")
+        else:
+            saida = incremental.nome_saida(arquivo, conta, nome_planilha)
+            novos.to_csv(saida, index=False, encoding='utf-8')
+            print(f"\nNovo arquivo criado: {saida}")
+        medida.saida(len(novos))
+
+    # Cada execução deixa um marco (posição -> impressão) do fim do que já foi gravado
+    marcos = anterior['marcos'] if anterior else {}
+    marcos[str(ultima)] = impressao
+    estado[nome_planilha] = {
+        'posicao': ultima,
+        'impressao': impressao,
+        'saida': saida,
+        'linhas': (anterior['linhas'] if anterior else 0) + len(novos),
+        'marcos': marcos,
+    }
+    return {'planilha': nome_planilha, 'arquivo': saida, 'linhas': len(novos)}
@@ -0,0 +1,159 @@
+"""Modo de perfil do lote: cProfile e tracemalloc em volta de cada arquivo.
+
+Para cada arquivo processado ficam, ao lado dele (e das saídas):
+    <arquivo>_<ext>_perfil.pstats          estatísticas do cProfile (pstats / snakeviz)
+    <arquivo>_<ext>_perfil_alocacoes.txt   as maiores alocações por linha de código
+
+As alocações vêm do tracemalloc, num instantâneo tirado no fim da etapa
+(comum.metricas) em que a memória rastreada foi a maior, e não no fim do
+arquivo, quando as tabelas já foram liberadas. No fim do lote, agregar()
+junta os .pstats e as alocações de todos os arquivos. Fora do modo de
+perfil nada disso é carregado nem medido.
+"""
+import cProfile
+import contextlib
+import io
+import linecache
+import os
+import pstats
+import tracemalloc
+
+from comum import metricas
+
+# Ajustes do modo de perfil, alterados pela linha de comando do lote
+CONFIG = {
+    'ativo': False,
+    'top': 25,        # linhas dos relatórios
+    'quadros': 1,     # quadros guardados por alocação no tracemalloc
+}
+
+SUFIXO = '_perfil'
+
+# Alocações do próprio tracemalloc e do carregamento de módulos não interessam
+_FILTROS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def caminho_base(arquivo):
+    """Prefixo dos relatórios do arquivo: extrato.xlsx -> extrato_xlsx_perfil"""
+    base, ext = os.path.splitext(arquivo)
+    return f"{base}_{ext.lstrip('.')}{SUFIXO}" if ext else base + SUFIXO
+
+
+# Registro usado para o instantâneo do fim do arquivo
+_FIM = {'etapa': 'fim do arquivo', 'planilha': None}
+
+
+class _Maior:
+    """Observador das etapas: guarda o instantâneo do maior uso de memória"""
+
+    def __init__(self):
+        self.bytes = -1
+        self.instantaneo = None
+        self.etapa = None
+
+    def __call__(self, registro):
+        atual, _ = tracemalloc.get_traced_memory()
+        if atual > self.bytes:
+            self.bytes = atual
+            self.instantaneo = tracemalloc.take_snapshot()
+            self.etapa = (registro['etapa'], registro['planilha'])
+
+
+def _alocacoes(instantaneo, top):
+    """[(local 'arquivo:linha', bytes, blocos)] das maiores linhas do instantâneo"""
+    estatisticas = instantaneo.filter_traces(_FILTROS).statistics('lineno')
+    return [(f"{est.traceback[0].filename}:{est.traceback[0].lineno}", est.size, est.count)
+            for est in estatisticas[:top]]
+
+
+def _texto_alocacoes(titulo, alocacoes, linhas_extra=()):
+    linhas = [titulo, *linhas_extra, '', f"{'MiB':>10} {'blocos':>9}  local"]
+    for local, tamanho, blocos in alocacoes:
+        arquivo, _, numero = local.rpartition(':')
+        codigo = linecache.getline(arquivo, int(numero)).strip() if numero.isdigit() else ''
+        linhas.append(f"{tamanho / 2**20:>10.2f} {blocos:>9}  {local}")
+        if codigo:
+            linhas.append(f"{'':>22}{codigo}")
+    return '\n'.join(linhas) + '\n'
+
+
+@contextlib.contextmanager
+def perfilar(arquivo):
+    """
+    Executa o bloco sob cProfile e tracemalloc e grava os relatórios ao lado
+    do arquivo. O dict recebido é preenchido no fim com os caminhos, o pico e
+    as maiores alocações; fora do modo de perfil fica vazio.
+    """
+    resultado = {}
+    if not CONFIG['ativo']:
+        yield resultado
+        return
+
+    ja_rastreava = tracemalloc.is_tracing()
+    if not ja_rastreava:
+        tracemalloc.start(CONFIG['quadros'])
+    tracemalloc.reset_peak()
+    maior = _Maior()
+    metricas.OBSERVADORES.append(maior)
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield resultado
+    finally:
+        perfil.disable()
+        metricas.OBSERVADORES.remove(maior)
+        maior(_FIM)
+        _, pico = tracemalloc.get_traced_memory()
+        if not ja_rastreava:
+            tracemalloc.stop()
+
+        base = caminho_base(arquivo)
+        resultado['pstats'] = base + '.pstats'
+        perfil.dump_stats(resultado['pstats'])
+
+        resultado['pico_bytes'] = pico
+        resultado['alocacoes'] = _alocacoes(maior.instantaneo, CONFIG['top'])
+        etapa, planilha = maior.etapa
+        onde = f"no fim da etapa '{etapa}'" + (f" (planilha {planilha})" if planilha else '')
+        resultado['relatorio_alocacoes'] = base + '_alocacoes.txt'
+        with open(resultado['relatorio_alocacoes'], 'w', encoding='utf-8') as f:
+            f.write(_texto_alocacoes(
+                f"Maiores alocações de {os.path.basename(arquivo)} (tracemalloc, por linha)",
+                resultado['alocacoes'],
+                [f"Pico rastreado: {pico / 2**20:.1f} MiB",
+                 f"Instantâneo de {maior.bytes / 2**20:.1f} MiB, {onde}"],
+            ))
+
+
+def agregar(perfis, destino):
+    """
+    Junta os perfis dos arquivos de um lote: grava destino.pstats e
+    destino_alocacoes.txt (alocações somadas por linha) e devolve o texto
+    das funções com mais tempo acumulado
+    """
+    perfis = [perfil for perfil in perfis if perfil.get('pstats') and os.path.exists(perfil['pstats'])]
+    if not perfis:
+        return ''
+    texto = io.StringIO()
+    estatisticas = pstats.Stats(*[perfil['pstats'] for perfil in perfis], stream=texto)
+    estatisticas.dump_stats(destino + '.pstats')
+
+    somas = {}
+    for perfil in perfis:
+        for local, tamanho, blocos in perfil['alocacoes']:
+            soma = somas.setdefault(local, [0, 0])
+            soma[0] += tamanho
+            soma[1] += blocos
+    alocacoes = sorted(((local, t, b) for local, (t, b) in somas.items()), key=lambda a: -a[1])[:CONFIG['top']]
+    pico = max(perfil['pico_bytes'] for perfil in perfis)
+    with open(destino + '_alocacoes.txt', 'w', encoding='utf-8') as f:
+        f.write(_texto_alocacoes(f"Maiores alocações somadas de {len(perfis)} arquivo(s)", alocacoes,
+                                 [f"Maior pico rastreado de um arquivo: {pico / 2**20:.1f} MiB"]))
+
+    estatisticas.sort_stats('cumulative').print_stats(CONFIG['top'])
+    return texto.getvalue()
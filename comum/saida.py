@@ -0,0 +1,339 @@
+"""Gravação das planilhas de saída."""
+from datetime import date, datetime
+import os
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, NamedStyle, PatternFill
+from openpyxl.utils.dataframe import dataframe_to_rows
+
+from comum.datas import converter_datas
+from comum.dinheiro import coluna_original, converter_centavos
+
+FORMATO_CONTABIL = '#.##0,00_-'
+# Formatos de data gravados pelo DataFrame.to_excel do pandas
+FORMATO_DATA_HORA = 'YYYY-MM-DD HH:MM:SS'
+FORMATO_DATA = 'YYYY-MM-DD'
+# Limite de linhas de uma aba do Excel, cabeçalho incluído
+MAX_LINHAS_PLANILHA = 1_048_576
+# Formato de data das saídas tipadas em .xlsx
+FORMATO_DATA_BR = 'DD/MM/YYYY'
+
+# Saídas com colunas tipadas: data, valores em decimal (centavos inteiros)
+EXTENSOES_SAIDA = {'parquet': '.parquet', 'arrow': '.arrow', 'xlsx': '.xlsx', 'csv': '.csv'}
+FORMATOS_SAIDA = tuple(EXTENSOES_SAIDA)
+# Colunas de partição do dataset parquet
+PARTICOES = ['banco', 'conta', 'mes']
+
+# Formato pedido na linha de comando (None: a saída de sempre de cada extrator)
+# e pasta do dataset parquet particionado (None: um arquivo por planilha)
+CONFIG = {
+    'formato': None,
+    'dataset': None,
+}
+
+
+def _registrar_estilos(wb):
+    """Registra os estilos nomeados compartilhados por todas as células"""
+    wb.add_named_style(NamedStyle(name='contabil', number_format=FORMATO_CONTABIL))
+    wb.add_named_style(NamedStyle(name='contabil_negrito', number_format=FORMATO_CONTABIL,
+                                  font=Font(bold=True)))
+
+
+def salvar_xlsx(df, caminho, colunas_contabeis=(1, 2), linhas_negrito=(), coluna_negrito=1,
+                titulo='Dados Extraídos'):
+    """
+    Grava o DataFrame em modo write-only do openpyxl, linha a linha.
+    As colunas nas posições colunas_contabeis recebem o formato contábil; nas
+    linhas cujo índice está em linhas_negrito a coluna coluna_negrito fica em
+    negrito.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(titulo)
+    _registrar_estilos(wb)
+    negrito = set(linhas_negrito)
+
+    linhas = dataframe_to_rows(df, index=False, header=True)
+    ws.append(next(linhas))
+    for rotulo, valores in zip(df.index, linhas):
+        for posicao in colunas_contabeis:
+            if posicao < len(valores):
+                celula = WriteOnlyCell(ws, value=valores[posicao])
+                if posicao == coluna_negrito and rotulo in negrito:
+                    celula.style = 'contabil_negrito'
+                else:
+                    celula.style = 'contabil'
+                valores[posicao] = celula
+        ws.append(valores)
+
+    wb.save(caminho)
+
+
+def _celula(ws, valor, estilo):
+    """Célula write-only com o estilo de cor da linha e o formato de data do pandas"""
+    celula = WriteOnlyCell(ws, value=valor)
+    if estilo is not None:
+        celula.style = estilo
+    if isinstance(valor, datetime):
+        celula.number_format = FORMATO_DATA_HORA
+    elif isinstance(valor, date):
+        celula.number_format = FORMATO_DATA
+    return celula
+
+
+def salvar_xlsx_colorido(partes, caminho, coluna_cor, cores, titulo='Sheet1'):
+    """
+    Grava, numa única passada em modo write-only e no layout de
+    df.to_excel(index=False), um ou mais DataFrames com as mesmas colunas;
+    partes pode ser um gerador, consumido pedaço a pedaço. A linha inteira
+    recebe a cor de cores cuja chave é o texto da coluna_cor (sem espaços,
+    em maiúsculas); sem coluna_cor nada é colorido. Linhas além do limite
+    do Excel continuam em novas abas (titulo_2, titulo_3...). Retorna o
+    número de linhas gravadas.
+    """
+    wb = Workbook(write_only=True)
+    # Um estilo nomeado por cor, compartilhado por todas as células
+    estilos = {}
+    for chave, cor in cores.items():
+        estilos[chave] = f'cor_{chave}'
+        wb.add_named_style(NamedStyle(name=estilos[chave],
+                                      fill=PatternFill(start_color=cor, end_color=cor, fill_type='solid')))
+
+    linhas = 0
+    ws = None
+    livres = 0
+    for df in partes:
+        if ws is None:
+            cabecalho = list(df.columns)
+            ws = wb.create_sheet(titulo)
+            ws.append(cabecalho)
+            livres = MAX_LINHAS_PLANILHA - 1
+
+        if coluna_cor is None:
+            pintura = [None] * len(df)
+        else:
+            # A cor de cada valor distinto da coluna é decidida uma vez só
+            codigos, unicos = pd.factorize(df[coluna_cor])
+            estilo_unico = [estilos.get(v.strip().upper()) if isinstance(v, str) else None
+                            for v in unicos.tolist()] + [None]
+            pintura = [estilo_unico[codigo] for codigo in codigos.tolist()]
+
+        valores = df.astype(object).where(df.notna(), None)
+        for linha, estilo in zip(valores.itertuples(index=False, name=None), pintura):
+            if not livres:
+                ws = wb.create_sheet(f"{titulo}_{len(wb.worksheets) + 1}")
+                ws.append(cabecalho)
+                livres = MAX_LINHAS_PLANILHA - 1
+            # Só linhas coloridas ou com datas precisam de células com estilo
+            if estilo is None and not any(isinstance(v, date) for v in linha):
+                ws.append(linha)
+            else:
+                ws.append([_celula(ws, v, estilo) for v in linha])
+            livres -= 1
+        linhas += len(df)
+
+    if ws is None:
+        wb.create_sheet(titulo)
+    wb.save(caminho)
+    return linhas
+
+
+def _importar_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ImportError("As saídas parquet e arrow precisam do pacote pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def tipar(df, colunas_data=(), colunas_valor=()):
+    """
+    Converte as colunas de data para datetime64 (só a data) e as de valor
+    para centavos inteiros (Int64, nulo onde não há valor). Colunas de valor
+    que já estão em centavos passam direto. O texto original dos valores que
+    não são número (coluna_original) não vai para a saída tipada.
+    """
+    tabela = df.drop(columns=[coluna_original(nome) for nome in colunas_valor
+                              if coluna_original(nome) in df.columns])
+    for nome in colunas_data:
+        tabela[nome] = converter_datas(tabela[nome]).dt.normalize()
+    for nome in colunas_valor:
+        if not isinstance(tabela[nome].dtype, pd.Int64Dtype):
+            tabela[nome] = converter_centavos(tabela[nome])
+    return tabela
+
+
+def _decimais_arrow(centavos):
+    """Coluna Int64 de centavos como decimal128(18, 2), sem passar por float nem Decimal"""
+    pa = _importar_pyarrow()
+    import pyarrow.compute as pc
+
+    numeros = centavos.to_numpy(dtype=np.int64, na_value=0)
+    # decimal128 guarda o inteiro sem escala em 16 bytes little-endian:
+    # os centavos na parte baixa e a extensão do sinal na alta
+    blocos = np.empty((len(numeros), 2), dtype='<i8')
+    blocos[:, 0] = numeros
+    blocos[:, 1] = numeros >> 63
+    tipo = pa.decimal128(18, 2)
+    decimais = pa.Array.from_buffers(tipo, len(numeros), [None, pa.py_buffer(blocos)])
+    return pc.if_else(pa.array(centavos.notna().to_numpy()), decimais, pa.nulls(len(numeros), tipo))
+
+
+def tabela_arrow(tabela, colunas_data=(), colunas_valor=()):
+    """pyarrow.Table de uma tabela já tipada: date32, decimal128(18, 2) e texto"""
+    pa = _importar_pyarrow()
+    colunas = []
+    for nome in tabela.columns:
+        coluna = tabela[nome]
+        if nome in colunas_data:
+            colunas.append(pa.array(coluna.to_numpy(dtype='datetime64[ms]'), from_pandas=True).cast(pa.date32()))
+        elif nome in colunas_valor:
+            colunas.append(_decimais_arrow(coluna))
+        else:
+            colunas.append(pa.array(coluna.astype('string'), from_pandas=True))
+    return pa.Table.from_arrays(colunas, names=[str(nome) for nome in tabela.columns])
+
+
+def _texto_decimal(centavos):
+    """Centavos como texto '-1234.56', exato; vazio onde não há valor"""
+    numeros = centavos.to_numpy(dtype=np.int64, na_value=0)
+    inteiros, resto = np.divmod(np.abs(numeros), 100)
+    texto = (np.where(numeros < 0, '-', '') + inteiros.astype(str) + '.'
+             + np.strings.zfill(resto.astype(str), 2))
+    return np.where(centavos.notna().to_numpy(), texto, '')
+
+
+def _gravar_csv(tabelas, caminho, colunas_data, colunas_valor):
+    linhas = 0
+    for i, tabela in enumerate(tabelas):
+        texto = tabela.copy()
+        for nome in colunas_data:
+            texto[nome] = texto[nome].dt.strftime('%Y-%m-%d')
+        for nome in colunas_valor:
+            texto[nome] = _texto_decimal(texto[nome])
+        texto.to_csv(caminho, mode='w' if i == 0 else 'a', header=(i == 0), index=False, encoding='utf-8')
+        linhas += len(tabela)
+    return linhas
+
+
+def _gravar_xlsx_tipado(tabelas, caminho, colunas_data, colunas_valor, titulo='Dados Extraídos'):
+    wb = Workbook(write_only=True)
+    _registrar_estilos(wb)
+    wb.add_named_style(NamedStyle(name='data_br', number_format=FORMATO_DATA_BR))
+    linhas = 0
+    ws = None
+    livres = 0
+    for tabela in tabelas:
+        if ws is None:
+            cabecalho = list(tabela.columns)
+            estilos = ['data_br' if nome in colunas_data else 'contabil' if nome in colunas_valor else None
+                       for nome in cabecalho]
+            ws = wb.create_sheet(titulo)
+            ws.append(cabecalho)
+            livres = MAX_LINHAS_PLANILHA - 1
+
+        colunas = []
+        for nome in tabela.columns:
+            coluna = tabela[nome]
+            if nome in colunas_data:
+                valores = coluna.dt.to_pydatetime().tolist() if len(coluna) else []
+                colunas.append([None if pd.isna(v) else v for v in valores])
+            elif nome in colunas_valor:
+                reais = coluna.to_numpy(dtype=np.float64, na_value=np.nan) / 100
+                colunas.append([None if np.isnan(v) else v for v in reais.tolist()])
+            else:
+                colunas.append(coluna.astype(object).where(coluna.notna(), None).tolist())
+
+        for linha in zip(*colunas):
+            if not livres:
+                ws = wb.create_sheet(f"{titulo}_{len(wb.worksheets) + 1}")
+                ws.append(cabecalho)
+                livres = MAX_LINHAS_PLANILHA - 1
+            ws.append([v if estilo is None or v is None else _celula_tipada(ws, v, estilo)
+                       for v, estilo in zip(linha, estilos)])
+            livres -= 1
+        linhas += len(tabela)
+
+    if ws is None:
+        wb.create_sheet(titulo)
+    wb.save(caminho)
+    return linhas
+
+
+def _celula_tipada(ws, valor, estilo):
+    celula = WriteOnlyCell(ws, value=valor)
+    celula.style = estilo
+    return celula
+
+
+def _gravar_arrow(tabelas, caminho, formato, colunas_data, colunas_valor):
+    pa = _importar_pyarrow()
+    escritor = None
+    linhas = 0
+    try:
+        for tabela in tabelas:
+            lote = tabela_arrow(tabela, colunas_data, colunas_valor)
+            if escritor is None:
+                if formato == 'parquet':
+                    escritor = pa.parquet.ParquetWriter(caminho, lote.schema)
+                else:
+                    escritor = pa.ipc.new_file(caminho, lote.schema)
+            escritor.write_table(lote)
+            linhas += len(tabela)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return linhas
+
+
+def _gravar_dataset(tabelas, pasta, particao, nome_base, colunas_data, colunas_valor):
+    """Acrescenta as linhas ao dataset parquet particionado por banco/conta/mês"""
+    pa = _importar_pyarrow()
+    linhas = 0
+    for i, tabela in enumerate(tabelas):
+        lote = tabela_arrow(tabela, colunas_data, colunas_valor)
+        datas = tabela[colunas_data[0]] if colunas_data else pd.Series(pd.NaT, index=tabela.index)
+        meses = datas.dt.strftime('%Y-%m').fillna('sem_data')
+        lote = (lote.append_column('banco', pa.array([particao['banco']] * len(tabela), pa.string()))
+                .append_column('conta', pa.array([particao['conta']] * len(tabela), pa.string()))
+                .append_column('mes', pa.array(meses.tolist(), pa.string())))
+        # O nome dos arquivos vem da origem: processar de novo substitui, não duplica
+        pa.parquet.write_to_dataset(lote, pasta, partition_cols=PARTICOES,
+                                    basename_template=f"{nome_base}-{i}-{{i}}.parquet",
+                                    existing_data_behavior='overwrite_or_ignore')
+        linhas += len(tabela)
+    return linhas
+
+
+def destino(caminho):
+    """
+    Onde salvar_tipado grava o que seria caminho: no modo dataset, a pasta do
+    dataset (caminho só dá o nome dos arquivos dentro dela); senão o próprio caminho
+    """
+    if CONFIG['formato'] == 'parquet' and CONFIG['dataset']:
+        return CONFIG['dataset']
+    return caminho
+
+
+def salvar_tipado(partes, caminho, formato, colunas_data=(), colunas_valor=(), particao=None):
+    """
+    Grava os DataFrames de partes (pode ser um gerador) com colunas tipadas:
+    datas como data e valores como decimal exato (centavos inteiros). formato
+    é um de FORMATOS_SAIDA. Com CONFIG['dataset'] e formato parquet, as linhas
+    vão para o dataset particionado por PARTICOES; particao dá o banco e a conta
+    e o nome de caminho identifica os arquivos da origem. Retorna o número de linhas.
+    """
+    tabelas = (tipar(df, colunas_data, colunas_valor) for df in partes)
+    if formato == 'parquet' and CONFIG['dataset']:
+        nome_base = os.path.splitext(os.path.basename(caminho))[0]
+        return _gravar_dataset(tabelas, CONFIG['dataset'], particao, nome_base, colunas_data, colunas_valor)
+    if formato in ('parquet', 'arrow'):
+        return _gravar_arrow(tabelas, caminho, formato, colunas_data, colunas_valor)
+    if formato == 'csv':
+        return _gravar_csv(tabelas, caminho, colunas_data, colunas_valor)
+    if formato == 'xlsx':
+        return _gravar_xlsx_tipado(tabelas, caminho, colunas_data, colunas_valor)
+    raise ValueError(f"Formato de saída desconhecido: {formato}")
@@ -4,113 +4,40 @@ from tkinter import filedialog, messagebox
 import unicodedata
 import os
 import re
-from decimal import Decimal, InvalidOperation
+import sys
 from dateutil import parser
 import xlrd
 from openpyxl import Workbook
-from datetime import datetime
 
-class ExtratorDadosFinanceiros:
-    def __init__(self):
-        self.root = tk.Tk()
-        self.root.withdraw()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.cabecalhos import localizar_marcador
+from comum.datas import normalizar_datas
+from comum.dinheiro import extrair_centavos_serie, extrair_valores_serie
+from comum.formatacao import formatar_para_saida
+from comum.leitura import abrir_planilhas, detectar_formato_arquivo, ler_csv
+from comum import erros, metricas, saida
 
-    # ======================
-    # FUNÇÕES DE PROCESSAMENTO DE VALORES
-    # ======================
-    
-    @staticmethod
-    def extrair_valor_numerico(texto):
-        """
-        Extrai valores numéricos de texto com precisão absoluta
-        Versão 4.0 - Totalmente otimizada para dados financeiros brasileiros
-        """
-        if pd.isna(texto) or not str(texto).strip():
-            return None
-
-        texto = str(texto).strip()
-        
-        # Padrão completo para valores financeiros brasileiros
-        padrao_dinheiro = r"""
-            (?:R\$\s*)?                  # R$ opcional
-            ([-+]?)                       # Sinal (+/-)
-            \s*                           # Espaços
-            (                             # Parte inteira:
-            \d{1,3}(?:\.\d{3})*         # Com separador de milhar
-            |\d+                         # Ou sem separador
-            )
-            (?:                           # Parte decimal:
-            ([.,])                       # Separador decimal
-            (\d{1,2})                   # 1-2 dígitos decimais
-            )?                           # Parte decimal opcional
-        """
-        
-        # Encontra todos os valores no texto
-        matches = re.finditer(padrao_dinheiro, texto, re.VERBOSE)
-        valores = []
-        
-        for match in matches:
-            sinal, parte_inteira, sep_decimal, parte_decimal = match.groups()
-            
-            # Limpeza da parte inteira
-            if '.' in parte_inteira:
-                # Verifica se o ponto é separador de milhar (formato brasileiro)
-                if sep_decimal == ',' or (sep_decimal is None and ',' not in texto):
-                    parte_inteira = parte_inteira.replace('.', '')
-            
-            # Construção do número
-            numero_str = parte_inteira
-            if sep_decimal and parte_decimal:
-                # Completa com zeros se necessário
-                parte_decimal = parte_decimal.ljust(2, '0')[:2]
-                numero_str += '.' + parte_decimal
-            
-            try:
-                valor = Decimal(numero_str)
-                if sinal == '-':
-                    valor = -valor
-                valores.append(float(valor))
-            except InvalidOperation:
-                continue
-        
-        # Lógica para selecionar o valor correto
-        if not valores:
-            return None
-        elif len(valores) == 1:
-            return valores[0]
-        else:
-            # Prioriza o maior valor absoluto (mais provável de ser o principal)
-            return max(valores, key=abs)
+# Datas soltas no meio do texto (DD/MM/AAAA, DD-MM-AA...)
+PADRAO_DATA_TEXTO = re.compile(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b')
 
-    @staticmethod
-    def formatar_moeda_brasileira(valor):
-        """Formata valores no padrão brasileiro com precisão"""
-        if valor is None or pd.isna(valor):
-            return ""
-        
-        try:
-            valor = float(valor)
-            # Formata com separadores
-            formatado = "{:,.2f}".format(abs(valor))
-            
-            # Aplica formato brasileiro
-            if valor < 0:
-                return "-" + formatado.replace(",", "X").replace(".", ",").replace("X", ".")
-            return formatado.replace(",", "X").replace(".", ",").replace("X", ".")
-        except (ValueError, TypeError):
-            return str(valor)
+class ExtratorDadosFinanceiros:
+    def __init__(self, interface=True, salvar_convertido=False):
+        # A cópia .xlsx de arquivos .xls só é gravada se pedida
+        self.salvar_convertido = salvar_convertido
+        # Sem interface (execução em lote) não cria a janela do Tk
+        self.root = None
+        if interface:
+            self.root = tk.Tk()
+            self.root.withdraw()
 
     # ======================
     # FUNÇÕES DE PROCESSAMENTO DE DATAS
     # ======================
     
     @staticmethod
-    def parse_data(data_str):
-        """Converte datas em vários formatos para DD/MM/YYYY"""
+    def analisar_data(data_str):
+        """Localiza a data no texto e a interpreta com o dateutil (dia primeiro)"""
         try:
-            if isinstance(data_str, datetime):
-                return data_str.strftime('%d/%m/%Y')
-            
             data_str = str(data_str).strip()
             
             # Padrões de data suportados
@@ -131,7 +58,7 @@ class ExtratorDadosFinanceiros:
                     data_str = data_str.replace('-', '/')
                     break
             
-            return parser.parse(data_str, dayfirst=True).strftime('%d/%m/%Y')
+            return parser.parse(data_str, dayfirst=True)
         except Exception:
             return None
 
@@ -149,9 +76,10 @@ class ExtratorDadosFinanceiros:
     def criar_nome_saida(self, arquivo_original, sufixo="extraido"):
         """Cria nome único para arquivo de saída"""
         base, ext = os.path.splitext(arquivo_original)
+        ext = saida.EXTENSOES_SAIDA[saida.CONFIG['formato']] if saida.CONFIG['formato'] else '.xlsx'
         contador = 1
         while True:
-            novo_nome = f"{base}_{sufixo}_{contador}.xlsx"
+            novo_nome = f"{base}_{sufixo}_{contador}{ext}"
             if not os.path.exists(novo_nome):
                 return novo_nome
             contador += 1
@@ -161,14 +89,14 @@ class ExtratorDadosFinanceiros:
     # ======================
     
     def ler_como_html(self, caminho_arquivo):
-        """Tenta ler arquivos .xls antigos como HTML"""
+        """Lê arquivos .xls que na verdade são HTML"""
         try:
             dfs = pd.read_html(caminho_arquivo, header=0)
             if dfs:
                 print("Arquivo .xls lido com sucesso como HTML")
                 return dfs[0]
         except Exception as e:
-            print(f"Erro ao ler como HTML: {e}")
+            erros.falha(f"Erro ao ler como HTML: {e}")
         return None
 
     def converter_xls_para_xlsx(self, caminho_arquivo):
@@ -200,10 +128,8 @@ class ExtratorDadosFinanceiros:
     
     def encontrar_linha_saldo_inicial(self, df):
         """Encontra linha com 'saldo inicial'"""
-        for idx, linha in df.iterrows():
-            if any('saldo inicial' in str(cell).lower() for cell in linha.values):
-                return idx
-        return None
+        linha, _ = localizar_marcador(df, ['saldo inicial'])
+        return linha
 
     def normalizar_texto(self, texto):
         """Normaliza texto removendo acentos e caracteres especiais"""
@@ -212,38 +138,39 @@ class ExtratorDadosFinanceiros:
         texto = unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('ASCII')
         return ''.join(c for c in texto if c.isalnum() or c.isspace()).strip().lower()
 
-    def extrair_de_texto_nao_estruturado(self, texto):
-        """Extrai dados financeiros de texto não estruturado"""
-        # Extrai datas
-        datas = re.findall(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b', texto)
-        
-        # Extrai valores
-        valores = []
-        for parte in re.split(r'\s+', texto):
-            valor = self.extrair_valor_numerico(parte)
-            if valor is not None:
-                valores.append(valor)
-        
-        if len(datas) >= 1 and len(valores) >= 2:
-            return {
-                'Data': datas[0],
-                'Valor': valores[0],
-                'Saldo': valores[-1]
-            }
-        return None
+    def extrair_de_tabela_nao_estruturada(self, df):
+        """
+        Extrai Data/Valor/Saldo do texto de cada linha do DataFrame: a primeira
+        data, o primeiro e o último valor, em linhas com uma data e ao menos dois
+        valores. Retorna o DataFrame ou None se nenhuma linha servir.
+        """
+        # Texto de cada linha: células com str() separadas por espaço, como no ' '.join
+        textos = None
+        for i in range(df.shape[1]):
+            coluna = df.iloc[:, i].map(str).to_numpy(dtype=object)
+            textos = coluna if textos is None else textos + ' ' + coluna
+        textos = pd.Series(textos, dtype=object)
 
-    def processar_dataframe(self, df):
-        """Processa DataFrame para extrair colunas financeiras"""
-        if df.empty or len(df.columns) < 2:
-            print("DataFrame vazio ou inválido")
-            return None
+        # Primeira data de cada linha
+        datas = textos.str.extract(f"({PADRAO_DATA_TEXTO.pattern})", expand=False)
 
-        # Remove linha de saldo inicial
-        linha_saldo = self.encontrar_linha_saldo_inicial(df)
-        if linha_saldo is not None:
-            print(f"Removendo 'saldo inicial' na linha {linha_saldo + 1}")
-            df = df.iloc[linha_saldo + 1:]
+        # Cada pedaço entre espaços vale o maior número que contém; todos de uma vez
+        partes = textos.str.split().explode()
+        valores = extrair_valores_serie(partes.dropna()).dropna()
+        por_linha = valores.groupby(level=0)
+        quantidade = por_linha.size().reindex(textos.index, fill_value=0)
+
+        validas = datas.notna() & (quantidade >= 2)
+        if not validas.any():
+            return None
+        return pd.DataFrame({
+            'Data': datas[validas].tolist(),
+            'Valor': por_linha.first()[validas[validas].index].to_numpy(),
+            'Saldo': por_linha.last()[validas[validas].index].to_numpy(),
+        })
 
+    def identificar_colunas(self, df):
+        """Data/Valor/Saldo pelos nomes das colunas ou, sem eles, pelo texto das linhas; None se nada servir"""
         # Tenta normalizar cabeçalhos
         try:
             if df.shape[0] > 1:
@@ -277,33 +204,40 @@ class ExtratorDadosFinanceiros:
             df_final.columns = ['Data', 'Valor', 'Saldo']
         else:
             print("Colunas padrão não encontradas. Extraindo de texto não estruturado...")
-            dados_extraidos = []
-            
-            for _, linha in df.iterrows():
-                linha_texto = ' '.join(str(cell) for cell in linha.values)
-                dados = self.extrair_de_texto_nao_estruturado(linha_texto)
-                if dados:
-                    dados_extraidos.append(dados)
-            
-            if dados_extraidos:
-                df_final = pd.DataFrame(dados_extraidos)
-            else:
+            df_final = self.extrair_de_tabela_nao_estruturada(df)
+            if df_final is None:
                 print("Não foi possível extrair dados válidos")
                 print("Colunas disponíveis:", df.columns.tolist())
                 return None
+        return df_final
+
+    def processar_dataframe(self, df):
+        """Processa DataFrame para extrair colunas financeiras"""
+        if df.empty or len(df.columns) < 2:
+            print("DataFrame vazio ou inválido")
+            return None
+
+        # Remove linha de saldo inicial
+        with metricas.etapa('marcador', len(df)):
+            linha_saldo = self.encontrar_linha_saldo_inicial(df)
+        if linha_saldo is not None:
+            print(f"Removendo 'saldo inicial' na linha {linha_saldo + 1}")
+            df = df.iloc[linha_saldo + 1:]
+
+        with metricas.etapa('cabecalho', len(df)) as medida:
+            df_final = self.identificar_colunas(df)
+            medida.saida(0 if df_final is None else len(df_final))
+        if df_final is None:
+            return None
 
         # Processamento final
-        df_final['Data'] = df_final['Data'].apply(self.parse_data)
-        df_final['Valor'] = df_final['Valor'].apply(self.extrair_valor_numerico)
-        df_final['Saldo'] = df_final['Saldo'].apply(self.extrair_valor_numerico)
-        
-        # Formatação
-        df_final['Valor'] = df_final['Valor'].apply(self.formatar_moeda_brasileira)
-        df_final['Saldo'] = df_final['Saldo'].apply(self.formatar_moeda_brasileira)
-        
-        # Limpeza
-        df_final = df_final.dropna(subset=['Data', 'Valor', 'Saldo'], how='all')
-        df_final = df_final[(df_final['Valor'].notna()) | (df_final['Saldo'].notna())]
+        # Cada data distinta é interpretada uma vez; o dateutil só vê o que os formatos fixos não reconhecem
+        with metricas.etapa('normalizacao', len(df_final)) as medida:
+            df_final['Data'] = normalizar_datas(df_final['Data'], analisar=self.analisar_data)
+            # Valores em centavos inteiros; o padrão contábil só é aplicado na gravação
+            df_final['Valor'] = extrair_centavos_serie(df_final['Valor'])
+            df_final['Saldo'] = extrair_centavos_serie(df_final['Saldo'])
+            medida.saida(len(df_final))
         
         # Remove últimas linhas (totais/rodapé)
         if len(df_final) > 4:
@@ -313,82 +247,115 @@ class ExtratorDadosFinanceiros:
 
     def processar_arquivo(self, caminho_arquivo):
         """Processa o arquivo de acordo com seu formato"""
-        if caminho_arquivo.lower().endswith('.xls'):
-            df = self.ler_como_html(caminho_arquivo)
+        try:
+            # O formato vem dos primeiros bytes, sem tentativas de leitura
+            formato_arquivo = detectar_formato_arquivo(caminho_arquivo)
+        except OSError as e:
+            erros.falha(f"Erro ao abrir arquivo: {e}")
+            return None, None
+
+        if formato_arquivo == 'html':
+            metricas.planilha("Planilha_HTML")
+            with metricas.etapa('leitura') as medida:
+                df = self.ler_como_html(caminho_arquivo)
+                medida.saida(0 if df is None else len(df))
             if df is not None:
                 return {"Planilha_HTML": df}, "HTML"
-            else:
-                novo_arquivo = self.converter_xls_para_xlsx(caminho_arquivo)
-                if novo_arquivo:
-                    caminho_arquivo = novo_arquivo
-                else:
-                    return None, None
+            return None, None
+        if formato_arquivo == 'xls' and self.salvar_convertido:
+            self.converter_xls_para_xlsx(caminho_arquivo)
         
         try:
-            if caminho_arquivo.lower().endswith(('.xlsx', '.xls')):
-                xls = pd.ExcelFile(caminho_arquivo)
+            if formato_arquivo in ('xls', 'xlsx'):
+                xls = abrir_planilhas(caminho_arquivo, formato_arquivo)
                 planilhas = {}
                 for nome in xls.sheet_names:
                     print(f"\nProcessando planilha: {nome}")
-                    df = pd.read_excel(xls, sheet_name=nome, header=None)
+                    metricas.planilha(nome)
+                    with metricas.etapa('leitura') as medida:
+                        df = pd.read_excel(xls, sheet_name=nome, header=None)
+                        medida.saida(len(df))
                     planilhas[nome] = df
                 return planilhas, "Excel"
-            elif caminho_arquivo.lower().endswith('.csv'):
-                codificacoes = ['utf-8', 'latin1', 'iso-8859-1', 'cp1252']
-                separadores = [',', ';', '\t']
-                for codificacao in codificacoes:
-                    for sep in separadores:
-                        try:
-                            df = pd.read_csv(caminho_arquivo, header=None, encoding=codificacao, sep=sep)
-                            print(f"CSV lido com encoding {codificacao} e separador '{sep}'")
-                            return {"CSV": df}, "CSV"
-                        except:
-                            continue
-                print("Falha ao ler arquivo CSV")
-                return None, None
+            elif formato_arquivo == 'texto':
+                try:
+                    metricas.planilha("CSV")
+                    with metricas.etapa('leitura') as medida:
+                        df, formato = ler_csv(caminho_arquivo)
+                        medida.saida(len(df))
+                except Exception as e:
+                    erros.falha(f"Falha ao ler arquivo CSV: {e}")
+                    return None, None
+                print(f"CSV lido com encoding {formato['encoding']} e separador '{formato['sep']}'")
+                return {"CSV": df}, "CSV"
             else:
-                print("Formato não suportado")
+                erros.falha("Formato não suportado")
                 return None, None
         except Exception as e:
-            print(f"Erro ao processar arquivo: {e}")
+            erros.falha(f"Erro ao processar arquivo: {e}")
             return None, None
 
-    def executar(self):
-        """Método principal de execução"""
-        caminho_arquivo = self.selecionar_arquivo()
-        if not caminho_arquivo:
-            print("Nenhum arquivo selecionado")
-            return
-        
-        print(f"\nProcessando arquivo: {caminho_arquivo}")
-        
+    def extrair_dados(self, caminho_arquivo):
+        """Lê o arquivo, extrai cada planilha e salva as saídas (sem diálogos)"""
         dados, tipo = self.processar_arquivo(caminho_arquivo)
         if dados is None:
-            messagebox.showerror("Erro", "Falha ao processar o arquivo")
-            return
-        
+            return None
+
         resultados = []
         for nome_planilha, df in dados.items():
             print(f"\nProcessando: {nome_planilha}")
+            metricas.planilha(nome_planilha)
             
             df_processado = self.processar_dataframe(df)
             if df_processado is None:
-                print(f"Não foi possível extrair dados de {nome_planilha}")
+                mensagem = f"Não foi possível extrair dados de {nome_planilha}"
+                if tipo == "Excel":
+                    print(mensagem)
+                else:
+                    # CSV e HTML têm uma tabela só: sem ela, o arquivo não foi extraído
+                    erros.falha(mensagem)
                 continue
             
             nome_saida = self.criar_nome_saida(caminho_arquivo, f"extraido_{nome_planilha}")
-            df_processado.to_excel(nome_saida, index=False)
+            if saida.CONFIG['formato']:
+                conta = os.path.splitext(os.path.basename(caminho_arquivo))[0]
+                with metricas.etapa('gravacao', len(df_processado)) as medida:
+                    medida.saida(saida.salvar_tipado([df_processado], nome_saida, saida.CONFIG['formato'], ['Data'],
+                                                     ['Valor', 'Saldo'], {'banco': 'spx', 'conta': conta}))
+                nome_saida = saida.destino(nome_saida)
+            else:
+                with metricas.etapa('formatacao', len(df_processado)) as medida:
+                    texto = formatar_para_saida(df_processado, ['Valor', 'Saldo'])
+                    medida.saida(len(texto))
+                with metricas.etapa('gravacao', len(texto)) as medida:
+                    texto.to_excel(nome_saida, index=False)
+                    medida.saida(len(texto))
             
             print(f"\nDados salvos em: {nome_saida}")
             print(f"Total de linhas: {len(df_processado)}")
             print("Primeiras linhas:")
-            print(df_processado.head())
+            print(formatar_para_saida(df_processado.head(), ['Valor', 'Saldo']))
             
             resultados.append({
                 'planilha': nome_planilha,
                 'arquivo': nome_saida,
                 'linhas': len(df_processado)
             })
+        return resultados
+
+    def executar(self):
+        """Método principal de execução"""
+        caminho_arquivo = self.selecionar_arquivo()
+        if not caminho_arquivo:
+            print("Nenhum arquivo selecionado")
+            return
+        
+        print(f"\nProcessando arquivo: {caminho_arquivo}")
+        
+        resultados = self.extrair_dados(caminho_arquivo)
+        if resultados is None:
+            messagebox.showerror("Erro", "Falha ao processar o arquivo")
+            return
         
         if resultados:
             resumo = "\n".join(
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# Os testes importam o pacote comum a partir da raiz do repositório e os
+# geradores e referências (gerador, formatacao, valores_spx) de benchmarks/
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'benchmarks'))
+
+from comum import cache, incremental, motor, saida  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def configuracao_restaurada():
+    """lote.main() e os testes alteram as configurações globais dos módulos; cada teste começa do mesmo ponto"""
+    configs = [cache.CONFIG, saida.CONFIG, incremental.CONFIG]
+    anteriores = [dict(config) for config in configs]
+    processos_planilhas = motor.PROCESSOS_PLANILHAS
+    em_fluxo = motor.LEITURA_EM_FLUXO
+    yield
+    motor.PROCESSOS_PLANILHAS = processos_planilhas
+    motor.LEITURA_EM_FLUXO = em_fluxo
+    for config, anterior in zip(configs, anteriores):
+        config.clear()
+        config.update(anterior)
+
+
+@pytest.fixture
+def formato_saida():
+    """saida.CONFIG, para o teste trocar o formato; configuracao_restaurada o restaura no fim"""
+    return saida.CONFIG
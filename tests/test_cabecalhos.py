@@ -0,0 +1,80 @@
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from comum import lote
+from comum.cabecalhos import MAX_LINHAS_CABECALHO, detectar_cabecalho, localizar_marcador, normalizar_serie
+
+import gerador
+
+BANCOS_TABULARES = ['santander', 'itau', 'grafeno', 'airbi', 'banestes']
+
+
+def normalizar_texto(texto):
+    """Normalização célula a célula que os extratores usavam"""
+    if not isinstance(texto, str):
+        return ""
+    texto = unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('ASCII')
+    return ''.join(c for c in texto if c.isalnum() or c.isspace()).strip().lower()
+
+
+def cabecalho_por_linha(df, variacoes_cabecalhos, max_linhas=MAX_LINHAS_CABECALHO):
+    """Busca antiga, com iterrows, limitada às mesmas max_linhas"""
+    for idx, linha in df.iloc[:max_linhas].iterrows():
+        normalizadas = [normalizar_texto(str(celula)) for celula in linha.values]
+        colunas = {chave: [i for i, celula in enumerate(normalizadas) if any(v in celula for v in variacoes)]
+                   for chave, variacoes in variacoes_cabecalhos.items()}
+        if all(colunas.values()):
+            return idx, colunas
+    return None, {}
+
+
+def test_normalizar_serie_igual_a_normalizar_texto():
+    textos = ['Data da Ocorrência', '  VALOR (R$) ', 'Saldo\tTotal', 'Histórico/Descrição', 'ÇÃÕ',
+              'nº doc.', '', '123,45', 'ﬁm', 'a_b-c']
+    assert normalizar_serie(pd.Series(textos, dtype=object)).tolist() == [normalizar_texto(t) for t in textos]
+
+
+@pytest.mark.parametrize('banco', BANCOS_TABULARES)
+def test_cabecalho_dos_extratos_gerados(tmp_path, banco):
+    perfil = lote.carregar_modulo(banco).PERFIL
+    arquivo = gerador.gerar(str(tmp_path), banco, 50)[0]
+    df = pd.read_excel(arquivo, header=None)
+    esperado = cabecalho_por_linha(df, perfil['cabecalhos'])
+    assert esperado[0] is not None
+    assert detectar_cabecalho(df, perfil['cabecalhos']) == esperado
+
+
+@pytest.mark.parametrize('linhas', [
+    [['Extrato'], ['DATA', 'VALOR'], [1, 2]],
+    [['Dt. Lançamento', 'Vlr', 'Sld'], ['Data', 'Histórico', 'Valor', 'Saldo']],
+    [[np.nan, 'data', None], [3.5, 'valor', 'saldo']],
+    [['Data'], ['Valor'], ['Saldo']],
+    [['sem cabeçalho'], [1, 2, 3]],
+])
+def test_cabecalho_igual_a_busca_por_linha(linhas):
+    df = pd.DataFrame(linhas)
+    variacoes = {'data': ['data', 'dt'], 'valor': ['valor', 'vlr'], 'saldo': ['saldo', 'sld']}
+    assert detectar_cabecalho(df, variacoes) == cabecalho_por_linha(df, variacoes)
+
+
+def test_cabecalho_fora_da_janela():
+    df = pd.DataFrame([['x']] * 5 + [['Data', 'Valor']])
+    variacoes = {'data': ['data'], 'valor': ['valor']}
+    assert detectar_cabecalho(df, variacoes, max_linhas=5) == (None, {})
+    assert detectar_cabecalho(df, variacoes) == (5, {'data': [0], 'valor': [1]})
+
+
+def test_marcador_saldo_anterior_do_banestes(tmp_path):
+    arquivo = gerador.gerar(str(tmp_path), 'banestes', 50)[0]
+    df = pd.read_excel(arquivo, header=None)
+    assert localizar_marcador(df, ['saldo anterior']) == (2, gerador.SALDO_INICIAL)
+
+
+def test_marcador_so_no_inicio_e_no_fim():
+    df = pd.DataFrame([['x', None]] * 10)
+    df.iloc[5] = ['Saldo  Anterior', '1.234,56']
+    assert localizar_marcador(df, ['saldo anterior'], linhas_inicio=2, linhas_fim=2) == (None, None)
+    assert localizar_marcador(df, ['saldo anterior']) == (5, 1234.56)
@@ -0,0 +1,58 @@
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from comum import lote
+
+EXTRATO = ('Data_Mov;Historico;Valor;Deb_Cred\n'
+           '20230102;A;1.234;C\n'
+           '20230103;B;N/D;D\n'
+           '20230104;C;10,50;D\n')
+
+
+@pytest.fixture
+def extrato(tmp_path):
+    caminho = tmp_path / 'extrato.txt'
+    caminho.write_text(EXTRATO, encoding='utf-8')
+    return str(caminho)
+
+
+def extrair(arquivo, **opcoes):
+    impresso = io.StringIO()
+    with contextlib.redirect_stdout(impresso):
+        resultados = lote.carregar_modulo('caixa').extrair_dados(arquivo, **opcoes)
+    return resultados[0]['arquivo'], impresso.getvalue()
+
+
+@pytest.mark.parametrize('tamanho_parte', [None, 1])
+def test_valores_brasileiros_e_nao_numericos_no_xlsx(extrato, formato_saida, tamanho_parte):
+    formato_saida['formato'] = None
+    caminho, impresso = extrair(extrato, tamanho_parte=tamanho_parte)
+    assert pd.read_excel(caminho)['Valor'].tolist() == [1234, 'N/D', 10.5]
+    assert 'Aviso: 1 valor(es) não numérico(s)' in impresso
+
+
+def test_nao_numericos_avisados_na_saida_tipada(extrato, formato_saida):
+    formato_saida['formato'] = 'csv'
+    caminho, impresso = extrair(extrato)
+    assert pd.read_csv(caminho, dtype=str, keep_default_na=False)['Valor'].tolist() == ['1234.00', '', '10.50']
+    assert 'gravado(s) vazio(s)' in impresso
+
+
+@pytest.mark.parametrize('formato', [None, 'csv', 'parquet'])
+def test_data_vazia_numa_parte_igual_ao_arquivo_inteiro(tmp_path, formato_saida, formato):
+    caminho = tmp_path / 'extrato.txt'
+    caminho.write_text('Data_Mov;Historico;Valor;Deb_Cred\n'
+                       '20230102;A;1,00;C\n'
+                       ';B;2,00;D\n'
+                       '20230104;C;3,00;\n'
+                       '2023-01-05;D;4,00;C\n', encoding='utf-8')
+    formato_saida['formato'] = formato
+    ler = {None: pd.read_excel, 'csv': pd.read_csv, 'parquet': pd.read_parquet}[formato]
+    inteiro = ler(extrair(str(caminho))[0])
+    # Partes de 2 linhas: a primeira tem a data vazia, a segunda não
+    em_partes = ler(extrair(str(caminho), tamanho_parte=2)[0])
+    pd.testing.assert_frame_equal(em_partes, inteiro)
+    assert inteiro['Data_Mov'].notna().sum() == 3
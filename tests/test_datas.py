@@ -0,0 +1,71 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from comum.datas import analisar_data, converter_datas, normalizar_datas
+
+# Textos com o ano na frente: o resultado tem de ser o do pd.to_datetime das versões antigas
+ANO_PRIMEIRO = [
+    '20230102',
+    '20231231',
+    '2023-01-02',
+    '2023-01-02 10:00:00',
+    '2023-01-02T10:00:00',
+    '2023-01-02T10:00:00.250',
+    '2023/01/02',
+    '2023.01.02',
+    '2023-01-02 10:00',
+]
+
+
+def analise_antiga(valores):
+    """Como grafeno e o caminho alternativo de santander/itau/AIRBI convertiam as datas"""
+    serie = pd.Series(valores, dtype=object)
+    return [pd.to_datetime(valor, errors='coerce').strftime('%d/%m/%Y') for valor in serie]
+
+
+@pytest.mark.parametrize('texto', ANO_PRIMEIRO)
+def test_ano_primeiro_igual_a_analise_antiga(texto):
+    assert normalizar_datas(pd.Series([texto])).tolist() == analise_antiga([texto])
+
+
+def test_ano_primeiro_em_coluna_mista():
+    serie = pd.Series(ANO_PRIMEIRO + [None, 'lixo'])
+    esperado = analise_antiga(ANO_PRIMEIRO) + [np.nan, np.nan]
+    resultado = normalizar_datas(serie).tolist()
+    assert resultado[:len(ANO_PRIMEIRO)] == esperado[:len(ANO_PRIMEIRO)]
+    assert all(pd.isna(valor) for valor in resultado[len(ANO_PRIMEIRO):])
+
+
+def test_aaaammdd_inteiro():
+    # Data_Mov da Caixa chega do CSV como inteiro
+    assert normalizar_datas(pd.Series([20230102, 20230112])).tolist() == ['02/01/2023', '12/01/2023']
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('02/01/2023', '02/01/2023'),
+    ('02-01-2023', '02/01/2023'),
+    ('2/1/2023', '02/01/2023'),
+    ('02/01/2023 10:30:00', '02/01/2023'),
+])
+def test_dia_primeiro(texto, esperado):
+    assert normalizar_datas(pd.Series([texto])).tolist() == [esperado]
+
+
+def test_analisar_data_respeita_ano_primeiro():
+    assert analisar_data('2023/01/02') == datetime.datetime(2023, 1, 2)
+    assert analisar_data('02/01/23') == datetime.datetime(2023, 1, 2)
+    assert analisar_data('sem data') is None
+
+
+def test_converter_datas_mantem_datetime_e_valores_repetidos():
+    nativas = pd.Series(pd.to_datetime(['2023-01-02', '2023-01-03']))
+    assert converter_datas(nativas) is nativas
+
+    serie = pd.Series(['20230102', '02/01/2023', None, '20230102'], index=[5, 6, 7, 8])
+    resultado = converter_datas(serie)
+    assert list(resultado.index) == [5, 6, 7, 8]
+    assert resultado[5] == resultado[6] == resultado[8] == pd.Timestamp('2023-01-02')
+    assert pd.isna(resultado[7])
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from comum.dinheiro import LIMITE_CENTAVOS_EXATOS, centavos, converter_centavos, converter_valores
+from comum.formatacao import formatar_centavos
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('1.234', 1234.0),
+    ('12.345.678', 12345678.0),
+    ('-1.234', -1234.0),
+    ('1.234,56', 1234.56),
+    (' -1.234,56 ', -1234.56),
+    ('1,5', 1.5),
+    ('1234.5', 1234.5),
+    ('1.5', 1.5),
+    ('1234', 1234.0),
+])
+def test_texto_brasileiro_antes_do_numerico(texto, esperado):
+    assert converter_valores(pd.Series([texto], dtype=object)).tolist() == [esperado]
+
+
+@pytest.mark.parametrize('dtype', [object, 'str'])
+def test_texto_que_nao_e_numero_vira_nan(dtype):
+    resultado = converter_valores(pd.Series(['N/D', '', '1.234.56', None], dtype=dtype))
+    assert resultado.isna().all()
+
+
+def test_colunas_numericas_ficam_como_estao():
+    assert converter_valores(pd.Series([1.234, np.nan])).tolist()[0] == 1.234
+    assert converter_valores(pd.Series([1, None], dtype='Int64')).tolist()[0] == 1.0
+    # Números misturados com textos numa coluna object não passam pelo formato brasileiro
+    assert converter_valores(pd.Series([1.234, '1.234'], dtype=object)).tolist() == [1.234, 1234.0]
+
+
+def test_converter_centavos():
+    resultado = converter_centavos(pd.Series(['1.234', '0,1', '-0,05', 'N/D'], index=[3, 4, 5, 6]))
+    assert str(resultado.dtype) == 'Int64'
+    assert list(resultado.index) == [3, 4, 5, 6]
+    assert resultado.tolist()[:3] == [123400, 10, -5]
+    assert resultado.isna().tolist() == [False, False, False, True]
+
+
+def test_centavos_arredondam_como_o_texto_formatado():
+    rng = np.random.default_rng(0)
+    # Empates aparentes (x,xx5) e valores quaisquer, positivos e negativos
+    valores = np.concatenate([np.arange(-2000, 2000) / 1000 + 0.0005, rng.laplace(0, 1e6, 5000),
+                              [0.125, 2.675, 1.005, -1.005, 0.0, -0.0, 1e12 + 0.005]])
+    esperado = [int(f"{v:.2f}".replace('.', '')) for v in valores]
+    assert centavos(pd.Series(valores)).tolist() == esperado
+
+
+def test_centavos_nulos_fora_do_limite():
+    resultado = centavos(pd.Series([np.nan, np.inf, LIMITE_CENTAVOS_EXATOS, -LIMITE_CENTAVOS_EXATOS / 2]))
+    assert resultado.isna().tolist() == [True, True, True, False]
+
+
+def test_texto_brasileiro_volta_aos_mesmos_centavos():
+    inteiros = np.random.default_rng(1).integers(-10**13, 10**13, 5000)
+    textos = formatar_centavos(pd.Series(inteiros, dtype='Int64'))
+    assert converter_centavos(textos).tolist() == inteiros.tolist()
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from comum.dinheiro import centavos, converter_centavos_mantendo_texto
+from comum.formatacao import formatar_centavos, formatar_para_saida
+
+from formatacao import formatar_contabil
+
+
+def test_formatar_centavos_igual_ao_formatador_por_celula():
+    rng = np.random.default_rng(0)
+    valores = pd.Series(np.round(rng.laplace(0, 50_000, 5000), 2))
+    valores[rng.random(len(valores)) < 0.05] = np.nan
+    extremos = pd.Series([0.0, 0.01, -0.01, 0.1, 999.99, 1000.0, -1000.0, 123456789.12, -9.99e12, np.nan])
+    valores = pd.concat([valores, extremos], ignore_index=True)
+    esperado = valores.apply(formatar_contabil).replace('-0,00', '0,00')
+    assert formatar_centavos(centavos(valores)).tolist() == esperado.tolist()
+
+
+def test_formatar_centavos_de_lista_e_coluna_vazia():
+    assert formatar_centavos([123456, -5, None]).tolist() == ['1.234,56', '-0,05', '']
+    assert formatar_centavos(pd.Series([], dtype='Int64')).tolist() == []
+
+
+def test_formatar_para_saida_so_nas_colunas_pedidas():
+    df = pd.DataFrame({'Valor': pd.array([150, -2], dtype='Int64'),
+                       'Saldo': pd.array([100_000, None], dtype='Int64'),
+                       'Historico': ['PIX', 'TED']})
+    texto = formatar_para_saida(df, ['Valor', 'Saldo'])
+    assert texto.to_dict('list') == {'Valor': ['1,50', '-0,02'], 'Saldo': ['1.000,00', ''],
+                                     'Historico': ['PIX', 'TED']}
+    # O DataFrame original continua em centavos
+    assert df['Valor'].tolist() == [150, -2]
+
+
+def test_texto_que_nao_e_numero_sai_como_no_formatador_por_celula():
+    valores = pd.Series([1234.5, 'N/D', 'abc', '1.234,56', ' ', '', None, np.nan, -0.5, 'R$ -', float('inf')],
+                        dtype=object)
+    df = converter_centavos_mantendo_texto(pd.DataFrame({'Valor': valores}), ['Valor'])
+    texto = formatar_para_saida(df, ['Valor'])
+    assert list(texto.columns) == ['Valor']
+    assert texto['Valor'].tolist() == valores.apply(formatar_contabil).tolist()
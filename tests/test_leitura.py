@@ -0,0 +1,85 @@
+import datetime
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from comum.leitura import (TAMANHO_AMOSTRA_CSV, abrir_planilhas, detectar_formato_arquivo, detectar_formato_csv,
+                           ler_csv, ler_linhas_xlsx, tabela_de_linhas)
+
+import gerador
+
+
+def tabela_em_fluxo(arquivo, aba):
+    """A aba lida linha a linha, como na leitura em fluxo do motor"""
+    ws = abrir_planilhas(arquivo).book[aba]
+    return tabela_de_linhas(ler_linhas_xlsx(ws.iter_rows(values_only=True), None))
+
+
+def test_encoding_trocado_depois_da_amostra(tmp_path):
+    # Os primeiros 64 KiB são ASCII; o primeiro acento cp1252 só aparece depois
+    linhas = [b'Data;Historico;Valor']
+    linhas += [f'02/01/2023;PIX {i:06d};1.234,56'.encode('ascii') for i in range(TAMANHO_AMOSTRA_CSV // 20)]
+    linhas += ['03/01/2023;TARIFA SERVIÇO;-10,00'.encode('cp1252')]
+    caminho = tmp_path / 'extrato.csv'
+    caminho.write_bytes(b'\r\n'.join(linhas) + b'\r\n')
+
+    assert detectar_formato_csv(str(caminho))['encoding'] == 'utf-8'
+    df, formato = ler_csv(str(caminho))
+    assert formato['encoding'] == 'cp1252'
+    assert formato['sep'] == ';'
+    assert len(df) == len(linhas)
+    assert df.iloc[0, 1] == 'Historico'
+    assert df.iloc[-1, 1] == 'TARIFA SERVIÇO'
+
+
+def test_utf8_com_bom(tmp_path):
+    caminho = tmp_path / 'extrato.csv'
+    caminho.write_bytes('Data,Histórico,Valor\n02/01/2023,Depósito,"1.234,56"\n'.encode('utf-8-sig'))
+    df, formato = ler_csv(str(caminho))
+    assert formato['encoding'] == 'utf-8-sig'
+    assert df.values.tolist() == [['Data', 'Histórico', 'Valor'], ['02/01/2023', 'Depósito', '1.234,56']]
+
+
+@pytest.mark.parametrize('banco', ['santander', 'itau', 'grafeno', 'airbi', 'banestes', 'spx'])
+def test_linhas_xlsx_iguais_ao_read_excel(tmp_path, banco):
+    arquivo = gerador.gerar(str(tmp_path), banco, 200)[0]
+    for aba in pd.ExcelFile(arquivo).sheet_names:
+        pd.testing.assert_frame_equal(tabela_em_fluxo(arquivo, aba), pd.read_excel(arquivo, sheet_name=aba, header=None))
+
+
+def test_linhas_xlsx_com_tipos_mistos(tmp_path):
+    caminho = str(tmp_path / 'misto.xlsx')
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for linha in [['Extrato', None, None, None], [], ['Data', 'Valor', 'Doc', 'Obs'],
+                  [datetime.datetime(2023, 1, 2), 10.0, 123, '#N/A'],
+                  [datetime.datetime(2023, 1, 3, 10, 30), 10.5, None, 'texto'],
+                  ['04/01/2023', '1.234,56', 7, None], [None, None, None, 'só a última']]:
+        ws.append(linha)
+    wb.save(caminho)
+    pd.testing.assert_frame_equal(tabela_em_fluxo(caminho, ws.title), pd.read_excel(caminho, header=None))
+
+
+@pytest.mark.parametrize('banco', ['santander', 'itau'])
+def test_formato_dos_csv_gerados(tmp_path, banco):
+    arquivo = gerador.gerar(str(tmp_path), banco, 50)[1]
+    df, formato = ler_csv(arquivo)
+    assert formato['sep'] == ';'
+    pd.testing.assert_frame_equal(df, pd.read_csv(arquivo, sep=';', header=None, encoding='latin-1', dtype=str),
+                                  check_dtype=False)
+
+
+@pytest.mark.parametrize('nome, conteudo, formato', [
+    ('extrato.csv', 'Data;Valor\n', 'texto'),
+    ('extrato.TXT', 'texto livre', 'texto'),
+    ('extrato.xls', 'Data;Histórico;Valor\n02/01/2023;PIX;10,00\n', 'texto'),
+    ('extrato.xls', 'Data,Valor\n' * 2000, 'texto'),
+    ('extrato.xlsx', '{"data": "02/01/2023", "valor": 10}', None),
+    ('extrato.xls', 'linha de log sem colunas\noutra linha\n', None),
+    ('extrato.xls', 'Data;Valor\n', None),
+])
+def test_texto_so_com_extensao_ou_colunas_consistentes(tmp_path, nome, conteudo, formato):
+    caminho = tmp_path / nome
+    caminho.write_text(conteudo, encoding='utf-8')
+    assert detectar_formato_arquivo(str(caminho)) == formato
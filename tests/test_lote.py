@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from comum import cache, lote, motor
+
+import gerador
+
+
+def executar(banco, pasta, capsys):
+    codigo = lote.main([banco, str(pasta), '-p', '1', '--no-cache'])
+    return codigo, capsys.readouterr().out
+
+
+@pytest.mark.parametrize('banco', ['santander', 'banestes', 'caixa', 'spx'])
+def test_arquivo_corrompido_conta_como_erro(tmp_path, capsys, banco):
+    (tmp_path / 'corrompido.xlsx').write_bytes(b'PK\x03\x04nao e um zip')
+    codigo, impresso = executar(banco, tmp_path, capsys)
+    assert codigo == 1
+    assert '[ERRO] corrompido.xlsx' in impresso
+    assert '1 erro(s)' in impresso
+
+
+@pytest.mark.parametrize('banco', ['santander', 'spx'])
+def test_csv_sem_cabecalho_conta_como_erro(tmp_path, capsys, banco):
+    (tmp_path / 'sem_cabecalho.csv').write_text('a;b;c\n1;2;3\n', encoding='utf-8')
+    codigo, impresso = executar(banco, tmp_path, capsys)
+    assert codigo == 1
+    assert '[ERRO] sem_cabecalho.csv' in impresso
+
+
+def test_lote_sem_erros(tmp_path, capsys):
+    gerador.gerar(str(tmp_path), 'santander', 50)
+    codigo, impresso = executar('santander', tmp_path / 'santander', capsys)
+    assert codigo == 0
+    assert '[ERRO]' not in impresso
+    # A aba "Resumo", sem extrato, não é erro
+    assert '[OK] extrato.xlsx - Extrato: 50 linhas' in impresso
+
+
+def test_refresh_regrava_as_mesmas_saidas(tmp_path, capsys):
+    cache.CONFIG['pasta'] = str(tmp_path / 'cache')
+    pasta = tmp_path / 'santander'
+    gerador.gerar(str(tmp_path), 'santander', 50)
+    antes = None
+    for opcoes in ([], ['--refresh'], ['--refresh'], []):
+        assert lote.main(['santander', str(pasta), '-p', '1'] + opcoes) == 0
+        saidas = sorted(nome for nome in os.listdir(pasta) if '_extraido_' in nome)
+        assert antes is None or saidas == antes
+        antes = saidas
+    capsys.readouterr()
+    assert saidas == ['extrato_extraido_CSV_1.csv', 'extrato_extraido_Extrato_1.xlsx']
+
+
+def test_cache_so_pelo_lote(tmp_path, capsys):
+    """Fora do lote (interface gráfica) o cache fica desligado; o lote o liga"""
+    cache.CONFIG['pasta'] = str(tmp_path / 'cache')
+    arquivo = gerador.gerar(str(tmp_path), 'santander', 50)[0]
+    lote.carregar_modulo('santander').extrair_dados(arquivo)
+    assert not os.path.exists(tmp_path / 'cache')
+    assert lote.main(['santander', arquivo, '-p', '1']) == 0
+    capsys.readouterr()
+    assert os.listdir(tmp_path / 'cache')
+
+@pytest.mark.parametrize('opcoes', [['--output-format', 'parquet'], ['--dataset', 'dados']])
+def test_incremental_nao_combina_com_saida_tipada(tmp_path, capsys, opcoes):
+    with pytest.raises(SystemExit) as saiu:
+        lote.main(['santander', str(tmp_path), '--incremental', '1234', *opcoes])
+    assert saiu.value.code == 2
+    assert '--incremental' in capsys.readouterr().err
+
+
+@pytest.fixture
+def pools_das_abas(monkeypatch):
+    """Registra os max_workers de cada pool aberto por processar_excel"""
+    abertos = []
+    original = motor.ProcessPoolExecutor
+
+    def registrar(max_workers, **kwargs):
+        abertos.append(max_workers)
+        return original(max_workers=max_workers, **kwargs)
+
+    monkeypatch.setattr(motor, 'ProcessPoolExecutor', registrar)
+    return abertos
+
+
+def test_abas_em_sequencia_por_padrao(tmp_path, capsys, pools_das_abas, monkeypatch):
+    monkeypatch.setattr(motor.os, 'cpu_count', lambda: 4)
+    gerador.gerar(str(tmp_path), 'santander', 50)
+    codigo, _ = executar('santander', tmp_path / 'santander', capsys)
+    assert codigo == 0
+    assert pools_das_abas == []
+
+
+def test_pool_das_abas_em_arquivo_grande_ou_pedido(tmp_path, capsys, pools_das_abas, monkeypatch):
+    monkeypatch.setattr(motor.os, 'cpu_count', lambda: 4)
+    pasta = tmp_path / 'santander'
+    gerador.gerar(str(tmp_path), 'santander', 50)
+    os.remove(pasta / 'extrato.csv')
+    monkeypatch.setattr(motor, 'TAMANHO_POOL_PLANILHAS', 1)
+    codigo, impresso = executar('santander', pasta, capsys)
+    assert codigo == 0
+    assert '[OK] extrato.xlsx - Extrato: 50 linhas' in impresso
+    monkeypatch.setattr(motor, 'TAMANHO_POOL_PLANILHAS', 8 * 2**20)
+    assert lote.main(['santander', str(pasta), '-p', '1', '--no-cache', '--processos-planilhas', '2']) == 0
+    # Duas abas: o pool nunca passa do número de abas
+    assert pools_das_abas == [2, 2]
@@ -0,0 +1,107 @@
+import os
+import re
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from comum import incremental, lote, motor
+
+import gerador
+
+BANCOS_TABULARES = ['santander', 'itau', 'grafeno', 'airbi', 'banestes']
+
+
+def extrair(banco, pasta, *opcoes):
+    assert lote.main([banco, str(pasta), '-p', '1', '--no-cache', *opcoes]) == 0
+
+
+def celulas(caminho):
+    """Valor e formato de número de cada célula da primeira aba"""
+    ws = openpyxl.load_workbook(caminho).active
+    return [[(celula.value, celula.number_format) for celula in linha] for linha in ws.iter_rows()]
+
+
+@pytest.mark.parametrize('banco', BANCOS_TABULARES)
+def test_leitura_em_fluxo_igual_a_leitura_inteira(tmp_path, capsys, banco):
+    arquivo = gerador.gerar(str(tmp_path), banco, 300)[0]
+    base = os.path.splitext(arquivo)[0]
+    motor.LEITURA_EM_FLUXO = True
+    extrair(banco, arquivo)
+    motor.LEITURA_EM_FLUXO = False
+    extrair(banco, arquivo)
+    capsys.readouterr()
+    assert os.path.exists(f"{base}_extraido_Extrato_1.xlsx")
+    assert celulas(f"{base}_extraido_Extrato_1.xlsx") == celulas(f"{base}_extraido_Extrato_2.xlsx")
+
+
+@pytest.mark.parametrize('banco', ['santander', 'banestes'])
+def test_leitura_em_fluxo_igual_a_leitura_inteira_tipada(tmp_path, capsys, banco):
+    arquivo = gerador.gerar(str(tmp_path), banco, 300)[0]
+    base = os.path.splitext(arquivo)[0]
+    motor.LEITURA_EM_FLUXO = True
+    extrair(banco, arquivo, '--output-format', 'parquet')
+    motor.LEITURA_EM_FLUXO = False
+    extrair(banco, arquivo, '--output-format', 'parquet')
+    capsys.readouterr()
+    pd.testing.assert_frame_equal(pd.read_parquet(f"{base}_extraido_Extrato_1.parquet"),
+                                  pd.read_parquet(f"{base}_extraido_Extrato_2.parquet"))
+
+
+def test_incremental_igual_a_uma_execucao_so(tmp_path, capsys):
+    """Duas exportações acumuladas, uma depois da outra, dão o mesmo CSV que só a última"""
+    dados = gerador.lancamentos(120)
+    for pasta, linhas in (('mes1', 70), ('mes2', 120), ('unica', 120)):
+        os.makedirs(tmp_path / pasta)
+        gerador.gerar_tabular(str(tmp_path / pasta), 'santander', dados.iloc[:linhas])
+
+    incremental.CONFIG['pasta'] = str(tmp_path / 'estado')
+    extrair('santander', tmp_path / 'mes1', '--incremental', '1234')
+    extrair('santander', tmp_path / 'mes2', '--incremental', '1234')
+    impresso = capsys.readouterr().out
+    assert '[OK] extrato.csv - CSV: 50 linhas' in impresso
+    assert '[OK] extrato.xlsx - Extrato: 50 linhas' in impresso
+
+    incremental.CONFIG['pasta'] = str(tmp_path / 'estado_unica')
+    extrair('santander', tmp_path / 'unica', '--incremental', '1234')
+    capsys.readouterr()
+    for planilha in ('CSV', 'Extrato'):
+        nome = f"1234_extraido_{planilha}_incremental.csv"
+        acumulado = pd.read_csv(tmp_path / 'mes1' / nome, dtype=str)
+        assert len(acumulado) == 120
+        pd.testing.assert_frame_equal(acumulado, pd.read_csv(tmp_path / 'unica' / nome, dtype=str))
+    # A exportação repetida não acrescenta nada
+    incremental.CONFIG['pasta'] = str(tmp_path / 'estado')
+    extrair('santander', tmp_path / 'mes2', '--incremental', '1234')
+    assert len(pd.read_csv(tmp_path / 'mes1' / "1234_extraido_Extrato_incremental.csv")) == 120
+
+
+def trocar_valores(arquivo, textos):
+    """Troca o Valor das primeiras linhas de lançamento da aba Extrato pelos textos"""
+    wb = openpyxl.load_workbook(arquivo)
+    ws = wb['Extrato']
+    linha = next(celula.row for celula in ws['A'] if celula.value == 'Data') + 1
+    coluna = next(celula.column for celula in ws[linha - 1] if celula.value == 'Valor')
+    for deslocamento, texto in enumerate(textos):
+        ws.cell(linha + deslocamento, coluna).value = texto
+    wb.save(arquivo)
+
+
+def test_valor_nao_numerico_sai_como_texto(tmp_path, capsys):
+    arquivo = gerador.gerar(str(tmp_path), 'santander', 50)[0]
+    trocar_valores(arquivo, ['N/D', 'abc'])
+    extrair('santander', arquivo, '-v')
+    impresso = capsys.readouterr().out
+    assert 'Aviso: 2 valor(es) não numérico(s) em Valor (ex.: N/D, abc) mantido(s) como texto' in impresso
+    ws = openpyxl.load_workbook(impresso.split('→ ')[1].split()[0]).active
+    cabecalho = [celula.value for celula in ws[1]]
+    valores = [linha[cabecalho.index('Valor')] for linha in ws.iter_rows(min_row=2, values_only=True)]
+    assert valores[:2] == ['N/D', 'abc']
+    assert all(re.fullmatch(r'-?[\d.]+,\d\d', valor) for valor in valores[2:])
+
+    extrair('santander', arquivo, '-v', '--output-format', 'parquet')
+    impresso = capsys.readouterr().out
+    assert 'Aviso: 2 valor(es) não numérico(s) em Valor (ex.: N/D, abc) gravado(s) vazio(s) na saída tipada' in impresso
+    tabela = pd.read_parquet(impresso.split('→ ')[1].split()[0])
+    assert list(tabela.columns) == cabecalho
+    assert tabela['Valor'].isna().tolist()[:3] == [True, True, False]
@@ -0,0 +1,78 @@
+import contextlib
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from comum import lote, saida
+
+import gerador
+
+
+@pytest.fixture
+def extrato_caixa(tmp_path):
+    return gerador.gerar(str(tmp_path), 'caixa', 2000)[0]
+
+
+def extrair_caixa(arquivo, formato):
+    saida.CONFIG['formato'] = formato
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultados = lote.carregar_modulo('caixa').extrair_dados(arquivo)
+    assert len(resultados) == 1
+    return resultados[0]['arquivo']
+
+
+def saida_xlsx_caixa(arquivo):
+    """Saída de sempre da Caixa, com a data AAAAMMDD copiada da entrada, no formato das tipadas"""
+    df = pd.read_excel(extrair_caixa(arquivo, None))
+    df['Data_Mov'] = pd.to_datetime(df['Data_Mov'].astype(str), format='%Y%m%d')
+    df['Valor'] = (df['Valor'] * 100).round().astype('Int64')
+    return df
+
+
+@pytest.mark.parametrize('formato', ['csv', 'parquet', 'arrow'])
+def test_caixa_tipada_igual_a_xlsx(extrato_caixa, formato_saida, formato):
+    if formato != 'csv':
+        pytest.importorskip('pyarrow')
+    esperado = saida_xlsx_caixa(extrato_caixa)
+    caminho = extrair_caixa(extrato_caixa, formato)
+
+    if formato == 'csv':
+        tipada = pd.read_csv(caminho, dtype={'Valor': str})
+        tipada['Data_Mov'] = pd.to_datetime(tipada['Data_Mov'], format='%Y-%m-%d')
+        tipada['Valor'] = tipada['Valor'].str.replace('.', '', regex=False).astype('Int64')
+    else:
+        import pyarrow.feather
+        import pyarrow.parquet
+        tabela = pyarrow.parquet.read_table(caminho) if formato == 'parquet' else pyarrow.feather.read_table(caminho)
+        tipada = tabela.to_pandas()
+        tipada['Data_Mov'] = pd.to_datetime(tipada['Data_Mov'])
+        tipada['Valor'] = tipada['Valor'].map(lambda v: int(v * 100)).astype('Int64')
+
+    pd.testing.assert_frame_equal(tipada[esperado.columns], esperado, check_dtype=False)
+
+
+def test_caixa_dataset_particionado_pelo_mes_da_data(extrato_caixa, formato_saida, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    formato_saida['dataset'] = str(tmp_path / 'dataset')
+    extrair_caixa(extrato_caixa, 'parquet')
+    tabela = pq.read_table(formato_saida['dataset']).to_pandas()
+    meses = pd.to_datetime(tabela['Data_Mov']).dt.strftime('%Y-%m')
+    assert (meses == tabela['mes'].astype(str)).all()
+    esperados = saida_xlsx_caixa(extrato_caixa)['Data_Mov'].dt.strftime('%Y-%m')
+    assert sorted(tabela['mes'].astype(str)) == sorted(esperados)
+
+
+@pytest.mark.parametrize('banco', ['santander', 'caixa', 'spx'])
+def test_dataset_informa_caminhos_gravados(tmp_path, formato_saida, banco):
+    pytest.importorskip('pyarrow.parquet')
+    formato_saida['dataset'] = str(tmp_path / 'dataset')
+    formato_saida['formato'] = 'parquet'
+    with contextlib.redirect_stdout(io.StringIO()):
+        modulo = lote.carregar_modulo(banco)
+        resultados = [resultado for arquivo in gerador.gerar(str(tmp_path), banco, 200)
+                      for resultado in lote.executar_extrator(modulo, arquivo)]
+    assert resultados
+    assert {resultado['arquivo'] for resultado in resultados} == {formato_saida['dataset']}
+    assert os.path.isdir(formato_saida['dataset'])
@@ -0,0 +1,64 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from comum import lote
+from comum.dinheiro import centavos, extrair_valores_serie
+from comum.formatacao import formatar_centavos
+
+from valores_spx import extrair_valor_numerico
+
+TEXTOS = ['R$ 1.234,56', '-1.234,56', '1.234.567', '1,5', '12.5', 'D 10,00 C 20,00',
+          'saldo -3,1', 'sem valor', '', '  ', None, '1.234,5 e 99', '+7', '0,001']
+
+
+@pytest.fixture(scope='module')
+def extrator():
+    return lote.carregar_modulo('spx').ExtratorDadosFinanceiros(interface=False)
+
+
+def formatar_moeda_brasileira(valor):
+    """Referência célula a célula: '{:,.2f}' com os separadores trocados"""
+    formatado = "{:,.2f}".format(abs(valor)).replace(",", "X").replace(".", ",").replace("X", ".")
+    return "-" + formatado if valor < 0 else formatado
+
+
+def extrair_de_texto_nao_estruturado(texto):
+    """Referência linha a linha: primeira data, primeiro e último valor"""
+    datas = re.findall(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b', texto)
+    valores = [v for v in map(extrair_valor_numerico, re.split(r'\s+', texto)) if v is not None]
+    if datas and len(valores) >= 2:
+        return {'Data': datas[0], 'Valor': valores[0], 'Saldo': valores[-1]}
+    return None
+
+
+def test_extrair_valores_serie_igual_a_referencia():
+    serie = pd.Series(TEXTOS, dtype=object)
+    esperado = serie.apply(extrair_valor_numerico).astype(float)
+    pd.testing.assert_series_equal(extrair_valores_serie(serie), esperado)
+
+
+def test_formatar_centavos_igual_a_referencia():
+    valores = np.round(np.random.default_rng(0).normal(0, 1e6, 2000), 2)
+    valores = valores[valores != 0]
+    esperado = [formatar_moeda_brasileira(v) for v in valores]
+    assert formatar_centavos(centavos(pd.Series(valores))).tolist() == esperado
+
+
+def test_tabela_nao_estruturada_igual_a_referencia(extrator):
+    df = pd.DataFrame([
+        ['01/02/2024 PIX', '1.234,56', 'saldo 10.000,00'],
+        ['sem data', '10,00', '20,00'],
+        ['05-03-24', 'TED -99,90', None],
+        ['10/03/2024', 'só um 5,00', 'texto'],
+        ['15/03/2024 e 16/03/2024', '1,00 2,00', '3,00'],
+    ])
+    linhas = [extrair_de_texto_nao_estruturado(' '.join(map(str, linha))) for linha in df.itertuples(index=False)]
+    esperado = pd.DataFrame([linha for linha in linhas if linha is not None])
+    pd.testing.assert_frame_equal(extrator.extrair_de_tabela_nao_estruturada(df), esperado)
+
+
+def test_tabela_sem_linhas_validas(extrator):
+    assert extrator.extrair_de_tabela_nao_estruturada(pd.DataFrame([['a', 'b'], ['c', '1,00']])) is None